@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the container lookups of the etcd DB backend at scale.
+
+A number of containers, spread over a number of hosts, are written into the
+etcd server configured in zun.conf. The latency of listing all of them, of
+listing the containers of one host and of getting one container by name is
+then reported. The containers are deleted at the end unless --keep is given.
+The etcd server should be dedicated to the benchmark.
+
+Usage: python tools/benchmark_etcd.py --containers 10000 --hosts 100
+"""
+
+from __future__ import print_function
+
+import argparse
+import math
+import random
+import sys
+import time
+
+from oslo_utils import uuidutils
+
+from zun.common import context as zun_context
+import zun.conf
+from zun.db.etcd import api as etcd_api
+
+CONF = zun.conf.CONF
+
+PROJECT_ID = 'benchmark'
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(math.ceil(pct / 100.0 * len(values))) - 1)
+    return values[max(index, 0)]
+
+
+def measure(name, func, repeat):
+    latencies = []
+    for i in range(repeat):
+        start = time.time()
+        func(i)
+        latencies.append(time.time() - start)
+    print('  %-22s avg/p50/p99 ms: %.3f / %.3f / %.3f' % (
+        name + ':',
+        1000 * sum(latencies) / len(latencies),
+        1000 * percentile(latencies, 50),
+        1000 * percentile(latencies, 99)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--containers', type=int, default=10000)
+    parser.add_argument('--hosts', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep', action='store_true')
+    parser.add_argument('--config-file', action='append', default=[])
+    args = parser.parse_args()
+
+    default_config_files = args.config_file or None
+    CONF([], project='zun', default_config_files=default_config_files)
+    ctx = zun_context.RequestContext(user_id='benchmark',
+                                     project_id=PROJECT_ID)
+    conn = etcd_api.get_connection()
+    rand = random.Random(args.seed)
+
+    start = time.time()
+    uuids = []
+    for i in range(args.containers):
+        container = conn.create_container(ctx, {
+            'uuid': uuidutils.generate_uuid(),
+            'name': 'benchmark-%d' % i,
+            'project_id': PROJECT_ID,
+            'user_id': 'benchmark',
+            'host': 'host%d' % rand.randrange(args.hosts),
+            'image': 'cirros',
+        })
+        uuids.append(container.uuid)
+    print('%d containers on %d hosts, written in %.1f s' % (
+        args.containers, args.hosts, time.time() - start))
+
+    try:
+        measure('list all', lambda i: conn.list_containers(ctx),
+                max(1, args.repeat // 10))
+        measure('list by host',
+                lambda i: conn.list_containers(
+                    ctx, filters={'host': 'host%d' % (i % args.hosts)}),
+                args.repeat)
+        measure('get by name',
+                lambda i: conn.get_container_by_name(
+                    ctx, 'benchmark-%d' % rand.randrange(args.containers)),
+                args.repeat)
+    finally:
+        if not args.keep:
+            for uuid in uuids:
+                conn.destroy_container(ctx, uuid)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Replay a synthetic docker event stream through the docker event watcher.
+
+A number of containers are written into the database configured in
+zun.conf, and a stream of start and die events of those containers, at a
+given rate, is consumed by the DockerEventWatcher. The stream is cut every
+--reconnect events and resumed like docker does: from the second of the last
+seen event for a watcher tracking it in seconds, which processes the events
+of that second again, and from its nanosecond for the DockerEventWatcher,
+which skips the events it already saw. The events delivered and processed,
+and the throughput, of both replays are reported. The containers are deleted
+at the end. The database should be dedicated to the benchmark.
+
+Usage: python tools/benchmark_event_watcher.py --containers 100 --events 5000
+"""
+
+from __future__ import print_function
+
+import argparse
+import random
+import sys
+import time
+
+from oslo_utils import uuidutils
+
+from zun.common import context as zun_context
+import zun.conf
+from zun.container.docker import driver as docker_driver
+from zun.container.docker import event_watcher
+from zun.db import api as dbapi
+
+CONF = zun.conf.CONF
+
+PROJECT_ID = 'benchmark'
+
+
+def build_events(containers, num_events, rate, rand):
+    events = []
+    time_nano = int(time.time() * 10 ** 9)
+    running = {}
+    for i in range(num_events):
+        time_nano += int(rand.expovariate(rate) * 10 ** 9)
+        uuid, container_id = rand.choice(containers)
+        action = 'die' if running.get(uuid) else 'start'
+        running[uuid] = action == 'start'
+        events.append({
+            'Type': 'container',
+            'Action': action,
+            'Actor': {'ID': container_id,
+                      'Attributes': {'name': 'zun-' + uuid,
+                                     'exitCode': '0'}},
+            'time': time_nano // 10 ** 9,
+            'timeNano': time_nano,
+        })
+    return events
+
+
+def resume_from(events, index, in_seconds):
+    """Return the index of the first event docker sends on a reconnect."""
+    last = events[index - 1]
+    while index > 0:
+        previous = events[index - 1]
+        if in_seconds and previous['time'] < last['time']:
+            break
+        if not in_seconds and previous['timeNano'] < last['timeNano']:
+            break
+        index -= 1
+    return index
+
+
+def replay(ctx, events, reconnect, in_seconds):
+    watcher = event_watcher.DockerEventWatcher(docker_driver.DockerDriver())
+    process_event = watcher.process_event
+    processed = [0]
+
+    def _process_event(ctx, event):
+        processed[0] += 1
+        process_event(ctx, event)
+
+    watcher.process_event = _process_event
+    delivered = 0
+    cut = 0
+    start = time.time()
+    while cut < len(events):
+        index = resume_from(events, cut, in_seconds) if cut else 0
+        stream = events[index:cut + reconnect]
+        delivered += len(stream)
+        if in_seconds:
+            for event in stream:
+                _process_event(ctx, event)
+        else:
+            watcher.consume(ctx, stream)
+        cut += reconnect
+    elapsed = time.time() - start
+    return delivered, processed[0], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--containers', type=int, default=100)
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--rate', type=float, default=200.0,
+                        help='events per second')
+    parser.add_argument('--reconnect', type=int, default=100,
+                        help='events between two reconnects')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--config-file', action='append', default=[])
+    args = parser.parse_args()
+
+    default_config_files = args.config_file or None
+    CONF([], project='zun', default_config_files=default_config_files)
+    ctx = zun_context.get_admin_context(all_tenants=True)
+    rand = random.Random(args.seed)
+
+    containers = []
+    for i in range(args.containers):
+        container = dbapi.create_container(ctx, {
+            'uuid': uuidutils.generate_uuid(),
+            'name': 'benchmark-%d' % i,
+            'project_id': PROJECT_ID,
+            'user_id': 'benchmark',
+            'container_id': uuidutils.generate_uuid(dashed=False),
+            'image': 'cirros',
+        })
+        containers.append((container.uuid, container.container_id))
+    events = build_events(containers, args.events, args.rate, rand)
+
+    try:
+        for name, in_seconds in (('since in seconds', True),
+                                 ('since in nanoseconds', False)):
+            delivered, processed, elapsed = replay(
+                ctx, events, args.reconnect, in_seconds)
+            print('%s:' % name)
+            print('  events delivered/processed: %d / %d' % (delivered,
+                                                             processed))
+            print('  events per second:          %.1f' % (
+                len(events) / elapsed))
+    finally:
+        for uuid, container_id in containers:
+            dbapi.destroy_container(ctx, uuid)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Replay container placements against a synthetic fleet of compute nodes.
+
+The FilterScheduler, with the filters and weighers configured in zun.conf,
+places a number of containers onto the host states of a synthetic fleet of
+compute nodes. The resources of the chosen host are claimed after each
+placement. At the end,
+the imbalance of the fleet and the scheduling latency are reported, next to
+the same replay done with a random choice among the filtered nodes.
+
+Usage: python tools/simulate_scheduler.py --hosts 100 --containers 2000
+"""
+
+from __future__ import print_function
+
+import argparse
+import math
+import random
+import sys
+import time
+
+from oslo_utils import uuidutils
+
+from zun.common import context as zun_context
+from zun.common import exception
+import zun.conf
+from zun import objects
+from zun.scheduler import filter_scheduler
+from zun.scheduler import host_manager
+
+CONF = zun.conf.CONF
+
+HOST_CPUS = (8, 16, 32, 48)
+HOST_MEMORY = (16384, 32768, 65536)
+CONTAINER_CPUS = (0.1, 0.5, 1.0, 2.0)
+CONTAINER_MEMORY = (128, 256, 512, 1024)
+
+
+def build_fleet(ctx, num_hosts, rand):
+    nodes = []
+    for i in range(num_hosts):
+        node = objects.ComputeNode(ctx)
+        node.hostname = 'host%d' % i
+        node.cpus = rand.choice(HOST_CPUS)
+        node.cpu_used = 0.0
+        node.mem_total = rand.choice(HOST_MEMORY)
+        node.mem_free = node.mem_total
+        node.mem_available = node.mem_total
+        node.total_containers = 0
+        node.running_containers = 0
+        node.numa_topology = None
+        node.labels = {}
+        node.created_at = None
+        node.updated_at = None
+        host_state = host_manager.HostState(node.hostname)
+        host_state.update(node)
+        nodes.append(host_state)
+    return nodes
+
+
+def build_containers(ctx, num_containers, rand):
+    containers = []
+    for i in range(num_containers):
+        container = objects.Container(ctx)
+        container.uuid = uuidutils.generate_uuid()
+        container.cpu = rand.choice(CONTAINER_CPUS)
+        container.memory = str(rand.choice(CONTAINER_MEMORY)) + 'M'
+        containers.append(container)
+    return containers
+
+
+def stddev(values):
+    mean = sum(values) / len(values)
+    return math.sqrt(sum((v - mean) ** 2 for v in values) / len(values))
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(math.ceil(pct / 100.0 * len(values))) - 1)
+    return values[max(index, 0)]
+
+
+def replay(select, nodes, containers):
+    latencies = []
+    failures = 0
+    for container in containers:
+        start = time.time()
+        try:
+            node = select(list(nodes), container)
+        except exception.NoValidHost:
+            failures += 1
+            continue
+        finally:
+            latencies.append(time.time() - start)
+        node.consume_from_request(container)
+    return latencies, failures
+
+
+def report(name, nodes, latencies, failures):
+    cpu_usage = [node.cpu_used / node.cpus for node in nodes]
+    mem_usage = [1 - float(node.mem_available) / node.mem_total
+                 for node in nodes]
+    counts = [node.total_containers for node in nodes]
+    print('%s:' % name)
+    print('  placement failures:      %d' % failures)
+    print('  cpu usage (min/max/std): %.3f / %.3f / %.3f' % (
+        min(cpu_usage), max(cpu_usage), stddev(cpu_usage)))
+    print('  mem usage (min/max/std): %.3f / %.3f / %.3f' % (
+        min(mem_usage), max(mem_usage), stddev(mem_usage)))
+    print('  containers (min/max):    %d / %d' % (min(counts), max(counts)))
+    print('  latency ms (avg/p50/p99): %.3f / %.3f / %.3f' % (
+        1000 * sum(latencies) / len(latencies),
+        1000 * percentile(latencies, 50),
+        1000 * percentile(latencies, 99)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=100)
+    parser.add_argument('--containers', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--config-file', action='append', default=[])
+    args = parser.parse_args()
+
+    default_config_files = args.config_file or None
+    CONF([], project='zun', default_config_files=default_config_files)
+    ctx = zun_context.get_admin_context()
+    scheduler = filter_scheduler.FilterScheduler()
+
+    def _random_select(nodes, container):
+        nodes = scheduler.filter_handler.get_filtered_objects(
+            scheduler.enabled_filters, nodes, container)
+        if not nodes:
+            raise exception.NoValidHost(reason='')
+        return random.choice(nodes)
+
+    for name, select in (('weighed', scheduler._select_node),
+                         ('random', _random_select)):
+        rand = random.Random(args.seed)
+        random.seed(args.seed)
+        nodes = build_fleet(ctx, args.hosts, rand)
+        containers = build_containers(ctx, args.containers, rand)
+        latencies, failures = replay(select, nodes, containers)
+        report(name, nodes, latencies, failures)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,7 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+
 from oslo_log import log as logging
+from oslo_utils import excutils
 from oslo_utils import strutils
 import pecan
 import six
@@ -23,6 +26,7 @@ from zun.api.controllers import link
 from zun.api.controllers.v1 import collection
 from zun.api.controllers.v1.schemas import containers as schema
 from zun.api.controllers.v1.views import containers_view as view
+from zun.api.controllers import versions
 from zun.api import utils as api_utils
 from zun.common import consts
 from zun.common import exception
@@ -31,11 +35,36 @@ from zun.common import name_generator
 from zun.common import policy
 from zun.common import utils
 from zun.common import validation
+import zun.conf
 from zun import objects
 
 
+CONF = zun.conf.CONF
 LOG = logging.getLogger(__name__)
 
+# The first API version accepting a count of containers to create
+COUNT_MIN_VERSION = versions.Version('', '', '', '1.2')
+
+
+def _pop_query_params(*names):
+    """Keep some query parameters out of the keyword arguments.
+
+    pecan passes the query parameters along with the fields of a JSON body
+    as keyword arguments. The parameters named here are read from
+    pecan.request.GET instead, so that they aren't validated as fields of
+    the body, nor declared as positional arguments to which pecan would
+    bind the segments of a longer path.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for name in names:
+                if name in pecan.request.GET:
+                    kwargs.pop(name, None)
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
 
 def _get_container(container_id):
     container = api_utils.get_resource('Container', container_id)
@@ -141,14 +170,12 @@ class ContainersController(base.Controller):
                                             sort_dir,
                                             filters=filters)
 
-        for i, c in enumerate(containers):
-            try:
-                containers[i] = compute_api.container_show(context, c)
-            except Exception as e:
-                LOG.exception(("Error while list container %(uuid)s: "
-                               "%(e)s."),
-                              {'uuid': c.uuid, 'e': e})
-                containers[i].status = consts.UNKNOWN
+        try:
+            containers = compute_api.container_show_many(context, containers)
+        except Exception as e:
+            LOG.exception("Error while list containers: %s.", e)
+            for c in containers:
+                c.status = consts.UNKNOWN
 
         return ContainerCollection.convert_with_links(containers, limit,
                                                       url=resource_url,
@@ -194,14 +221,57 @@ class ContainersController(base.Controller):
         elif name in ['no']:
             container_dict.get('restart_policy')['MaximumRetryCount'] = '0'
 
+    def _check_count(self, count):
+        if count is None:
+            return None
+        if pecan.request.version < COUNT_MIN_VERSION:
+            msg = _('The count parameter requires API version %s or '
+                    'later') % COUNT_MIN_VERSION
+            raise exception.InvalidValue(msg)
+        msg = _('Valid count values are positive integers')
+        try:
+            count = int(count)
+        except ValueError:
+            raise exception.InvalidValue(msg)
+        if count < 1:
+            raise exception.InvalidValue(msg)
+        if count > CONF.api.max_container_count:
+            msg = _('Can not create more than %d containers in a single '
+                    'request') % CONF.api.max_container_count
+            raise exception.InvalidValue(msg)
+        return count
+
+    def _create_many(self, context, container_dict, count):
+        """Create the records of count containers named after one name."""
+        new_containers = []
+        try:
+            for index in range(count):
+                values = dict(container_dict, name='%s-%d' % (
+                    container_dict['name'], index + 1))
+                new_container = objects.Container(context, **values)
+                new_container.create(context)
+                new_containers.append(new_container)
+        except Exception:
+            # Don't leave the containers created so far in CREATING
+            with excutils.save_and_reraise_exception():
+                for new_container in new_containers:
+                    new_container.destroy(context)
+        return new_containers
+
     @pecan.expose('json')
     @api_utils.enforce_content_types(['application/json'])
     @exception.wrap_pecan_controller_exception
     @validation.validate_query_param(pecan.request, schema.query_param_create)
+    @_pop_query_params('count')
     @validation.validated(schema.container_create)
     def post(self, run=False, **container_dict):
         """Create a new container.
 
+        The count query parameter is the number of containers to create. The
+        containers are placed by the scheduler in a single pass. It requires
+        API version 1.2, the response then holds the list of created
+        containers.
+
         :param run: if true, starts the container
         :param container: a container within the request body.
         """
@@ -215,6 +285,7 @@ class ContainersController(base.Controller):
         except ValueError:
             msg = _('Valid run values are true, false, 0, 1, yes and no')
             raise exception.InvalidValue(msg)
+        count = self._check_count(pecan.request.GET.get('count'))
         try:
             container_dict['interactive'] = strutils.bool_from_string(
                 container_dict.get('interactive', False), strict=True)
@@ -247,18 +318,27 @@ class ContainersController(base.Controller):
         if container_dict.get('restart_policy'):
             self._check_for_restart_policy(container_dict)
         container_dict['status'] = consts.CREATING
-        new_container = objects.Container(context, **container_dict)
-        new_container.create(context)
-
-        if run:
-            compute_api.container_run(context, new_container)
-        else:
-            compute_api.container_create(context, new_container)
-        # Set the HTTP Location Header
-        pecan.response.location = link.build_url('containers',
-                                                 new_container.uuid)
+        if count is None:
+            new_container = objects.Container(context, **container_dict)
+            new_container.create(context)
+
+            if run:
+                compute_api.container_run(context, new_container)
+            else:
+                compute_api.container_create(context, new_container)
+            # Set the HTTP Location Header
+            pecan.response.location = link.build_url('containers',
+                                                     new_container.uuid)
+            pecan.response.status = 202
+            return view.format_container(pecan.request.host_url,
+                                         new_container)
+
+        new_containers = self._create_many(context, container_dict, count)
+        compute_api.container_create_many(context, new_containers, run)
         pecan.response.status = 202
-        return view.format_container(pecan.request.host_url, new_container)
+        return {'containers': [
+            view.format_container(pecan.request.host_url, new_container)
+            for new_container in new_containers]}
 
     @pecan.expose('json')
     @exception.wrap_pecan_controller_exception
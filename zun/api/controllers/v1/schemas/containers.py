@@ -47,7 +47,8 @@ query_param_rename = {
 query_param_create = {
     'type': 'object',
     'properties': {
-        'run': parameter_types.boolean_extended
+        'run': parameter_types.boolean_extended,
+        'count': parameter_types.positive_integer
     },
     'additionalProperties': False
 }
@@ -90,3 +90,4 @@ class ZunServiceController(base.Controller):
                 binary=binary, host=host)
         else:
             svc.destroy(context)
+            svcgrp_api.get_liveness_cache().invalidate()
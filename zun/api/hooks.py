@@ -77,11 +77,20 @@ class ContextHook(hooks.PecanHook):
 
 
 class RPCHook(hooks.PecanHook):
-    """Attach the rpcapi object to the request so controllers can get to it."""
+    """Attach the rpcapi object to the request so controllers can get to it.
+
+    Building the compute API sets up an RPC client and loads the scheduler
+    driver, so a single instance is built on the first request and shared by
+    the following ones.
+    """
+
+    def __init__(self):
+        self.compute_api = None
 
     def before(self, state):
-        context = state.request.context
-        state.request.compute_api = compute_api.API(context)
+        if self.compute_api is None:
+            self.compute_api = compute_api.API()
+        state.request.compute_api = self.compute_api
 
 
 class NoExceptionTracebackHook(hooks.PecanHook):
@@ -11,12 +11,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo_log import log as logging
 from oslo_utils import timeutils
 
+from zun.common import context as zun_context
+from zun.common import utils
 import zun.conf
 from zun import objects
 
 CONF = zun.conf.CONF
+LOG = logging.getLogger(__name__)
+
+_liveness_cache = None
 
 
 class ServiceGroup(object):
@@ -35,3 +41,108 @@ class ServiceGroup(object):
         elapsed = timeutils.delta_seconds(last_heartbeat, now)
         is_up = abs(elapsed) <= self.service_down_time
         return is_up
+
+
+class ServiceLivenessCache(object):
+    """Keep the zun-compute services in memory to tell which hosts are up.
+
+    The services are loaded from the database on first use. Afterwards,
+    lookups are served from memory and the services are reloaded in the
+    background once the cache is older than
+    [DEFAULT]service_liveness_cache_ttl seconds. The liveness is evaluated
+    against the cached heartbeat of each service, so a host which stops
+    reporting is seen down without a reload.
+
+    The heartbeats are written by the compute hosts and are not pushed to
+    the cache. Before a host is answered down or unknown, its service is
+    read again from the database, at most once per TTL per host, so that a
+    recent heartbeat is not missed. A host answered up may have stopped
+    reporting up to the TTL ago.
+    """
+
+    def __init__(self, binary='zun-compute'):
+        self.binary = binary
+        self.servicegroup_api = ServiceGroup()
+        self._services = {}
+        # The time each host was last read from the database
+        self._checked_at = {}
+        self._refreshed_at = None
+        self._refresh_thread = None
+
+    def refresh(self, context):
+        """Reload the services from the database."""
+        services = objects.ZunService.list_by_binary(context, self.binary)
+        self._services = {service.host: service for service in services}
+        self._refreshed_at = timeutils.utcnow()
+        self._checked_at = dict.fromkeys(self._services, self._refreshed_at)
+
+    def _is_stale(self, host):
+        # A host missing from the services is as fresh as the last reload
+        checked_at = self._checked_at.get(host, self._refreshed_at)
+        return timeutils.is_older_than(checked_at,
+                                       CONF.service_liveness_cache_ttl)
+
+    def _check_host(self, context, host):
+        """Read the service of a host again from the database."""
+        service = objects.ZunService.get_by_host_and_binary(
+            context, host, self.binary)
+        if service is None:
+            self._services.pop(host, None)
+        else:
+            self._services[host] = service
+        self._checked_at[host] = timeutils.utcnow()
+        return service
+
+    def _is_up(self, context, host, service):
+        if (service is not None and
+                self.servicegroup_api.service_is_up(service)):
+            return True
+        if not self._is_stale(host):
+            return False
+        # The cached heartbeat may be older than the last one of the host
+        service = self._check_host(context, host)
+        return (service is not None and
+                self.servicegroup_api.service_is_up(service))
+
+    def invalidate(self):
+        """Drop the cache, so that the next lookup reloads the services."""
+        self._refreshed_at = None
+
+    def _refresh_in_background(self):
+        if self._refresh_thread is None:
+            self._refresh_thread = utils.spawn(self._background_refresh)
+
+    def _background_refresh(self):
+        try:
+            self.refresh(zun_context.get_admin_context(all_tenants=True))
+        except Exception:
+            LOG.exception("Failed to refresh the liveness of the services")
+        finally:
+            self._refresh_thread = None
+
+    def _get_services(self, context):
+        if self._refreshed_at is None:
+            self.refresh(context)
+        elif timeutils.is_older_than(self._refreshed_at,
+                                     CONF.service_liveness_cache_ttl):
+            self._refresh_in_background()
+        return self._services
+
+    def host_is_up(self, context, host):
+        """Return whether the service of a host is up."""
+        service = self._get_services(context).get(host)
+        return self._is_up(context, host, service)
+
+    def get_up_hosts(self, context):
+        """Return the hosts whose service is up."""
+        services = list(self._get_services(context).items())
+        return [host for host, service in services
+                if self._is_up(context, host, service)]
+
+
+def get_liveness_cache():
+    """Return the liveness cache shared by the process."""
+    global _liveness_cache
+    if _liveness_cache is None:
+        _liveness_cache = ServiceLivenessCache()
+    return _liveness_cache
@@ -15,6 +15,7 @@
 
 from oslo_config import cfg
 
+from zun.db.etcd import api as etcd_api
 from zun.db import migration
 
 
@@ -38,6 +39,10 @@ def do_revision():
                        autogenerate=CONF.command.autogenerate)
 
 
+def do_rebuild_etcd_indexes():
+    etcd_api.get_connection().rebuild_indexes()
+
+
 def add_command_parsers(subparsers):
     parser = subparsers.add_parser('version')
     parser.set_defaults(func=do_version)
@@ -55,6 +60,9 @@ def add_command_parsers(subparsers):
     parser.add_argument('--autogenerate', action='store_true')
     parser.set_defaults(func=do_revision)
 
+    parser = subparsers.add_parser('rebuild_etcd_indexes')
+    parser.set_defaults(func=do_rebuild_etcd_indexes)
+
 
 def main():
     command_opt = cfg.SubCommandOpt('command',
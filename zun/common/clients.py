@@ -12,14 +12,25 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import collections
+import datetime
+
 from glanceclient import client as glanceclient
 from neutronclient.v2_0 import client as neutronclient
 from novaclient import client as novaclient
+from oslo_utils import timeutils
 
 from zun.common import exception
 from zun.common import keystone
 import zun.conf
 
+CONF = zun.conf.CONF
+
+# Stop using the clients of a token a bit before it expires
+TOKEN_EXPIRY_MARGIN = 60
+
+_clients_cache = None
+
 
 class OpenStackClients(object):
     """Convenience class to create and cache client instances."""
@@ -107,3 +118,71 @@ class OpenStackClients(object):
                                              endpoint_type=endpoint_type)
 
         return self._neutron
+
+
+class ClientsCache(object):
+    """A bounded cache of the OpenStack clients of the request contexts.
+
+    The clients are keyed by the project, the user and the token of the
+    context, so that the keystone session, the service catalog and the HTTP
+    connections of the clients are reused by the calls made on behalf of
+    the same token. Entries expire after [DEFAULT]client_cache_ttl seconds
+    or shortly before their token expires, and the least recently used
+    entries are evicted once [DEFAULT]client_cache_size is reached.
+    """
+
+    def __init__(self):
+        self._entries = collections.OrderedDict()
+
+    @staticmethod
+    def _get_key(context):
+        return (context.project_id, context.user_id, context.auth_token,
+                context.is_admin)
+
+    @staticmethod
+    def _get_token_expiry(context):
+        token_info = context.auth_token_info or {}
+        if 'token' in token_info:
+            expires_at = token_info['token'].get('expires_at')
+        else:
+            token = token_info.get('access', {}).get('token', {})
+            expires_at = token.get('expires')
+        if not expires_at:
+            return None
+        return timeutils.normalize_time(timeutils.parse_isotime(expires_at))
+
+    def _get_expiry(self, context):
+        now = timeutils.utcnow()
+        expires_at = now + datetime.timedelta(seconds=CONF.client_cache_ttl)
+        token_expires_at = self._get_token_expiry(context)
+        if token_expires_at is not None:
+            token_expires_at -= datetime.timedelta(
+                seconds=TOKEN_EXPIRY_MARGIN)
+            expires_at = min(expires_at, token_expires_at)
+        return expires_at
+
+    def get(self, context):
+        """Return the clients of a context, creating them if needed."""
+        if CONF.client_cache_size == 0:
+            return OpenStackClients(context)
+
+        key = self._get_key(context)
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[1] <= timeutils.utcnow():
+            entry = (OpenStackClients(context), self._get_expiry(context))
+        # The entries are kept in the order they were last used
+        self._entries[key] = entry
+        while len(self._entries) > CONF.client_cache_size:
+            self._entries.popitem(last=False)
+        return entry[0]
+
+    def clear(self):
+        self._entries.clear()
+
+
+def get_clients(context):
+    """Return the cached OpenStack clients of a context."""
+    global _clients_cache
+    if _clients_cache is None:
+        _clients_cache = ClientsCache()
+    return _clients_cache.get(context)
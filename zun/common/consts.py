@@ -20,11 +20,13 @@ CONTAINER_STATUSES = (
 TASK_STATES = (
     IMAGE_PULLING, CONTAINER_CREATING, SANDBOX_CREATING,
     CONTAINER_STARTING, CONTAINER_DELETING, SANDBOX_DELETING,
-    CONTAINER_STOPPING, CONTAINER_REBOOTING,
+    CONTAINER_STOPPING, CONTAINER_REBOOTING, CONTAINER_COMMITTING,
+    IMAGE_UPLOADING,
 ) = (
     'image_pulling', 'container_creating', 'sandbox_creating',
     'container_starting', 'container_deleting', 'sandbox_deleting',
-    'container_stopping', 'container_rebooting',
+    'container_stopping', 'container_rebooting', 'container_committing',
+    'image_uploading',
     )
 
 RESOURCE_CLASSES = (
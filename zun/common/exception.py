@@ -344,6 +344,10 @@ class ContainerHostNotUp(ZunException):
     message = _("Container %(container)s host %(host)s is not up.")
 
 
+class ComputeHostNotUp(ZunException):
+    message = _("Compute host %(host)s is not up.")
+
+
 class ComputeNodeNotFound(HTTPNotFound):
     message = _("Compute node %(compute_node)s could not be found.")
 
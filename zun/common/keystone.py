@@ -16,6 +16,8 @@ from keystoneauth1.identity import v3 as ka_v3
 from keystoneauth1 import loading as ka_loading
 from keystoneclient.v3 import client as kc_v3
 from oslo_log import log as logging
+import requests
+from requests import adapters
 
 from zun.common import exception
 import zun.conf
@@ -35,6 +37,33 @@ CONF.set_default('auth_type', default='password', group=CFG_GROUP)
 CONF.import_opt('auth_uri', 'keystonemiddleware.auth_token',
                 group='keystone_authtoken')
 
+_http_adapters = None
+
+
+def get_http_adapters():
+    """Return the HTTP adapters shared by the keystone sessions.
+
+    The adapters hold the connection pools, so that connections to the
+    OpenStack services are pooled across contexts.
+    """
+    global _http_adapters
+    if _http_adapters is None:
+        _http_adapters = {'https://': adapters.HTTPAdapter(),
+                          'http://': adapters.HTTPAdapter()}
+    return _http_adapters
+
+
+def new_http_session():
+    """Return a new HTTP session mounted on the shared adapters.
+
+    Each keystone session has its own HTTP session, so that the cookies and
+    headers of a context are not seen by the others.
+    """
+    session = requests.Session()
+    for prefix, adapter in get_http_adapters().items():
+        session.mount(prefix, adapter)
+    return session
+
 
 class KeystoneClientV3(object):
     """Keystone client wrapper so we can encapsulate logic in one place."""
@@ -65,7 +94,7 @@ class KeystoneClientV3(object):
 
     def _get_session(self, auth):
         session = ka_loading.load_session_from_conf_options(
-            CONF, CFG_GROUP, auth=auth)
+            CONF, CFG_GROUP, auth=auth, session=new_http_session())
         return session
 
     def _get_auth(self):
@@ -50,7 +50,7 @@ class NovaClient(object):
 
     def client(self):
         if not self._client:
-            self._client = clients.OpenStackClients(self.context).nova()
+            self._client = clients.get_clients(self.context).nova()
         return self._client
 
     def is_not_found(self, ex):
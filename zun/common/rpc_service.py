@@ -71,14 +71,20 @@ class Service(service.Service):
 
 
 class API(object):
-    def __init__(self, transport=None, context=None, topic=None, server=None,
+    """Base class of the RPC clients.
+
+    A client is meant to be shared by the whole process, so the request
+    context is passed along with each call instead of being kept by the
+    client.
+    """
+
+    def __init__(self, transport=None, topic=None, server=None,
                  timeout=None):
         serializer = _init_serializer()
         if transport is None:
             exmods = rpc.get_allowed_exmods()
             transport = messaging.get_transport(CONF,
                                                 allowed_remote_exmods=exmods)
-        self._context = context
         if topic is None:
             topic = ''
         target = messaging.Target(topic=topic, server=server)
@@ -86,13 +92,13 @@ class API(object):
                                            serializer=serializer,
                                            timeout=timeout)
 
-    def _call(self, server, method, *args, **kwargs):
+    def _call(self, context, server, method, *args, **kwargs):
         cctxt = self._client.prepare(server=server)
-        return cctxt.call(self._context, method, *args, **kwargs)
+        return cctxt.call(context, method, *args, **kwargs)
 
-    def _cast(self, server, method, *args, **kwargs):
+    def _cast(self, context, server, method, *args, **kwargs):
         cctxt = self._client.prepare(server=server)
-        return cctxt.cast(self._context, method, *args, **kwargs)
+        return cctxt.cast(context, method, *args, **kwargs)
 
-    def echo(self, message):
-        self._cast('echo', message=message)
+    def echo(self, context, message):
+        self._cast(context, 'echo', message=message)
@@ -142,6 +142,23 @@ def spawn_n(func, *args, **kwargs):
     eventlet.spawn_n(context_wrapper, *args, **kwargs)
 
 
+def spawn(func, *args, **kwargs):
+    """Passthrough method for eventlet.spawn.
+
+    Same as spawn_n, except that the returned GreenThread can be used to
+    wait for the result of ``func``.
+    """
+    _context = common_context.get_current()
+
+    @functools.wraps(func)
+    def context_wrapper(*args, **kwargs):
+        if _context is not None:
+            _context.update_store()
+        return func(*args, **kwargs)
+
+    return eventlet.spawn(context_wrapper, *args, **kwargs)
+
+
 def translate_exception(function):
     """Wraps a method to catch exceptions.
 
@@ -227,6 +244,13 @@ def should_pull_image(image_pull_policy, present):
     return False
 
 
+def get_memory_mb(memory):
+    """Return the memory in MiB of a container memory string like '512M'."""
+    if not memory:
+        return 0
+    return int(str(memory).rstrip('mM'))
+
+
 def get_floating_cpu_set():
     """Parse floating_cpu_set config.
 
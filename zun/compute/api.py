@@ -13,18 +13,27 @@
 """Handles all requests relating to compute resources (e.g. containers,
 networking and storage of containers, and compute hosts on which they run)."""
 
+from oslo_log import log as logging
+
 from zun.common import consts
 from zun.common import profiler
+from zun.common import utils
 from zun.compute import rpcapi
 from zun.scheduler import client as scheduler_client
 
+LOG = logging.getLogger(__name__)
+
 
 @profiler.trace_cls("rpc")
 class API(object):
-    """API for interacting with the compute manager."""
+    """API for interacting with the compute manager.
+
+    The API holds no request state, the context is passed along with each
+    call, so that a single instance is shared by the whole process.
+    """
 
-    def __init__(self, context):
-        self.rpcapi = rpcapi.API(context=context)
+    def __init__(self):
+        self.rpcapi = rpcapi.API()
         self.scheduler_client = scheduler_client.SchedulerClient()
         super(API, self).__init__()
 
@@ -50,6 +59,33 @@ class API(object):
 
         self.rpcapi.container_run(context, new_container)
 
+    def container_create_many(self, context, new_containers, run=False):
+        """Create a batch of containers.
+
+        The containers are placed by the scheduler in a single pass and a
+        single cast is sent to each of the chosen hosts.
+        """
+        try:
+            dests = self.scheduler_client.select_destinations(
+                context, new_containers)
+        except Exception as exc:
+            for new_container in new_containers:
+                new_container.status = consts.ERROR
+                new_container.status_reason = str(exc)
+                new_container.save(context)
+            return
+
+        containers_by_host = {}
+        for new_container, dest in zip(new_containers, dests):
+            new_container.host = dest['host']
+            new_container.save(context)
+            containers_by_host.setdefault(new_container.host, []).append(
+                new_container)
+
+        for host, host_containers in containers_by_host.items():
+            self.rpcapi.container_create_many(context, host, host_containers,
+                                              run)
+
     def _schedule_container(self, context, new_container):
         dests = self.scheduler_client.select_destinations(context,
                                                           [new_container])
@@ -62,6 +98,37 @@ class API(object):
     def container_show(self, context, container, *args):
         return self.rpcapi.container_show(context, container, *args)
 
+    def container_show_many(self, context, containers):
+        """Refresh the states of a list of containers.
+
+        Containers are grouped by host and each host is queried with a
+        single RPC call. Calls to different hosts are issued concurrently.
+        Containers whose host can't be reached are returned with status
+        UNKNOWN.
+        """
+        containers_by_host = {}
+        for container in containers:
+            containers_by_host.setdefault(container.host, []).append(
+                container)
+
+        threads = {}
+        for host, host_containers in containers_by_host.items():
+            threads[host] = utils.spawn(self.rpcapi.container_show_many,
+                                        context, host, host_containers)
+
+        refreshed = {}
+        for host, thread in threads.items():
+            try:
+                for container in thread.wait():
+                    refreshed[container.uuid] = container
+            except Exception as e:
+                LOG.exception("Error while showing containers at host "
+                              "%(host)s: %(e)s.", {'host': host, 'e': e})
+                for container in containers_by_host[host]:
+                    container.status = consts.UNKNOWN
+
+        return [refreshed.get(c.uuid, c) for c in containers]
+
     def container_reboot(self, context, container, *args):
         return self.rpcapi.container_reboot(context, container, *args)
 
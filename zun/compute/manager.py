@@ -13,9 +13,11 @@
 #    under the License.
 
 import six
+import time
 
 from oslo_log import log as logging
 from oslo_utils import excutils
+from oslo_utils import units
 from oslo_utils import uuidutils
 
 from zun.common import consts
@@ -30,6 +32,49 @@ from zun.image.glance import driver as glance
 CONF = zun.conf.CONF
 LOG = logging.getLogger(__name__)
 
+IMAGE_CHUNK_SIZE = 64 * units.Ki
+IMAGE_PROGRESS_INTERVAL = 100 * units.Mi
+
+
+class ImageUploadReader(object):
+    """Read the saved image of a container for its upload to glance.
+
+    The image is read in the chunks glance asks for, so the upload runs
+    alongside the docker save without buffering the image. The uploaded
+    size is recorded in the status detail of the container every
+    IMAGE_PROGRESS_INTERVAL bytes.
+    """
+
+    def __init__(self, context, container, image_data):
+        self.context = context
+        self.container = container
+        self.image_data = image_data
+        self.uploaded = 0
+        self._next_report = IMAGE_PROGRESS_INTERVAL
+
+    def read(self, size=IMAGE_CHUNK_SIZE):
+        chunk = self.image_data.read(size)
+        if chunk:
+            self.uploaded += len(chunk)
+            if self.uploaded >= self._next_report:
+                reports = self.uploaded // IMAGE_PROGRESS_INTERVAL
+                self._next_report = (reports + 1) * IMAGE_PROGRESS_INTERVAL
+                self._report()
+        else:
+            LOG.debug('Uploaded %(size)s bytes of the image of container '
+                      '%(uuid)s', {'size': self.uploaded,
+                                   'uuid': self.container.uuid})
+        return chunk
+
+    def _report(self):
+        self.container.status_detail = 'Uploaded %s MiB of the image' % (
+            self.uploaded // units.Mi)
+        try:
+            self.container.save(self.context)
+        except exception.ContainerNotFound:
+            # The upload goes on, the commit handles the deletion at its end
+            pass
+
 
 class Manager(object):
     '''Manages the running containers.'''
@@ -50,6 +95,14 @@ class Manager(object):
     def container_run(self, context, container):
         utils.spawn_n(self._do_container_run, context, container)
 
+    def container_create_many(self, context, containers, run):
+        LOG.debug('Creating %d containers', len(containers))
+        for container in containers:
+            if run:
+                utils.spawn_n(self._do_container_run, context, container)
+            else:
+                utils.spawn_n(self._do_container_create, context, container)
+
     def _do_container_run(self, context, container):
         created_container = self._do_container_create(context,
                                                       container)
@@ -68,42 +121,36 @@ class Manager(object):
 
         container.task_state = consts.SANDBOX_CREATING
         container.save(context)
-        sandbox_id = None
-        sandbox_image = CONF.sandbox_image
-        sandbox_image_driver = CONF.sandbox_image_driver
-        sandbox_image_pull_policy = CONF.sandbox_image_pull_policy
-        repo, tag = utils.parse_image_name(sandbox_image)
+        # The sandbox and the image of the container don't depend on each
+        # other, so the image is pulled while the sandbox is being created.
+        timings = {}
+        started_at = time.time()
+        sandbox_thread = utils.spawn(self._timed, timings, 'sandbox_create',
+                                     self._create_sandbox, context, container)
+        image_thread = utils.spawn(self._timed, timings, 'image_pull',
+                                   self._pull_container_image, context,
+                                   container)
         try:
-            image, image_loaded = image_driver.pull_image(
-                context, repo, tag, sandbox_image_pull_policy,
-                sandbox_image_driver)
-            if not image_loaded:
-                self.driver.load_image(image['path'])
-            sandbox_id = self.driver.create_sandbox(context, container,
-                                                    image=sandbox_image)
+            sandbox_id = sandbox_thread.wait()
         except Exception as e:
             with excutils.save_and_reraise_exception(reraise=reraise):
                 LOG.exception("Unexpected exception: %s",
                               six.text_type(e))
+                self._wait_unused(image_thread)
+                self._set_create_timings(container, timings, started_at)
                 self._fail_container(context, container, six.text_type(e))
             return
 
         self.driver.set_sandbox_id(container, sandbox_id)
         container.task_state = consts.IMAGE_PULLING
         container.save(context)
-        repo, tag = utils.parse_image_name(container.image)
-        image_pull_policy = utils.get_image_pull_policy(
-            container.image_pull_policy, tag)
-        image_driver_name = container.image_driver
         try:
-            image, image_loaded = image_driver.pull_image(
-                context, repo, tag, image_pull_policy, image_driver_name)
-            if not image_loaded:
-                self.driver.load_image(image['path'])
+            image = image_thread.wait()
         except exception.ImageNotFound as e:
             with excutils.save_and_reraise_exception(reraise=reraise):
                 LOG.error(six.text_type(e))
                 self._do_sandbox_cleanup(context, sandbox_id)
+                self._set_create_timings(container, timings, started_at)
                 self._fail_container(context, container, six.text_type(e))
             return
         except exception.DockerError as e:
@@ -111,6 +158,7 @@ class Manager(object):
                 LOG.error("Error occurred while calling Docker image API: %s",
                           six.text_type(e))
                 self._do_sandbox_cleanup(context, sandbox_id)
+                self._set_create_timings(container, timings, started_at)
                 self._fail_container(context, container, six.text_type(e))
             return
         except Exception as e:
@@ -118,6 +166,7 @@ class Manager(object):
                 LOG.exception("Unexpected exception: %s",
                               six.text_type(e))
                 self._do_sandbox_cleanup(context, sandbox_id)
+                self._set_create_timings(container, timings, started_at)
                 self._fail_container(context, container, six.text_type(e))
             return
 
@@ -125,8 +174,10 @@ class Manager(object):
         container.image_driver = image.get('driver')
         container.save(context)
         try:
-            container = self.driver.create(context, container,
-                                           sandbox_id, image)
+            container = self._timed(timings, 'container_create',
+                                    self.driver.create, context, container,
+                                    sandbox_id, image)
+            self._set_create_timings(container, timings, started_at)
             container.task_state = None
             container.save(context)
             return container
@@ -135,6 +186,7 @@ class Manager(object):
                 LOG.error("Error occurred while calling Docker create API: %s",
                           six.text_type(e))
                 self._do_sandbox_cleanup(context, sandbox_id)
+                self._set_create_timings(container, timings, started_at)
                 self._fail_container(context, container, six.text_type(e))
             return
         except Exception as e:
@@ -142,9 +194,52 @@ class Manager(object):
                 LOG.exception("Unexpected exception: %s",
                               six.text_type(e))
                 self._do_sandbox_cleanup(context, sandbox_id)
+                self._set_create_timings(container, timings, started_at)
                 self._fail_container(context, container, six.text_type(e))
             return
 
+    def _create_sandbox(self, context, container):
+        sandbox_image = CONF.sandbox_image
+        repo, tag = utils.parse_image_name(sandbox_image)
+        image_driver.pull_image(
+            context, repo, tag, CONF.sandbox_image_pull_policy,
+            CONF.sandbox_image_driver, load_image=self.driver.load_image)
+        return self.driver.create_sandbox(context, container,
+                                          image=sandbox_image)
+
+    def _pull_container_image(self, context, container):
+        repo, tag = utils.parse_image_name(container.image)
+        image_pull_policy = utils.get_image_pull_policy(
+            container.image_pull_policy, tag)
+        image, image_loaded = image_driver.pull_image(
+            context, repo, tag, image_pull_policy, container.image_driver,
+            load_image=self.driver.load_image)
+        return image
+
+    def _timed(self, timings, stage, func, *args):
+        started_at = time.time()
+        try:
+            return func(*args)
+        finally:
+            timings[stage] = time.time() - started_at
+
+    def _wait_unused(self, thread):
+        # The stage failing or not doesn't matter anymore, but it must not
+        # be left running behind the failed container.
+        try:
+            thread.wait()
+        except Exception as e:
+            LOG.debug("Ignoring the failure of a concurrent stage: %s",
+                      six.text_type(e))
+
+    def _set_create_timings(self, container, timings, started_at):
+        """Record how long each stage of the creation took, in seconds."""
+        meta = dict(container.meta or {})
+        for stage, seconds in timings.items():
+            meta['%s_seconds' % stage] = '%.3f' % seconds
+        meta['create_seconds'] = '%.3f' % (time.time() - started_at)
+        container.meta = meta
+
     def _do_container_start(self, context, container, reraise=False):
         LOG.debug('Starting container: %s', container.uuid)
         container.task_state = consts.CONTAINER_STARTING
@@ -228,6 +323,23 @@ class Manager(object):
             LOG.exception("Unexpected exception: %s", six.text_type(e))
             raise
 
+    @translate_exception
+    def container_show_many(self, context, containers):
+        LOG.debug('Showing %d containers', len(containers))
+        try:
+            containers = self.driver.show_many(containers)
+            for container in containers:
+                if container.obj_what_changed():
+                    container.save(context)
+            return containers
+        except exception.DockerError as e:
+            LOG.error("Error occurred while calling Docker list API: %s",
+                      six.text_type(e))
+            raise
+        except Exception as e:
+            LOG.exception("Unexpected exception: %s", six.text_type(e))
+            raise
+
     def _do_container_reboot(self, context, container, timeout, reraise=False):
         LOG.debug('Rebooting container: %s', container.uuid)
         container.task_state = consts.CONTAINER_REBOOTING
@@ -506,17 +618,35 @@ class Manager(object):
         if tag is None:
             tag = 'latest'
 
+        status_detail = container.status_detail
+        container.task_state = consts.CONTAINER_COMMITTING
+        container.save(context)
         try:
-            container_image_id = self.driver.commit(container,
-                                                    repository, tag)
-            container_image = self.driver.get_image(repository + ':' + tag)
-        except exception.DockerError as e:
-            LOG.error("Error occurred while calling docker commit API: %s",
-                      six.text_type(e))
-            raise
-        LOG.debug('Upload image %s to glance' % container_image_id)
-        self._do_container_image_upload(context, container_image,
-                                        repository, tag)
+            try:
+                container_image_id = self.driver.commit(container,
+                                                        repository, tag)
+                container_image = self.driver.get_image(
+                    repository + ':' + tag)
+            except exception.DockerError as e:
+                LOG.error("Error occurred while calling docker commit API: "
+                          "%s", six.text_type(e))
+                raise
+            LOG.debug('Upload image %s to glance' % container_image_id)
+            container.task_state = consts.IMAGE_UPLOADING
+            container.save(context)
+            image_data = ImageUploadReader(context, container, container_image)
+            self._do_container_image_upload(context, image_data,
+                                            repository, tag)
+        finally:
+            if container_image is not None:
+                container_image.close()
+            container.task_state = None
+            container.status_detail = status_detail
+            try:
+                container.save(context)
+            except exception.ContainerNotFound:
+                LOG.info('Container %s was deleted while it was committed',
+                         container.uuid)
 
     def image_pull(self, context, image):
         utils.spawn_n(self._do_image_pull, context, image)
@@ -525,10 +655,8 @@ class Manager(object):
         LOG.debug('Creating image...')
         repo_tag = image.repo + ":" + image.tag
         try:
-            pulled_image, image_loaded = image_driver.pull_image(
-                context, image.repo, image.tag)
-            if not image_loaded:
-                self.driver.load_image(pulled_image['path'])
+            image_driver.pull_image(context, image.repo, image.tag,
+                                    load_image=self.driver.load_image)
             image_dict = self.driver.inspect_image(repo_tag)
             image.image_id = image_dict['Id']
             image.size = image_dict['Size']
@@ -19,18 +19,18 @@ from zun.common import exception
 from zun.common import profiler
 from zun.common import rpc_service
 import zun.conf
-from zun import objects
+
+
+def _host_is_up(context, host):
+    return servicegroup.get_liveness_cache().host_is_up(context, host)
 
 
 def check_container_host(func):
     """Verify the state of container host"""
     @functools.wraps(func)
     def wrap(self, context, container, *args, **kwargs):
-        services = objects.ZunService.list_by_binary(context, 'zun-compute')
-        api_servicegroup = servicegroup.ServiceGroup()
-        up_hosts = [service.host for service in services
-                    if api_servicegroup.service_is_up(service)]
-        if container.host is not None and container.host not in up_hosts:
+        if container.host is not None and \
+                not _host_is_up(context, container.host):
             raise exception.ContainerHostNotUp(container=container.uuid,
                                                host=container.host)
         return func(self, context, container, *args, **kwargs)
@@ -45,110 +45,127 @@ class API(rpc_service.API):
 
         * 1.0 - Initial version.
         * 1.1 - Add image endpoints.
+        * 1.2 - Add container_show_many.
+        * 1.3 - Add container_create_many.
     '''
 
-    def __init__(self, transport=None, context=None, topic=None):
+    def __init__(self, transport=None, topic=None):
         if topic is None:
             zun.conf.CONF.import_opt(
                 'topic', 'zun.conf.compute', group='compute')
 
         super(API, self).__init__(
-            transport, context, topic=zun.conf.CONF.compute.topic)
+            transport, topic=zun.conf.CONF.compute.topic)
 
     def container_create(self, context, container):
-        self._cast(container.host, 'container_create', container=container)
+        self._cast(context, container.host, 'container_create',
+                   container=container)
 
     def container_run(self, context, container):
-        self._cast(container.host, 'container_run', container=container)
+        self._cast(context, container.host, 'container_run',
+                   container=container)
+
+    def container_create_many(self, context, host, containers, run):
+        self._cast(context, host, 'container_create_many',
+                   containers=containers, run=run)
 
     @check_container_host
     def container_delete(self, context, container, force):
-        return self._call(container.host, 'container_delete',
+        return self._call(context, container.host, 'container_delete',
                           container=container, force=force)
 
     @check_container_host
     def container_show(self, context, container):
-        return self._call(container.host, 'container_show',
+        return self._call(context, container.host, 'container_show',
                           container=container)
 
+    def container_show_many(self, context, host, containers):
+        if host is not None and not _host_is_up(context, host):
+            raise exception.ComputeHostNotUp(host=host)
+        return self._call(context, host, 'container_show_many',
+                          containers=containers)
+
     def container_reboot(self, context, container, timeout):
-        self._cast(container.host, 'container_reboot', container=container,
-                   timeout=timeout)
+        self._cast(context, container.host, 'container_reboot',
+                   container=container, timeout=timeout)
 
     def container_stop(self, context, container, timeout):
-        self._cast(container.host, 'container_stop', container=container,
-                   timeout=timeout)
+        self._cast(context, container.host, 'container_stop',
+                   container=container, timeout=timeout)
 
     def container_start(self, context, container):
-        self._cast(container.host, 'container_start', container=container)
+        self._cast(context, container.host, 'container_start',
+                   container=container)
 
     def container_pause(self, context, container):
-        self._cast(container.host, 'container_pause', container=container)
+        self._cast(context, container.host, 'container_pause',
+                   container=container)
 
     def container_unpause(self, context, container):
-        self._cast(container.host, 'container_unpause', container=container)
+        self._cast(context, container.host, 'container_unpause',
+                   container=container)
 
     @check_container_host
     def container_logs(self, context, container, stdout, stderr,
                        timestamps, tail, since):
-        return self._call(container.host, 'container_logs',
+        return self._call(context, container.host, 'container_logs',
                           container=container, stdout=stdout, stderr=stderr,
                           timestamps=timestamps, tail=tail, since=since)
 
     @check_container_host
     def container_exec(self, context, container, command, run, interactive):
-        return self._call(container.host, 'container_exec',
+        return self._call(context, container.host, 'container_exec',
                           container=container, command=command, run=run,
                           interactive=interactive)
 
     @check_container_host
     def container_exec_resize(self, context, container, exec_id, height,
                               width):
-        return self._call(container.host, 'container_exec_resize',
+        return self._call(context, container.host, 'container_exec_resize',
                           exec_id=exec_id, height=height, width=width)
 
     def container_kill(self, context, container, signal):
-        self._cast(container.host, 'container_kill', container=container,
-                   signal=signal)
+        self._cast(context, container.host, 'container_kill',
+                   container=container, signal=signal)
 
     @check_container_host
     def container_update(self, context, container, patch):
-        return self._call(container.host, 'container_update',
+        return self._call(context, container.host, 'container_update',
                           container=container, patch=patch)
 
     @check_container_host
     def container_attach(self, context, container):
-        return self._call(container.host, 'container_attach',
+        return self._call(context, container.host, 'container_attach',
                           container=container)
 
     @check_container_host
     def container_resize(self, context, container, height, width):
-        return self._call(container.host, 'container_resize',
+        return self._call(context, container.host, 'container_resize',
                           container=container, height=height, width=width)
 
     @check_container_host
     def container_top(self, context, container, ps_args):
-        return self._call(container.host, 'container_top',
+        return self._call(context, container.host, 'container_top',
                           container=container, ps_args=ps_args)
 
     @check_container_host
     def container_get_archive(self, context, container, path):
-        return self._call(container.host, 'container_get_archive',
+        return self._call(context, container.host, 'container_get_archive',
                           container=container, path=path)
 
     @check_container_host
     def container_put_archive(self, context, container, path, data):
-        return self._call(container.host, 'container_put_archive',
+        return self._call(context, container.host, 'container_put_archive',
                           container=container, path=path, data=data)
 
     @check_container_host
     def container_stats(self, context, container):
-        return self._call(container.host, 'container_stats',
+        return self._call(context, container.host, 'container_stats',
                           container=container)
 
     @check_container_host
     def container_commit(self, context, container, repository, tag):
-        return self._cast(container.host, 'container_commit',
+        return self._cast(context, container.host, 'container_commit',
                           container=container, repository=repository, tag=tag)
 
     def image_pull(self, context, image):
@@ -156,13 +173,13 @@ class API(rpc_service.API):
         # scenario yet, so we temporarily set host to None and rpc will
         # choose an arbitrary host.
         host = None
-        self._cast(host, 'image_pull', image=image)
+        self._cast(context, host, 'image_pull', image=image)
 
     def image_search(self, context, image, image_driver, exact_match):
         # NOTE(hongbin): Image API doesn't support multiple compute nodes
         # scenario yet, so we temporarily set host to None and rpc will
         # choose an arbitrary host.
         host = None
-        return self._call(host, 'image_search', image=image,
+        return self._call(context, host, 'image_search', image=image,
                           image_driver_name=image_driver,
                           exact_match=exact_match)
@@ -36,6 +36,11 @@ api_service_opts = [
                default=1000,
                help='The maximum number of items returned in a single '
                     'response from a collection resource.'),
+    cfg.IntOpt('max_container_count',
+               default=1000,
+               min=1,
+               help='The maximum number of containers which can be created '
+                    'by a single request.'),
     cfg.StrOpt('api_paste_config',
                default="api-paste.ini",
                help="Configuration file for WSGI definition of API.")
@@ -37,7 +37,15 @@ etcd_opts = [
                               "running.")),
     cfg.PortOpt('etcd_port',
                 default=2379,
-                help=_("Port on which etcd listen client request."))
+                help=_("Port on which etcd listen client request.")),
+    cfg.IntOpt('cache_size',
+               default=0,
+               min=0,
+               help=_("Maximum number of container and zun service keys "
+                      "cached in memory by each process. The cache is kept "
+                      "up to date by watching etcd, and the least recently "
+                      "used keys are evicted first. Set to 0 to read every "
+                      "key from etcd.")),
 ]
 
 etcd_group = cfg.OptGroup(name='etcd', title='Options for etcd connection')
@@ -49,10 +49,52 @@ docker_opts = [
     cfg.StrOpt('docker_remote_api_port',
                default='2375',
                help='Defines the remote api port for the docker daemon.'),
+    cfg.IntOpt('client_pool_size',
+               default=10,
+               min=1,
+               help='Maximum number of docker clients kept open by each '
+                    'zun process. Clients are reused across docker API '
+                    'calls to avoid a new connection per call.'),
+    cfg.IntOpt('client_health_check_interval',
+               default=60,
+               min=0,
+               help='Pooled docker clients idle for longer than this '
+                    'number of seconds are pinged before being reused.'),
+    cfg.IntOpt('cpu_ledger_sync_interval',
+               default=600,
+               min=0,
+               help='Interval in seconds to resync the in-memory record of '
+                    'the CPU allocated to containers with docker.'),
     cfg.IntOpt('execute_timeout',
                default=5,
                help='Timeout in seconds for executing a command in a docker '
                     'container.'),
+    cfg.BoolOpt('enable_event_watcher',
+                default=True,
+                help='If set, zun-compute consumes the docker event stream '
+                     'to update the states of containers as soon as they '
+                     'change. The periodic state sync keeps running as a '
+                     'safety net.'),
+    cfg.IntOpt('event_watcher_retry_interval',
+               default=1,
+               help='Interval in seconds between reconnections to the '
+                    'docker event stream.'),
+    cfg.IntOpt('sandbox_pool_size',
+               default=0,
+               min=0,
+               help='Number of sandboxes zun-compute keeps created and '
+                    'connected to the network ahead of the containers of '
+                    'each project and network which recently created a '
+                    'container. A new container takes a sandbox from the '
+                    'pool instead of creating one. Set to 0 to disable the '
+                    'pool.'),
+    cfg.IntOpt('sandbox_pool_ttl',
+               default=600,
+               min=1,
+               help='Time in seconds after which unused pooled sandboxes '
+                    'are deleted, and after which the pool of a project '
+                    'and network without new containers stops being '
+                    'replenished.'),
 ]
 
 ALL_OPTS = (docker_opts)
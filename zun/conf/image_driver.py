@@ -52,6 +52,21 @@ glance_driver_opts = [
         help='Shared directory where glance images located. If '
              'specified, docker will try to load the image from '
              'the shared directory by image ID.'),
+    cfg.StrOpt(
+        'image_load_mode',
+        default='file',
+        choices=['file', 'stream'],
+        help='How images downloaded from glance are loaded into docker. '
+             'With ``file``, the image is downloaded into '
+             'images_directory and then loaded from there. With '
+             '``stream``, the image data is streamed from glance '
+             'directly into docker.'),
+    cfg.BoolOpt(
+        'cache_streamed_images',
+        default=True,
+        help='If set, images streamed from glance into docker are also '
+             'written into images_directory. Only used if '
+             'image_load_mode is ``stream``.'),
 ]
 
 glance_opt_group = cfg.OptGroup(name='glance',
@@ -64,7 +64,8 @@ Related options:
     cfg.ListOpt("enabled_filters",
                 default=[
                     "NoopFilter",
-                    "CPUFilter"
+                    "CPUFilter",
+                    "RAMFilter"
                     ],
                 help="""
 Filters that the scheduler will use.
@@ -88,6 +89,99 @@ Related options:
 * All of the filters in this option *must* be present in the
   'scheduler_available_filters' option, or a SchedulerHostFilterNotFound
   exception will be raised.
+"""),
+    cfg.IntOpt("host_state_refresh_interval",
+               default=10,
+               min=0,
+               help="""
+Interval in seconds to refresh the host states of the scheduler.
+
+The scheduler keeps the state of each compute host in memory and claims the
+resources of the containers it places against them, together with the
+liveness of the compute services. The states are refreshed from the database
+in the background when they are older than this interval, while placements
+keep being served from the current states.
+
+This option is only used by the FilterScheduler and its subclasses; if you use
+a different scheduler, this option has no effect.
+"""),
+    cfg.IntOpt("host_claim_timeout",
+               default=600,
+               min=1,
+               help="""
+Time in seconds after which the scheduler drops a resource claim.
+
+The resources of a container placed by the scheduler are claimed against the
+state of its host until the host reports the container. A claim whose
+container is never reported, because its creation failed or the container was
+deleted, is dropped after this time.
+
+The host states and their claims are kept in memory by each zun-api worker,
+so the claims of one worker are not seen by the other workers.
+
+This option is only used by the FilterScheduler and its subclasses; if you use
+a different scheduler, this option has no effect.
+"""),
+    cfg.ListOpt("weight_classes",
+                default=["zun.scheduler.weights.all_weighers"],
+                help="""
+Weighers that the scheduler will use.
+
+Only hosts which pass the filters are weighed. The weight for any host starts
+at 0, and the weighers order these hosts by adding to or subtracting from the
+weight assigned by the previous weigher. Weights may become negative. A
+container will be scheduled to the host with the highest weight, ties being
+broken randomly.
+
+By default, this is set to all weighers that are included with zun.
+
+This option is only used by the FilterScheduler and its subclasses; if you use
+a different scheduler, this option has no effect.
+
+Possible values:
+
+* A list of zero or more strings, where each string corresponds to the name of
+  a weigher that will be used for selecting a host
+"""),
+    cfg.FloatOpt("cpu_weight_multiplier",
+                 default=1.0,
+                 help="""
+CPU weight multiplier ratio.
+
+Multiplier used for weighing free CPUs. Negative numbers mean to stack vs
+spread.
+
+Possible values:
+
+* An integer or float value, where the value corresponds to the multipler
+  ratio for this weigher.
+"""),
+    cfg.FloatOpt("ram_weight_multiplier",
+                 default=1.0,
+                 help="""
+RAM weight multiplier ratio.
+
+Multiplier used for weighing available RAM. Negative numbers mean to stack vs
+spread.
+
+Possible values:
+
+* An integer or float value, where the value corresponds to the multipler
+  ratio for this weigher.
+"""),
+    cfg.FloatOpt("container_weight_multiplier",
+                 default=-1.0,
+                 help="""
+Container count weight multiplier ratio.
+
+Multiplier used for weighing the number of containers of a host. Negative
+numbers prefer hosts with fewer containers (spread), positive numbers prefer
+hosts with more containers (stack).
+
+Possible values:
+
+* An integer or float value, where the value corresponds to the multipler
+  ratio for this weigher.
 """),
 ]
 
@@ -41,9 +41,33 @@ periodic_opts = [
                default=180,
                help='Max interval size between periodic tasks execution in '
                     'seconds.'),
+    cfg.IntOpt('service_liveness_cache_ttl',
+               default=10,
+               min=0,
+               help='Interval in seconds to refresh the liveness of the '
+                    'compute services cached by the API. The services are '
+                    'reloaded in the background once the cache is older '
+                    'than this interval. A host seen down is read again '
+                    'from the database first, but a host which stopped '
+                    'reporting may still be seen up for this long.'),
 ]
 
-ALL_OPTS = (service_opts + periodic_opts)
+client_opts = [
+    cfg.IntOpt('client_cache_size',
+               default=64,
+               min=0,
+               help='Maximum number of request contexts whose OpenStack '
+                    'clients are cached. The least recently used clients '
+                    'are evicted first. Set to 0 to disable the cache.'),
+    cfg.IntOpt('client_cache_ttl',
+               default=600,
+               min=0,
+               help='Time in seconds the OpenStack clients of a request '
+                    'context are cached. The clients are evicted earlier '
+                    'if the token of the context expires.'),
+]
+
+ALL_OPTS = (service_opts + periodic_opts + client_opts)
 
 
 def register_opts(conf):
@@ -0,0 +1,54 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+import zun.conf
+
+CONF = zun.conf.CONF
+LOG = logging.getLogger(__name__)
+
+
+class CpuLedger(object):
+    """Record the CPU allocated to each docker container of this host.
+
+    The ledger is filled in when containers are created, updated or deleted
+    by zun. Containers which are unknown to the ledger, e.g. after a restart
+    of zun-compute, are inspected once and recorded. The whole ledger is
+    dropped every [docker]cpu_ledger_sync_interval seconds so that changes
+    made outside of zun are eventually picked up.
+    """
+
+    def __init__(self):
+        self._cpus = {}
+        self._synced_at = timeutils.utcnow()
+
+    def set(self, container_id, cpu):
+        self._cpus[container_id] = float(cpu or 0)
+
+    def remove(self, container_id):
+        self._cpus.pop(container_id, None)
+
+    def get(self, container_id):
+        return self._cpus.get(container_id)
+
+    def sync_if_needed(self):
+        interval = CONF.docker.cpu_ledger_sync_interval
+        if timeutils.is_older_than(self._synced_at, interval):
+            LOG.debug('Dropping the CPU ledger to resync it with docker')
+            self._cpus = {}
+            self._synced_at = timeutils.utcnow()
+
+
+# The ledger is shared by all drivers of the process.
+LEDGER = CpuLedger()
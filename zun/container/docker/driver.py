@@ -13,10 +13,10 @@
 
 import datetime
 import eventlet
+import re
 import six
 
 from docker import errors
-from neutronclient.common import exceptions as n_exceptions
 from oslo_log import log as logging
 from oslo_utils import timeutils
 
@@ -28,9 +28,13 @@ from zun.common import nova
 from zun.common import utils
 from zun.common.utils import check_container_id
 import zun.conf
+from zun.container.docker import cpu_ledger
+from zun.container.docker import event_watcher
+from zun.container.docker import sandbox_pool
 from zun.container.docker import utils as docker_utils
 from zun.container import driver
 from zun.network import network as zun_network
+from zun.network import neutron as neutron_api
 from zun import objects
 
 
@@ -60,9 +64,9 @@ class DockerDriver(driver.ContainerDriver):
 
     def get_image(self, name):
         LOG.debug('Obtaining image %s' % name)
-        with docker_utils.docker_client() as docker:
-            response = docker.get_image(name)
-            return response
+        # The caller reads the image after this returns, so it is read with
+        # a client of its own rather than with a pooled one.
+        return docker_utils.open_stream('get_image', name)
 
     def images(self, repo, quiet=False):
         with docker_utils.docker_client() as docker:
@@ -107,11 +111,15 @@ class DockerDriver(driver.ContainerDriver):
 
             response = docker.create_container(image, **kwargs)
             container.container_id = response['Id']
+            cpu_ledger.LEDGER.set(container.container_id, container.cpu)
             container.status = consts.CREATED
             container.status_reason = None
-            container.addresses = self.get_addresses(context, container)
-            container.save(context)
-            return container
+
+        # The client is given back to the pool first, since the addresses
+        # are looked up with another pooled client.
+        container.addresses = self.get_addresses(context, container)
+        container.save(context)
+        return container
 
     def delete(self, container, force):
         with docker_utils.docker_client() as docker:
@@ -121,8 +129,10 @@ class DockerDriver(driver.ContainerDriver):
                                             force=force)
                 except errors.APIError as api_error:
                     if '404' in str(api_error):
+                        cpu_ledger.LEDGER.remove(container.container_id)
                         return
                     raise
+                cpu_ledger.LEDGER.remove(container.container_id)
 
     def list(self, context):
         id_to_container_map = {}
@@ -146,34 +156,113 @@ class DockerDriver(driver.ContainerDriver):
         return db_containers
 
     def update_containers_states(self, context, containers):
-        my_containers = self.list(context)
-        if not my_containers:
+        with docker_utils.docker_client() as docker:
+            id_to_docker_container_map = {c['Id']: c
+                                          for c in docker.list_containers()}
+
+        my_host = CONF.host
+        changed_containers = []
+        for container in containers:
+            docker_container = id_to_docker_container_map.pop(
+                container.container_id, None)
+            if docker_container is None:
+                continue
+            if self._sync_container_state(container, docker_container,
+                                          my_host):
+                changed_containers.append(container)
+
+        # Containers running in this host but recorded in DB with another
+        # host are not part of the given list, look them up by name.
+        for docker_container in id_to_docker_container_map.values():
+            container_uuid = self._get_uuid_from_docker_container(
+                docker_container)
+            if not container_uuid:
+                continue
+            try:
+                container = objects.Container.get_by_uuid(context,
+                                                          container_uuid)
+            except exception.ContainerNotFound:
+                continue
+            if container.container_id != docker_container['Id']:
+                continue
+            if self._sync_container_state(container, docker_container,
+                                          my_host):
+                changed_containers.append(container)
+
+        for container in self._sync_container_addresses(context, containers):
+            if container not in changed_containers:
+                changed_containers.append(container)
+
+        objects.Container.save_all(context, changed_containers)
+
+    def _sync_container_addresses(self, context, containers):
+        """Fill in the addresses which were not resolved at creation.
+
+        The addresses of all the containers are resolved together, with
+        bulk neutron lookups. Return the containers whose addresses were
+        filled in.
+        """
+        containers = [c for c in containers
+                      if not c.addresses and c.status == consts.RUNNING and
+                      self.get_sandbox_id(c)]
+        if not containers:
+            return []
+        try:
+            addresses = self.get_addresses_many(context, containers)
+        except Exception as e:
+            LOG.warning('Failed to resolve the addresses of %(count)d '
+                        'container(s): %(error)s',
+                        {'count': len(containers),
+                         'error': six.text_type(e)})
+            return []
+
+        changed_containers = []
+        for container in containers:
+            if addresses.get(container.uuid):
+                container.addresses = addresses[container.uuid]
+                changed_containers.append(container)
+        return changed_containers
+
+    def _sync_container_state(self, container, docker_container, host):
+        changed = False
+        # sync status
+        status = self._get_status_from_state(docker_container.get('State'))
+        if container.status != status:
+            old_status = container.status
+            container.status = status
+            changed = True
+            LOG.info('Status of container %s changed from %s to %s',
+                     container.uuid, old_status, container.status)
+        # sync host
+        if container.host != host:
+            old_host = container.host
+            container.host = host
+            changed = True
+            LOG.info('Host of container %s changed from %s to %s',
+                     container.uuid, old_host, container.host)
+        return changed
+
+    def _get_uuid_from_docker_container(self, docker_container):
+        for name in docker_container.get('Names') or []:
+            name = name.lstrip('/')
+            if name.startswith('zun-sandbox-'):
+                continue
+            if name.startswith('zun-'):
+                return name[len('zun-'):]
+        return None
+
+    def start_event_watcher(self, tg):
+        if not CONF.docker.enable_event_watcher:
             return
+        watcher = event_watcher.DockerEventWatcher(self)
+        tg.add_thread(watcher.run)
 
-        id_to_my_container_map = {container.container_id: container
-                                  for container in my_containers}
-        id_to_container_map = {container.container_id: container
-                               for container in containers}
-
-        for cid in (six.viewkeys(id_to_container_map) &
-                    six.viewkeys(id_to_my_container_map)):
-            container = id_to_container_map[cid]
-            # sync status
-            my_container = id_to_my_container_map[cid]
-            if container.status != my_container.status:
-                old_status = container.status
-                container.status = my_container.status
-                container.save(context)
-                LOG.info('Status of container %s changed from %s to %s',
-                         container.uuid, old_status, container.status)
-            # sync host
-            my_host = CONF.host
-            if container.host != my_host:
-                old_host = container.host
-                container.host = my_host
-                container.save(context)
-                LOG.info('Host of container %s changed from %s to %s',
-                         container.uuid, old_host, container.host)
+    def start_sandbox_pool(self, tg):
+        if CONF.docker.sandbox_pool_size == 0:
+            return
+        pool = sandbox_pool.get_sandbox_pool(self)
+        tg.add_thread(pool.cleanup)
+        tg.add_timer(CONF.periodic_interval_max, pool.expire)
 
     def show(self, container):
         with docker_utils.docker_client() as docker:
@@ -193,6 +282,27 @@ class DockerDriver(driver.ContainerDriver):
             self._populate_container(container, response)
             return container
 
+    def show_many(self, containers):
+        with docker_utils.docker_client() as docker:
+            id_to_container_map = {c['Id']: c
+                                   for c in docker.list_containers()}
+
+        for container in containers:
+            if container.container_id is None:
+                continue
+
+            docker_container = id_to_container_map.get(container.container_id)
+            if docker_container:
+                self._populate_container_from_list(container,
+                                                   docker_container)
+            else:
+                container.status = consts.ERROR
+                container.status_reason = _(
+                    "Container %s is missing in docker") % (
+                    container.container_id)
+
+        return containers
+
     def format_status_detail(self, status_time):
         try:
             st = datetime.datetime.strptime((status_time[:19]),
@@ -260,24 +370,58 @@ class DockerDriver(driver.ContainerDriver):
             if status_detail is None:
                 container.status_detail = None
         else:
-            if state.lower() == 'created':
-                container.status = consts.CREATED
-            elif state.lower() == 'paused':
-                container.status = consts.PAUSED
-            elif state.lower() == 'running':
-                container.status = consts.RUNNING
-            elif state.lower() == 'dead':
-                container.status = consts.ERROR
-            elif state.lower() in ('restarting', 'exited', 'removing'):
-                container.status = consts.STOPPED
-            else:
-                container.status = consts.UNKNOWN
+            container.status = self._get_status_from_state(state)
             container.status_detail = None
 
         config = response.get('Config')
         if config:
             self._populate_hostname_and_ports(container, config)
 
+    def _populate_container_from_list(self, container, response):
+        """Populate a container from its entry in a container listing.
+
+        The listing has no hostname and no detailed state, so the status
+        detail is derived from the status line of docker and the stored
+        hostname is kept. The listing only has the ports of the running
+        containers, the stored ports of the others are kept.
+        """
+        container.status = self._get_status_from_state(response.get('State'))
+        container.status_detail = self._format_list_status(
+            response.get('Status'))
+        ports = response.get('Ports')
+        if ports and container.status in (consts.RUNNING, consts.PAUSED):
+            container.ports = sorted(set(
+                p['PrivatePort'] for p in ports if 'PrivatePort' in p))
+
+    def _format_list_status(self, status):
+        """Convert a status line of docker to the format of show()."""
+        if not status:
+            return None
+        match = re.match(r'^Up (.+?)( \(Paused\))?$', status)
+        if match:
+            if match.group(2):
+                return "Up {} (paused)".format(match.group(1))
+            return "Up {}".format(match.group(1))
+        match = re.match(r'^Exited \((-?\d+)\) (.+) ago$', status)
+        if match:
+            return "Exited({}) {} ago ".format(match.group(1), match.group(2))
+        return status
+
+    def _get_status_from_state(self, state):
+        state = (state or '').lower()
+        if state == 'created':
+            return consts.CREATED
+        elif state == 'paused':
+            return consts.PAUSED
+        elif state == 'running':
+            return consts.RUNNING
+        elif state == 'dead':
+            return consts.ERROR
+        elif state in ('restarting', 'exited', 'removing'):
+            return consts.STOPPED
+        else:
+            return consts.UNKNOWN
+
     def _populate_hostname_and_ports(self, container, config):
         # populate hostname
         container.hostname = config.get('Hostname')
@@ -429,7 +573,11 @@ class DockerDriver(driver.ContainerDriver):
             args['cpu_period'] = 100000
 
         with docker_utils.docker_client() as docker:
-            return docker.update_container(container.container_id, **args)
+            response = docker.update_container(container.container_id,
+                                               **args)
+            if cpu is not None:
+                cpu_ledger.LEDGER.set(container.container_id, cpu)
+            return response
 
     @check_container_id
     def get_websocket_url(self, container):
@@ -495,9 +643,11 @@ class DockerDriver(driver.ContainerDriver):
 
     def create_sandbox(self, context, container, image='kubernetes/pause',
                        networks=None):
-        with docker_utils.docker_client() as docker:
-            network_api = zun_network.api(context=context, docker_api=docker)
-            if networks is None:
+        name = self.get_sandbox_name(container)
+        if networks is None:
+            with docker_utils.docker_client() as docker:
+                network_api = zun_network.api(context=context,
+                                              docker_api=docker)
                 # Find an available neutron net and create docker network by
                 # wrapping the neutron net.
                 neutron_net = self._get_available_network(context)
@@ -505,7 +655,37 @@ class DockerDriver(driver.ContainerDriver):
                     context, network_api, neutron_net['id'])
                 networks = [network['Name']]
 
-            name = self.get_sandbox_name(container)
+                if CONF.docker.sandbox_pool_size > 0:
+                    sandbox_id = self._claim_pooled_sandbox(
+                        context, docker, name, image, neutron_net['id'],
+                        networks)
+                    if sandbox_id:
+                        return sandbox_id
+
+        return self._create_sandbox(context, name, image, networks)
+
+    def _claim_pooled_sandbox(self, context, docker, name, image,
+                              neutron_net_id, networks):
+        pool = sandbox_pool.get_sandbox_pool(self)
+        key = (context.project_id, image, neutron_net_id)
+        sandbox_id = pool.claim(key, networks)
+        if sandbox_id is None:
+            return None
+
+        try:
+            docker.rename(sandbox_id, name)
+        except errors.APIError as api_error:
+            LOG.warning("Failed to take pooled sandbox %(sandbox)s: "
+                        "%(error)s", {'sandbox': sandbox_id,
+                                      'error': six.text_type(api_error)})
+            pool.release(sandbox_id)
+            return None
+        LOG.debug("Took sandbox %s from the pool", sandbox_id)
+        return sandbox_id
+
+    def _create_sandbox(self, context, name, image, networks):
+        with docker_utils.docker_client() as docker:
+            network_api = zun_network.api(context=context, docker_api=docker)
             sandbox = docker.create_container(image, name=name,
                                               hostname=name[:63])
             # Container connects to the bridge network by default so disconnect
@@ -518,7 +698,7 @@ class DockerDriver(driver.ContainerDriver):
             return sandbox['Id']
 
     def _get_available_network(self, context):
-        neutron = clients.OpenStackClients(context).neutron()
+        neutron = clients.get_clients(context).neutron()
         search_opts = {'tenant_id': context.project_id, 'shared': False}
         nets = neutron.list_networks(**search_opts).get('networks', [])
         if not nets:
@@ -578,30 +758,53 @@ class DockerDriver(driver.ContainerDriver):
         return 'zun-' + container.uuid
 
     def get_addresses(self, context, container):
-        neutron = clients.OpenStackClients(context).neutron()
-        sandbox_id = self.get_sandbox_id(container)
+        return self.get_addresses_many(context, [container])[container.uuid]
+
+    def get_addresses_many(self, context, containers):
+        """Retrieve the IP addresses of containers, keyed by uuid.
+
+        The neutron networks and ports of all the sandboxes are looked up
+        with one list_networks and one list_ports call.
+        """
+        sandbox_networks = {}
         with docker_utils.docker_client() as docker:
+            for container in containers:
+                sandbox_id = self.get_sandbox_id(container)
+                response = docker.inspect_container(sandbox_id)
+                sandbox_networks[container.uuid] = \
+                    response["NetworkSettings"]["Networks"]
+
+        neutron_net_ids = set()
+        for networks in sandbox_networks.values():
+            for name in networks:
+                neutron_net_id = name.rsplit('-', 1)[0]
+                if neutron_net_id:
+                    neutron_net_ids.add(neutron_net_id)
+        if not neutron_net_ids:
+            return {uuid: {} for uuid in sandbox_networks}
+
+        neutron = clients.get_clients(context).neutron()
+        neutron_net_names = neutron_api.get_network_names(
+            neutron, context.project_id, neutron_net_ids)
+        mac_addresses = [
+            network["MacAddress"]
+            for networks in sandbox_networks.values()
+            for name, network in networks.items()
+            if neutron_net_names.get(name.rsplit('-', 1)[0])]
+        port_ids = neutron_api.get_ports_by_mac(neutron, mac_addresses)
+
+        result = {}
+        for uuid, networks in sandbox_networks.items():
             addresses = {}
-            response = docker.inspect_container(sandbox_id)
-            networks = response["NetworkSettings"]["Networks"]
             for name, network in networks.items():
-                neutron_net_id = name.rsplit('-', 1)[0]
-                if not neutron_net_id:
-                    continue
-
-                try:
-                    neutron_net = neutron.show_network(neutron_net_id)
-                    neutron_net_name = neutron_net['network'].get('name')
-                except n_exceptions.NetworkNotFoundClient:
-                    neutron_net_name = ''
+                neutron_net_name = neutron_net_names.get(
+                    name.rsplit('-', 1)[0])
                 if not neutron_net_name:
                     continue
 
                 v4_address = network.get("IPAddress", "")
                 v6_address = network.get("GlobalIPv6Address", "")
-                mac_address = network["MacAddress"]
-                ports = neutron.list_ports(mac_address=mac_address)['ports']
-                port_id = ports[0]['id'] if ports else ''
+                port_id = port_ids.get(network["MacAddress"], '')
                 addresses[neutron_net_name] = [
                     {
                         'addr': v4_address,
@@ -614,8 +817,9 @@ class DockerDriver(driver.ContainerDriver):
                         'port': port_id
                     },
                 ]
+            result[uuid] = addresses
 
-            return addresses
+        return result
 
     def get_host_info(self):
         with docker_utils.docker_client() as docker:
@@ -641,23 +845,38 @@ class DockerDriver(driver.ContainerDriver):
 
     def get_cpu_used(self):
         cpu_used = 0
+        ledger = cpu_ledger.LEDGER
+        ledger.sync_if_needed()
         with docker_utils.docker_client() as docker:
             containers = docker.containers()
             for container in containers:
                 cnt_id = container['Id']
-                # Fixme: if there is a way to get all container inspect info
-                # for one call only?
-                inspect = docker.inspect_container(cnt_id)
-                cpu_period = inspect['HostConfig']['CpuPeriod']
-                cpu_quota = inspect['HostConfig']['CpuQuota']
-                if cpu_period and cpu_quota:
-                    cpu_used += float(cpu_quota) / cpu_period
-                else:
-                    if 'NanoCpus' in inspect['HostConfig']:
-                        nanocpus = inspect['HostConfig']['NanoCpus']
-                        cpu_used += float(nanocpus) / 1e9
+                cpu = ledger.get(cnt_id)
+                if cpu is None:
+                    # Only containers unknown to the ledger are inspected
+                    cpu = self._get_cpu_from_docker(docker, cnt_id)
+                    ledger.set(cnt_id, cpu)
+                cpu_used += cpu
             return cpu_used
 
+    def get_container_uuids(self):
+        with docker_utils.docker_client() as docker:
+            docker_containers = docker.list_containers()
+        uuids = (self._get_uuid_from_docker_container(c)
+                 for c in docker_containers)
+        return [uuid for uuid in uuids if uuid]
+
+    def _get_cpu_from_docker(self, docker, container_id):
+        inspect = docker.inspect_container(container_id)
+        cpu_period = inspect['HostConfig']['CpuPeriod']
+        cpu_quota = inspect['HostConfig']['CpuQuota']
+        if cpu_period and cpu_quota:
+            return float(cpu_quota) / cpu_period
+        elif 'NanoCpus' in inspect['HostConfig']:
+            nanocpus = inspect['HostConfig']['NanoCpus']
+            return float(nanocpus) / 1e9
+        return 0
+
 
 class NovaDockerDriver(DockerDriver):
     def create_sandbox(self, context, container, key_name=None,
@@ -747,6 +966,10 @@ class NovaDockerDriver(DockerDriver):
         else:
             return None
 
+    def get_addresses_many(self, context, containers):
+        return {container.uuid: self.get_addresses(context, container)
+                for container in containers}
+
     def _find_container_by_server_name(self, name):
         with docker_utils.docker_client() as docker:
             for info in docker.list_instances(inspect=True):
@@ -0,0 +1,172 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+
+import eventlet
+from oslo_log import log as logging
+import requests
+import six
+
+from zun.common import consts
+from zun.common import context
+from zun.common import exception
+from zun.common.i18n import _
+import zun.conf
+from zun.container.docker import utils as docker_utils
+from zun import objects
+
+CONF = zun.conf.CONF
+LOG = logging.getLogger(__name__)
+
+CONTAINER_PREFIX = 'zun-'
+SANDBOX_PREFIX = 'zun-sandbox-'
+
+
+class DockerEventWatcher(object):
+    '''Track container states by consuming the docker event stream.'''
+
+    def __init__(self, driver):
+        self.driver = driver
+        # The time of the last seen event, in nanoseconds, and the keys of
+        # the events seen at that time.
+        self._since = None
+        self._seen = set()
+        self._running = False
+
+    def run(self):
+        self._running = True
+        while self._running:
+            try:
+                self.watch()
+            except requests.exceptions.RequestException as e:
+                # The event stream is closed by the read timeout of the
+                # docker client if the host is idle, just reconnect.
+                LOG.debug("Docker event stream interrupted: %s",
+                          six.text_type(e))
+            except Exception as e:
+                LOG.exception("Unexpected exception while watching docker "
+                              "events: %s", six.text_type(e))
+            if self._running:
+                eventlet.sleep(CONF.docker.event_watcher_retry_interval)
+
+    def stop(self):
+        self._running = False
+
+    def watch(self):
+        ctx = context.get_admin_context(all_tenants=True)
+        # The event stream holds the client for a long time, so don't take
+        # it from the client pool.
+        with docker_utils.docker_client(pooled=False) as docker:
+            # Resume from the time of the last seen event so that no event
+            # is missed while reconnecting.
+            events = docker.events(since=self._format_since(),
+                                   filters={'type': 'container'},
+                                   decode=True)
+            self.consume(ctx, events)
+
+    def consume(self, ctx, events):
+        for event in events:
+            if not self._is_seen(event):
+                self.process_event(ctx, event)
+
+    def _format_since(self):
+        if self._since is None:
+            return None
+        return '%d.%09d' % divmod(self._since, 10 ** 9)
+
+    def _is_seen(self, event):
+        """Record an event, and tell whether it was already seen.
+
+        Docker sends the events of the time it resumes from again, so the
+        events seen at the time of the last seen event are remembered.
+        """
+        time_nano = event.get('timeNano') or event.get('time', 0) * 10 ** 9
+        actor = event.get('Actor') or {}
+        key = (actor.get('ID') or event.get('id'),
+               event.get('Action') or event.get('status'), time_nano)
+        if key in self._seen:
+            return True
+        if self._since is None or time_nano > self._since:
+            self._since = time_nano
+            self._seen = set()
+        self._seen.add(key)
+        return False
+
+    def process_event(self, ctx, event):
+        actor = event.get('Actor') or {}
+        attributes = actor.get('Attributes') or {}
+        name = attributes.get('name', '')
+        if name.startswith(SANDBOX_PREFIX) or \
+                not name.startswith(CONTAINER_PREFIX):
+            return
+
+        action = event.get('Action') or event.get('status')
+        handler = getattr(self, '_handle_%s' % action, None)
+        if handler is None:
+            return
+
+        try:
+            container = objects.Container.get_by_uuid(
+                ctx, name[len(CONTAINER_PREFIX):])
+        except exception.ContainerNotFound:
+            return
+        if container.container_id != actor.get('ID'):
+            return
+
+        handler(container, event, attributes)
+        if container.obj_what_changed():
+            LOG.debug('Container %s updated by docker event %s',
+                      container.uuid, action)
+            container.save(ctx)
+
+    def _format_event_time(self, event):
+        event_time = datetime.datetime.utcfromtimestamp(event.get('time', 0))
+        status_detail = self.driver.format_status_detail(
+            event_time.isoformat())
+        return status_detail or '0 seconds'
+
+    def _update(self, container, **values):
+        # Only set changed fields so that unchanged containers aren't saved
+        for field, value in values.items():
+            if getattr(container, field) != value:
+                setattr(container, field, value)
+
+    def _handle_start(self, container, event, attributes):
+        self._update(container, status=consts.RUNNING, status_reason=None,
+                     status_detail="Up {}".format(
+                         self._format_event_time(event)))
+
+    _handle_restart = _handle_start
+
+    def _handle_unpause(self, container, event, attributes):
+        self._update(container, status=consts.RUNNING, status_detail=None)
+
+    def _handle_pause(self, container, event, attributes):
+        self._update(container, status=consts.PAUSED, status_detail=None)
+
+    def _handle_die(self, container, event, attributes):
+        self._update(container, status=consts.STOPPED,
+                     status_detail="Exited({}) {} ago ".format(
+                         attributes.get('exitCode'),
+                         self._format_event_time(event)))
+
+    def _handle_oom(self, container, event, attributes):
+        self._update(container,
+                     status_reason=_("Container ran out of memory"))
+
+    def _handle_destroy(self, container, event, attributes):
+        if container.task_state == consts.CONTAINER_DELETING:
+            return
+        self._update(container, status=consts.ERROR,
+                     status_reason=_("Container was removed from docker"),
+                     status_detail=None)
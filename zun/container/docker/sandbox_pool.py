@@ -0,0 +1,166 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import collections
+
+from oslo_log import log as logging
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+import six
+
+from zun.common import context as zun_context
+from zun.common import utils
+import zun.conf
+from zun.container.docker import utils as docker_utils
+
+CONF = zun.conf.CONF
+LOG = logging.getLogger(__name__)
+
+POOL_SANDBOX_PREFIX = 'zun-sandbox-pool-'
+
+_sandbox_pool = None
+
+
+class SandboxPool(object):
+    """Keep sandboxes created and networked ahead of the containers.
+
+    The sandboxes are pooled per (project, image, neutron network). A key is
+    warmed once a sandbox was claimed for it: each claim replenishes the
+    pool of its key in the background up to [docker]sandbox_pool_size
+    sandboxes. The refills are not tied to the request of any claim: they
+    run with an admin context scoped to the project of the key, so the
+    neutron ports are still owned by that project. Keys which were not
+    claimed, and pooled sandboxes which were not used, for
+    [docker]sandbox_pool_ttl seconds are expired by expire().
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._sandboxes = {}
+        self._demand = {}
+        self._filling = set()
+
+    def _is_expired(self, timestamp):
+        return timeutils.is_older_than(timestamp, CONF.docker.sandbox_pool_ttl)
+
+    def claim(self, key, networks):
+        """Take a sandbox out of the pool of a key.
+
+        :param key: a (project_id, image, neutron_net_id) tuple.
+        :param networks: the docker networks the sandboxes of the key are
+                         connected to.
+        :returns: the id of a started sandbox, or None if the pool is empty.
+        """
+        self._demand[key] = (networks, timeutils.utcnow())
+        sandboxes = self._sandboxes.setdefault(key, collections.deque())
+        sandbox_id = None
+        while sandboxes and sandbox_id is None:
+            candidate, created_at = sandboxes.popleft()
+            if self._is_expired(created_at):
+                utils.spawn_n(self._delete, candidate)
+            else:
+                sandbox_id = candidate
+        self._fill_in_background(key)
+        return sandbox_id
+
+    def size(self, key):
+        return len(self._sandboxes.get(key, ()))
+
+    def _fill_in_background(self, key):
+        if key not in self._filling:
+            self._filling.add(key)
+            utils.spawn_n(self._fill, key)
+
+    def _get_context(self, key):
+        ctx = zun_context.get_admin_context(all_tenants=True)
+        ctx.project_id = key[0]
+        return ctx
+
+    def _fill(self, key):
+        try:
+            context = self._get_context(key)
+            while self.size(key) < CONF.docker.sandbox_pool_size:
+                if key not in self._demand:
+                    break
+                networks, claimed_at = self._demand[key]
+                name = POOL_SANDBOX_PREFIX + uuidutils.generate_uuid()
+                sandbox_id = self.driver._create_sandbox(
+                    context, name, key[1], networks)
+                self._sandboxes.setdefault(key, collections.deque()).append(
+                    (sandbox_id, timeutils.utcnow()))
+                LOG.debug("Added sandbox %(sandbox)s to the pool of "
+                          "%(key)s", {'sandbox': sandbox_id, 'key': key})
+        except Exception as e:
+            LOG.exception("Failed to fill the sandbox pool of %(key)s: "
+                          "%(error)s", {'key': key, 'error': six.text_type(e)})
+        finally:
+            self._filling.discard(key)
+
+    def _delete(self, sandbox_id):
+        ctx = zun_context.get_admin_context(all_tenants=True)
+        try:
+            self.driver.delete_sandbox(ctx, sandbox_id)
+        except Exception as e:
+            LOG.error("Failed to delete pooled sandbox %(sandbox)s: "
+                      "%(error)s", {'sandbox': sandbox_id,
+                                    'error': six.text_type(e)})
+
+    def release(self, sandbox_id):
+        """Delete a claimed sandbox which could not be used."""
+        utils.spawn_n(self._delete, sandbox_id)
+
+    def expire(self):
+        """Delete the expired sandboxes and forget the expired keys."""
+        for key, demand in list(self._demand.items()):
+            if self._is_expired(demand[1]):
+                del self._demand[key]
+
+        expired = []
+        for key, sandboxes in list(self._sandboxes.items()):
+            keep = collections.deque()
+            for sandbox_id, created_at in sandboxes:
+                if key in self._demand and not self._is_expired(created_at):
+                    keep.append((sandbox_id, created_at))
+                else:
+                    expired.append(sandbox_id)
+            if keep:
+                self._sandboxes[key] = keep
+            else:
+                del self._sandboxes[key]
+
+        for sandbox_id in expired:
+            LOG.debug("Deleting expired pooled sandbox %s", sandbox_id)
+            self._delete(sandbox_id)
+
+    def cleanup(self):
+        """Delete the pooled sandboxes left over by a previous run."""
+        pooled = set(sandbox_id for sandboxes in self._sandboxes.values()
+                     for sandbox_id, created_at in sandboxes)
+        try:
+            with docker_utils.docker_client() as docker:
+                leftovers = docker.containers(
+                    all=True, filters={'name': POOL_SANDBOX_PREFIX})
+        except Exception as e:
+            LOG.exception("Failed to list the leftover pooled sandboxes: "
+                          "%s", six.text_type(e))
+            return
+        for leftover in leftovers:
+            if leftover['Id'] not in pooled:
+                self._delete(leftover['Id'])
+
+
+def get_sandbox_pool(driver):
+    """Return the sandbox pool shared by the drivers of the process."""
+    global _sandbox_pool
+    if _sandbox_pool is None:
+        _sandbox_pool = SandboxPool(driver)
+    return _sandbox_pool
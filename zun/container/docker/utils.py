@@ -10,35 +10,181 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import contextlib
+import sys
+
 import six
 
 from docker import client
 from docker import errors
 from docker import tls
+from eventlet import pools
+from oslo_log import log as logging
+from oslo_utils import timeutils
+import requests
 
 from zun.common import exception
 import zun.conf
 
 CONF = zun.conf.CONF
+LOG = logging.getLogger(__name__)
 
+_client_pool = None
 
-@contextlib.contextmanager
-def docker_client():
+
+def _create_client():
     client_kwargs = dict()
     if not CONF.docker.api_insecure:
         client_kwargs['ca_cert'] = CONF.docker.ca_file
         client_kwargs['client_key'] = CONF.docker.key_file
         client_kwargs['client_cert'] = CONF.docker.key_file
 
+    return DockerHTTPClient(
+        CONF.docker.api_url,
+        CONF.docker.docker_remote_api_version,
+        CONF.docker.default_timeout,
+        **client_kwargs
+    )
+
+
+class DockerClientPool(pools.Pool):
+    """A green thread safe pool of long-lived docker clients.
+
+    Each client keeps its HTTP connections alive, so reusing clients saves
+    a TCP/TLS handshake per docker API call. Clients idle for longer than
+    [docker]client_health_check_interval are pinged before being handed
+    out, and clients which hit a connection error are replaced.
+    """
+
+    def __init__(self, max_size):
+        super(DockerClientPool, self).__init__(max_size=max_size)
+        # Statistics about green threads waiting for a free client
+        self.wait_count = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def create(self):
+        return _create_client()
+
+    def get(self):
+        must_wait = self.free() == 0
+        watch = timeutils.StopWatch()
+        watch.start()
+        docker = super(DockerClientPool, self).get()
+        if must_wait:
+            elapsed = watch.elapsed()
+            self.wait_count += 1
+            self.wait_time += elapsed
+            self.max_wait_time = max(self.max_wait_time, elapsed)
+            LOG.debug('Waited %(elapsed).3f seconds for a docker client, '
+                      'pool size is %(size)s', {'elapsed': elapsed,
+                                                'size': self.max_size})
+
+        if not self._is_healthy(docker):
+            docker.close()
+            try:
+                docker = self.create()
+            except Exception:
+                self.current_size -= 1
+                raise
+        return docker
+
+    def put(self, docker):
+        docker.last_used = timeutils.utcnow()
+        super(DockerClientPool, self).put(docker)
+
+    def _is_healthy(self, docker):
+        if not docker.healthy:
+            return False
+        if docker.last_used is None:
+            return True
+        interval = CONF.docker.client_health_check_interval
+        if not timeutils.is_older_than(docker.last_used, interval):
+            return True
+        try:
+            docker.ping()
+        except Exception as e:
+            LOG.debug('Discarding unhealthy docker client: %s',
+                      six.text_type(e))
+            return False
+        return True
+
+
+def get_client_pool():
+    global _client_pool
+    if _client_pool is None:
+        _client_pool = DockerClientPool(CONF.docker.client_pool_size)
+    return _client_pool
+
+
+@contextlib.contextmanager
+def docker_client(pooled=True):
+    """Return a docker client.
+
+    By default, the client is borrowed from the process-wide client pool and
+    returned to it on exit. Callers which hold the client for a long time,
+    e.g. to consume a stream, should pass pooled=False to get a dedicated
+    client instead.
+    """
+    if pooled:
+        pool = get_client_pool()
+        docker = pool.get()
+    else:
+        docker = _create_client()
+
     try:
-        yield DockerHTTPClient(
-            CONF.docker.api_url,
-            CONF.docker.docker_remote_api_version,
-            CONF.docker.default_timeout,
-            **client_kwargs
-        )
+        yield docker
     except errors.APIError as e:
         raise exception.DockerError(error_msg=six.text_type(e))
+    except requests.exceptions.RequestException:
+        docker.healthy = False
+        raise
+    finally:
+        if pooled:
+            pool.put(docker)
+        else:
+            docker.close()
+
+
+class DockerStream(object):
+    """A streamed docker response, read with a client of its own.
+
+    The client is only closed once the stream is read to its end or closed,
+    since the response is read after the call which returned it.
+    """
+
+    def __init__(self, manager, stream):
+        self._manager = manager
+        self._stream = stream
+
+    def read(self, *args, **kwargs):
+        data = self._stream.read(*args, **kwargs)
+        if not data:
+            self.close()
+        return data
+
+    def close(self):
+        if self._manager is not None:
+            manager, self._manager = self._manager, None
+            try:
+                self._stream.close()
+            finally:
+                manager.__exit__(None, None, None)
+
+
+def open_stream(method, *args, **kwargs):
+    """Call a docker API method returning a stream, on a dedicated client.
+
+    :returns: a :class:`DockerStream` which closes the client once read.
+    """
+    manager = docker_client(pooled=False)
+    docker = manager.__enter__()
+    try:
+        stream = getattr(docker, method)(*args, **kwargs)
+    except Exception:
+        # The client is closed, and the docker errors translated, on exit
+        if not manager.__exit__(*sys.exc_info()):
+            raise
+    return DockerStream(manager, stream)
 
 
 class DockerHTTPClient(client.Client):
@@ -64,6 +210,8 @@ class DockerHTTPClient(client.Client):
             timeout=timeout,
             tls=ssl_config
         )
+        self.healthy = True
+        self.last_used = None
 
     def list_instances(self, inspect=False):
         """List all containers."""
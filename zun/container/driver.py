@@ -84,6 +84,14 @@ class ContainerDriver(object):
         """Show the details of a container."""
         raise NotImplementedError()
 
+    def show_many(self, containers):
+        """Show the details of a list of containers.
+
+        Drivers that can retrieve the states of all containers in one call
+        should override this method.
+        """
+        return [self.show(container) for container in containers]
+
     def reboot(self, container):
         """Reboot a container."""
         raise NotImplementedError()
@@ -182,10 +190,29 @@ class ContainerDriver(object):
     def get_addresses(self, context, container):
         """Retrieve IP addresses of the container."""
 
+    def get_addresses_many(self, context, containers):
+        """Retrieve IP addresses of containers, keyed by container uuid."""
+        return {container.uuid: self.get_addresses(context, container)
+                for container in containers}
+
     def update(self, container):
         """Update a container."""
         raise NotImplementedError()
 
+    def start_event_watcher(self, tg):
+        """Start tracking container states from the driver events.
+
+        This is optional, drivers without an event source rely on the
+        periodic state sync only.
+        """
+
+    def start_sandbox_pool(self, tg):
+        """Start maintaining the pool of pre-created sandboxes.
+
+        This is optional, drivers without a sandbox pool create the sandbox
+        of each container on demand.
+        """
+
     def get_host_numa_topology(self):
         numa_topo_obj = objects.NUMATopology()
         os_capability_linux.LinuxHost().get_host_numa_topology(numa_topo_obj)
@@ -200,6 +227,10 @@ class ContainerDriver(object):
     def get_cpu_used(self):
         raise NotImplementedError()
 
+    def get_container_uuids(self):
+        """Return the uuids of the containers present on the host."""
+        raise NotImplementedError()
+
     def get_available_resources(self, node):
         numa_topo_obj = self.get_host_numa_topology()
         node.numa_topology = numa_topo_obj
@@ -223,3 +254,4 @@ class ContainerDriver(object):
         cpu_used = self.get_cpu_used()
         node.cpu_used = cpu_used
         node.labels = labels
+        node.container_uuids = self.get_container_uuids()
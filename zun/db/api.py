@@ -135,6 +135,18 @@ def update_container(context, container_id, values):
         context, container_id, values)
 
 
+@profiler.trace("db")
+def update_containers(context, values_by_uuid):
+    """Update properties of several containers in one batch.
+
+    :context: Request context
+    :param values_by_uuid: A dict mapping the uuid of a container to the
+                           properties to be updated.
+    """
+    return _get_dbdriver_instance().update_containers(
+        context, values_by_uuid)
+
+
 @profiler.trace("db")
 def destroy_zun_service(host, binary):
     """Destroys a zun_service record.
@@ -14,11 +14,14 @@
 
 """etcd storage backend."""
 
+import base64
+import itertools
 import json
 
 import etcd
 from oslo_concurrency import lockutils
 from oslo_log import log
+from oslo_utils import excutils
 from oslo_utils import strutils
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
@@ -28,12 +31,59 @@ from zun.common import exception
 from zun.common.i18n import _
 from zun.common import singleton
 import zun.conf
+from zun.db.etcd import cache
 from zun.db.etcd import models
 
 
 LOG = log.getLogger(__name__)
 CONF = zun.conf.CONF
 
+# How many times a compare-and-swap is retried when the key is written
+# concurrently.
+CAS_RETRIES = 10
+
+# The secondary indexes map the values of some fields to the uuids of the
+# records having them, as empty keys under
+# <index path>/<index>/<value of each field>/<uuid>. A lookup on a prefix of
+# the fields of an index reads the uuids under that prefix.
+CONTAINER_INDEX_PATH = '/container_index'
+CONTAINER_INDEXES = {
+    'name': ('name', 'project_id'),
+    'host': ('host',),
+}
+IMAGE_INDEX_PATH = '/image_index'
+IMAGE_INDEXES = {
+    'repo_tag': ('repo', 'tag'),
+}
+COMPUTE_NODE_INDEX_PATH = '/compute_node_index'
+COMPUTE_NODE_INDEXES = {
+    'hostname': ('hostname',),
+}
+RESOURCE_PROVIDER_INDEX_PATH = '/resource_provider_index'
+RESOURCE_PROVIDER_INDEXES = {
+    'name': ('name',),
+}
+
+# The inventories and the allocations of each resource provider are kept in
+# a single key, <placement path>/<provider id>, holding
+# {'inventories': {<id>: inventory}, 'allocations': {<id>: allocation}}. A
+# provider is thus read in one request and updated atomically with a single
+# compare-and-swap, etcd v2 having no multi-key transactions.
+PLACEMENT_PATH = '/placement'
+
+# The resource provider of each inventory and allocation, as the value of
+# <placement index path>/<kind>/<id>, so that an item is found by reading a
+# single placement key. The index key of an item is written, and its id thus
+# reserved, before the item itself. The ids are random rather than taken
+# from a counter, so that the writes to different providers never contend.
+PLACEMENT_INDEX_PATH = '/placement_index'
+
+# The counters of the integer ids of the records created without one
+ID_COUNTER_PATH = '/ids'
+
+# The paths whose keys are cached when [etcd]cache_size is set
+CACHED_PATHS = ('/containers', '/zun_services')
+
 
 def get_connection():
     connection = EtcdAPI(host=CONF.etcd.etcd_host,
@@ -64,6 +114,24 @@ def add_identity_filter(query, value):
         raise exception.InvalidIdentity(identity=value)
 
 
+def _index_segment(value):
+    """Encode a field value as a single etcd key segment."""
+    encoded = base64.urlsafe_b64encode(
+        six.text_type(value).encode('utf-8'))
+    return encoded.decode('ascii')
+
+
+def _index_keys(index_path, indexes, values):
+    """Return the index keys of a record, from its field values."""
+    keys = set()
+    for index, fields in indexes.items():
+        segments = [index_path, index]
+        segments.extend(_index_segment(values.get(f)) for f in fields)
+        segments.append(values.get('uuid'))
+        keys.add('/'.join(segments))
+    return keys
+
+
 def translate_etcd_result(etcd_result, model_type):
     """Translate etcd unicode result to etcd models."""
     try:
@@ -77,6 +145,10 @@ def translate_etcd_result(etcd_result, model_type):
             ret = models.Image(data)
         elif model_type == 'resource_class':
             ret = models.ResourceClass(data)
+        elif model_type == 'compute_node':
+            ret = models.ComputeNode(data)
+        elif model_type == 'resource_provider':
+            ret = models.ResourceProvider(data)
         else:
             raise exception.InvalidParameterValue(
                 _('The model_type value: %s is invalid.'), model_type)
@@ -93,13 +165,36 @@ class EtcdAPI(object):
 
     def __init__(self, host, port):
         self.client = etcd.Client(host=host, port=port)
+        self.cache = None
+        if CONF.etcd.cache_size:
+            self.cache = cache.EtcdCache(self.client, CACHED_PATHS,
+                                         CONF.etcd.cache_size)
+            self.cache.start()
+
+    def _read(self, key):
+        """Read a key, from the cache if it is enabled."""
+        if self.cache is None:
+            return self.client.read(key)
+        return self.cache.read(key)
+
+    def _invalidate(self, key):
+        """Drop a key written by this process from the cache."""
+        if self.cache is not None:
+            self.cache.invalidate(key)
+
+    def cache_stats(self):
+        """Return the hit and miss counts of the cache, if it is enabled."""
+        if self.cache is None:
+            return None
+        return self.cache.stats()
 
     @lockutils.synchronized('etcd-client')
     def clean_all_zun_data(self):
         try:
             for d in self.client.read('/').children:
-                if d.key in ('/containers',):
+                if d.key in ('/containers', CONTAINER_INDEX_PATH):
                     self.client.delete(d.key, recursive=True)
+                    self._invalidate(d.key)
         except etcd.EtcdKeyNotFound as e:
             LOG.error('Error occurred while cleaning zun data: %s',
                       six.text_type(e))
@@ -118,15 +213,175 @@ class EtcdAPI(object):
         return filters
 
     def _filter_resources(self, resources, filters):
-        for c in list(resources):
-            for k, v in filters.items():
-                if c.get(k) != v:
-                    resources.remove(c)
+        return [r for r in resources
+                if all(r.get(k) == v for k, v in filters.items())]
+
+    def _scan_resources(self, path, model_type):
+        """Decode the records under a path one at a time."""
+        try:
+            res = self.client.read(path)
+        except etcd.EtcdKeyNotFound:
+            # Before the first record is written, the path does not exist.
+            return
+        except Exception as e:
+            LOG.error(
+                "Error occurred while reading from etcd server: %s",
+                six.text_type(e))
+            raise
+        for r in res.children:
+            if r.value is not None:
+                yield translate_etcd_result(r, model_type)
+
+    def _read_resources(self, path, model_type, uuids):
+        for uuid in uuids:
+            try:
+                res = self._read(path + '/' + uuid)
+            except etcd.EtcdKeyNotFound:
+                # The index outlived the record, or the record is being
+                # created.
+                continue
+            yield translate_etcd_result(res, model_type)
+
+    def _lookup_index(self, index_path, indexes, filters):
+        """Return the uuids indexed under the filters.
+
+        The index covering the most filters is used. Returns None if no index
+        applies, the records then have to be scanned.
+        """
+        best = None
+        for index, fields in indexes.items():
+            prefix = []
+            for field in fields:
+                if field not in filters:
                     break
+                prefix.append(_index_segment(filters[field]))
+            if prefix and (best is None or len(prefix) > len(best[1])):
+                best = (index, prefix)
+        if best is None:
+            return None
 
+        key = '/'.join([index_path, best[0]] + best[1])
+        try:
+            res = self.client.read(key, recursive=True)
+        except etcd.EtcdKeyNotFound:
+            return []
+        return [leaf.key.rsplit('/', 1)[-1] for leaf in res.leaves
+                if not leaf.dir]
+
+    def _list_resources(self, path, model_type, index_path, indexes,
+                        filters, limit=None, marker=None, sort_key=None,
+                        sort_dir=None):
+        """List the records matching the filters, through an index if any.
+
+        The index entries are only hints: the records they point to are
+        checked against the filters, so stale entries are harmless.
+        """
+        uuids = self._lookup_index(index_path, indexes, filters)
+        if sort_key not in (None, 'id', 'uuid'):
+            if uuids is None:
+                resources = self._scan_resources(path, model_type)
+            else:
+                resources = self._read_resources(path, model_type, uuids)
+            return self._process_list_result(
+                self._filter_resources(resources, filters), limit=limit,
+                marker=marker, sort_key=sort_key, sort_dir=sort_dir)
+
+        # The ids of the etcd records are all the same, so the records are
+        # sorted by uuid, which is the order of their keys. The page can
+        # then be cut out of the keys, and only its records decoded.
+        if uuids is None:
+            candidates = self._read_nodes(path)
+        else:
+            candidates = [(uuid, None) for uuid in sorted(uuids)]
+        reverse = sort_dir == 'desc'
+        if reverse:
+            candidates.reverse()
+        if marker is not None:
+            if reverse:
+                candidates = itertools.dropwhile(
+                    lambda c: c[0] >= marker.uuid, candidates)
+            else:
+                candidates = itertools.dropwhile(
+                    lambda c: c[0] <= marker.uuid, candidates)
+
+        resources = []
+        for uuid, node in candidates:
+            if limit and len(resources) >= limit:
+                break
+            if node is None:
+                try:
+                    node = self._read(path + '/' + uuid)
+                except etcd.EtcdKeyNotFound:
+                    continue
+            resources.extend(self._filter_resources(
+                [translate_etcd_result(node, model_type)], filters))
         return resources
 
-    def _process_list_result(self, res_list, limit=None, sort_key=None):
+    def _read_nodes(self, path):
+        """Return the (uuid, node) of the records under a path, by key."""
+        try:
+            res = self.client.read(path, sorted=True)
+        except etcd.EtcdKeyNotFound:
+            return []
+        except Exception as e:
+            LOG.error(
+                "Error occurred while reading from etcd server: %s",
+                six.text_type(e))
+            raise
+        return [(r.key.rsplit('/', 1)[-1], r) for r in res.children
+                if r.value is not None]
+
+    def _add_indexes(self, index_path, indexes, values, old_values=None):
+        """Write the index keys of a record before the record itself."""
+        keys = _index_keys(index_path, indexes, values)
+        if old_values is not None:
+            keys -= _index_keys(index_path, indexes, old_values)
+        for key in keys:
+            self.client.write(key, '')
+
+    def _remove_indexes(self, index_path, indexes, old_values, values=None):
+        """Delete the stale index keys of a record after the record."""
+        keys = _index_keys(index_path, indexes, old_values)
+        if values is not None:
+            keys -= _index_keys(index_path, indexes, values)
+        for key in keys:
+            try:
+                self.client.delete(key)
+            except etcd.EtcdKeyNotFound:
+                pass
+
+    def rebuild_indexes(self):
+        """Index the records written before the indexes existed.
+
+        The names of the containers are also reserved in their uniqueness
+        scope, so that the existing containers block duplicate names.
+        """
+        for container in self._scan_resources('/containers', 'container'):
+            try:
+                self._reserve_container_name(container.as_dict())
+            except exception.ContainerAlreadyExists as e:
+                LOG.warning('Container %(uuid)s was not given its name: '
+                            '%(error)s', {'uuid': container.uuid,
+                                          'error': six.text_type(e)})
+        for path, model_type, index_path, indexes in (
+                ('/containers', 'container', CONTAINER_INDEX_PATH,
+                 CONTAINER_INDEXES),
+                ('/images', 'image', IMAGE_INDEX_PATH, IMAGE_INDEXES),
+                ('/compute_nodes', 'compute_node', COMPUTE_NODE_INDEX_PATH,
+                 COMPUTE_NODE_INDEXES),
+                ('/resource_providers', 'resource_provider',
+                 RESOURCE_PROVIDER_INDEX_PATH, RESOURCE_PROVIDER_INDEXES)):
+            for resource in self._scan_resources(path, model_type):
+                self._add_indexes(index_path, indexes, resource.as_dict())
+        for placement in self._read_placements():
+            for kind in ('inventories', 'allocations'):
+                for item_key, item in placement[kind].items():
+                    self.client.write(
+                        self._placement_index_key(kind, item_key),
+                        str(item['resource_provider_id']))
+
+    def _process_list_result(self, res_list, limit=None, marker=None,
+                             sort_key=None, sort_dir=None):
         if len(res_list) == 0:
             return []
         sorted_res_list = res_list
@@ -134,7 +389,23 @@ class EtcdAPI(object):
             if not hasattr(res_list[0], sort_key):
                 raise exception.InvalidParameterValue(
                     err='Container has no attribute: %s' % sort_key)
-            sorted_res_list = sorted(res_list, key=lambda k: k.get(sort_key))
+
+            def _sort_value(res):
+                # Break the ties by uuid so that the pages are consistent
+                value = getattr(res, sort_key, None)
+                return value is None, value, getattr(res, 'uuid', None)
+
+            reverse = sort_dir == 'desc'
+            sorted_res_list = sorted(res_list, key=_sort_value,
+                                     reverse=reverse)
+            if marker is not None:
+                marker_value = _sort_value(marker)
+                if reverse:
+                    sorted_res_list = [r for r in sorted_res_list
+                                       if _sort_value(r) < marker_value]
+                else:
+                    sorted_res_list = [r for r in sorted_res_list
+                                       if _sort_value(r) > marker_value]
 
         if limit:
             sorted_res_list = sorted_res_list[0:limit]
@@ -143,73 +414,156 @@ class EtcdAPI(object):
 
     def list_containers(self, context, filters=None, limit=None,
                         marker=None, sort_key=None, sort_dir=None):
-        try:
-            res = getattr(self.client.read('/containers'), 'children', None)
-        except etcd.EtcdKeyNotFound:
-            # Before the first container been created, path '/containers'
-            # does not exist.
-            return []
-        except Exception as e:
-            LOG.error(
-                "Error occurred while reading from etcd server: %s",
-                six.text_type(e))
-            raise
-
-        containers = []
-        for c in res:
-            if c.value is not None:
-                containers.append(translate_etcd_result(c, 'container'))
         filters = self._add_tenant_filters(context, filters)
-        filtered_containers = self._filter_resources(
-            containers, filters)
-        return self._process_list_result(filtered_containers,
-                                         limit=limit, sort_key=sort_key)
-
-    def _validate_unique_container_name(self, context, name):
-        if not CONF.compute.unique_container_name_scope:
-            return
-        lowername = name.lower()
-        filters = {'name': name}
-        if CONF.compute.unique_container_name_scope == 'project':
-            filters['project_id'] = context.project_id
-        elif CONF.compute.unique_container_name_scope == 'global':
-            pass
+        return self._list_resources(
+            '/containers', 'container', CONTAINER_INDEX_PATH,
+            CONTAINER_INDEXES, filters, limit=limit, marker=marker,
+            sort_key=sort_key, sort_dir=sort_dir)
+
+    def _unique_name_key(self, values):
+        """Return the key reserving the name of a container, if any."""
+        scope = CONF.compute.unique_container_name_scope
+        if not values.get('name'):
+            return None
+        if scope == 'project':
+            segments = ['project', _index_segment(values.get('project_id'))]
+        elif scope == 'global':
+            segments = ['global']
         else:
+            return None
+        segments.append(_index_segment(values['name'].lower()))
+        return '/'.join([CONTAINER_INDEX_PATH, 'unique_name'] + segments)
+
+    def _reserve_container_name(self, values):
+        """Reserve the name of a container in its uniqueness scope.
+
+        The reservation key holds the uuid of the container owning the name.
+        A reservation whose container no longer exists is taken over, so the
+        container record must be written before its name is reserved.
+        """
+        key = self._unique_name_key(values)
+        if key is None:
+            return
+        while True:
+            try:
+                self.client.write(key, values['uuid'], prevExist=False)
+                return
+            except etcd.EtcdAlreadyExist:
+                pass
+
+            try:
+                owner = self.client.read(key)
+                if owner.value == values['uuid']:
+                    return
+                self.client.read('/containers/' + owner.value)
+            except etcd.EtcdKeyNotFound:
+                pass
+            else:
+                raise exception.ContainerAlreadyExists(
+                    field='name', value=values['name'].lower())
+
+            try:
+                self.client.write(key, values['uuid'],
+                                  prevIndex=owner.modifiedIndex)
+                return
+            except (etcd.EtcdCompareFailed, etcd.EtcdKeyNotFound):
+                # Someone else took the name over or released it, retry
+                continue
+
+    def _release_container_name(self, values):
+        key = self._unique_name_key(values)
+        if key is None:
             return
+        try:
+            self.client.delete(key, prevValue=values['uuid'])
+        except (etcd.EtcdCompareFailed, etcd.EtcdKeyNotFound):
+            pass
 
+    def _cas_update(self, path, update_value):
+        """Update the JSON value of a key with compare-and-swap.
+
+        update_value is given the current value and returns the new one. If
+        the key is written by someone else in the meantime, it is called
+        again with the newer value.
+
+        :returns: the old and the new values.
+        """
+        for attempt in range(CAS_RETRIES):
+            target = self.client.read(path)
+            old_value = json.loads(target.value)
+            new_value = update_value(old_value)
+            target.value = json.dumps(new_value)
+            try:
+                self.client.update(target)
+            except etcd.EtcdCompareFailed:
+                LOG.debug('%s was written concurrently, retrying', path)
+                continue
+            finally:
+                self._invalidate(path)
+            return old_value, new_value
+        raise exception.Conflict(_('%s is updated concurrently too often, '
+                                   'try again later.') % path)
+
+    def _cas_delete(self, path, check=None):
+        """Delete a JSON value unless it is written in the meantime.
+
+        check is given the current value, and may raise to prevent the
+        delete. If the key is written by someone else in the meantime, the
+        newer value is checked and deleted instead.
+
+        :returns: the deleted value.
+        """
+        for attempt in range(CAS_RETRIES):
+            target = self.client.read(path)
+            value = json.loads(target.value)
+            if check is not None:
+                check(value)
+            try:
+                # Only delete the version whose indexes are removed after
+                self.client.delete(path, prevIndex=target.modifiedIndex)
+            except etcd.EtcdCompareFailed:
+                LOG.debug('%s was written concurrently, retrying', path)
+                continue
+            finally:
+                self._invalidate(path)
+            return value
+        raise exception.Conflict(_('%s is updated concurrently too often, '
+                                   'try again later.') % path)
+
+    def _next_id(self, name):
+        """Allocate an integer id, unique among the records of a kind."""
+        path = ID_COUNTER_PATH + '/' + name
         try:
-            containers = self.list_containers(context, filters=filters)
-        except etcd.EtcdKeyNotFound:
-            return
-        except Exception as e:
-            LOG.error('Error occurred while retrieving container: %s',
-                      six.text_type(e))
-            raise
-        if len(containers) > 0:
-            raise exception.ContainerAlreadyExists(field='name',
-                                                   value=lowername)
+            self.client.write(path, json.dumps(1), prevExist=False)
+            return 1
+        except etcd.EtcdAlreadyExist:
+            old_value, new_value = self._cas_update(
+                path, lambda value: value + 1)
+            return new_value
 
-    @lockutils.synchronized('etcd_container')
     def create_container(self, context, container_data):
         # ensure defaults are present for new containers
         if not container_data.get('uuid'):
             container_data['uuid'] = uuidutils.generate_uuid()
 
-        if container_data.get('name'):
-            self._validate_unique_container_name(context,
-                                                 container_data['name'])
-
         container = models.Container(container_data)
+        values = container.as_dict()
+        self._add_indexes(CONTAINER_INDEX_PATH, CONTAINER_INDEXES, values)
+        container.save()
+        self._invalidate('/containers/' + container.uuid)
         try:
-            container.save()
+            self._reserve_container_name(values)
         except Exception:
-            raise
-
+            with excutils.save_and_reraise_exception():
+                self.client.delete('/containers/' + container.uuid)
+                self._invalidate('/containers/' + container.uuid)
+                self._remove_indexes(CONTAINER_INDEX_PATH, CONTAINER_INDEXES,
+                                     values)
         return container
 
     def get_container_by_uuid(self, context, container_uuid):
         try:
-            res = self.client.read('/containers/' + container_uuid)
+            res = self._read('/containers/' + container_uuid)
             container = translate_etcd_result(res, 'container')
             filtered_containers = self._filter_resources(
                 [container], self._add_tenant_filters(context, {}))
@@ -245,50 +599,75 @@ class EtcdAPI(object):
 
         return containers[0]
 
-    @lockutils.synchronized('etcd_container')
+    def _check_container_tenant(self, context, value, container_uuid):
+        if not self._filter_resources(
+                [value], self._add_tenant_filters(context, {})):
+            raise exception.ContainerNotFound(container=container_uuid)
+
     def destroy_container(self, context, container_uuid):
-        container = self.get_container_by_uuid(context, container_uuid)
-        self.client.delete('/containers/' + container.uuid)
+        try:
+            value = self._cas_delete(
+                '/containers/' + container_uuid,
+                lambda value: self._check_container_tenant(
+                    context, value, container_uuid))
+        except etcd.EtcdKeyNotFound:
+            raise exception.ContainerNotFound(container=container_uuid)
+
+        self._remove_indexes(CONTAINER_INDEX_PATH, CONTAINER_INDEXES, value)
+        self._release_container_name(value)
 
-    @lockutils.synchronized('etcd_container')
     def update_container(self, context, container_uuid, values):
-        # NOTE(yuywz): Update would fail if any other client
-        # write '/containers/$CONTAINER_UUID' in the meanwhile
         if 'uuid' in values:
             msg = _("Cannot overwrite UUID for an existing Container.")
             raise exception.InvalidParameterValue(err=msg)
 
-        if 'name' in values:
-            self._validate_unique_container_name(context, values['name'])
+        reserved = []
+
+        def _update(old_value):
+            self._check_container_tenant(context, old_value, container_uuid)
+            new_value = dict(old_value, **values)
+            self._add_indexes(CONTAINER_INDEX_PATH, CONTAINER_INDEXES,
+                              new_value, old_value)
+            if (self._unique_name_key(new_value) !=
+                    self._unique_name_key(old_value)):
+                self._reserve_container_name(new_value)
+                reserved.append(new_value)
+            return new_value
 
         try:
-            target_uuid = self.get_container_by_uuid(
-                context, container_uuid).uuid
-            target = self.client.read('/containers/' + target_uuid)
-            target_value = json.loads(target.value)
-            target_value.update(values)
-            target.value = json.dumps(target_value)
-            self.client.update(target)
+            old_value, new_value = self._cas_update(
+                '/containers/' + container_uuid, _update)
         except etcd.EtcdKeyNotFound:
             raise exception.ContainerNotFound(container=container_uuid)
         except Exception as e:
-            LOG.error('Error occurred while updating container: %s',
-                      six.text_type(e))
-            raise
-
-        return translate_etcd_result(target, 'container')
+            with excutils.save_and_reraise_exception():
+                LOG.error('Error occurred while updating container: %s',
+                          six.text_type(e))
+                for value in reserved:
+                    self._release_container_name(value)
+
+        self._remove_indexes(CONTAINER_INDEX_PATH, CONTAINER_INDEXES,
+                             old_value, new_value)
+        if reserved:
+            self._release_container_name(old_value)
+        return models.Container(new_value)
+
+    def update_containers(self, context, values_by_uuid):
+        for container_uuid, values in values_by_uuid.items():
+            self.update_container(context, container_uuid, values)
 
-    @lockutils.synchronized('etcd_zunservice')
     def create_zun_service(self, values):
         values['created_at'] = timeutils.isotime()
         zun_service = models.ZunService(values)
         zun_service.save()
+        self._invalidate(zun_service.etcd_path(
+            zun_service.host + '_' + zun_service.binary))
         return zun_service
 
     def list_zun_services(self, filters=None, limit=None,
                           marker=None, sort_key=None, sort_dir=None):
         try:
-            res = getattr(self.client.read('/zun_services'), 'children', None)
+            res = getattr(self._read('/zun_services'), 'children', None)
         except etcd.EtcdKeyNotFound:
             LOG.error(
                 ("Path '/zun_services' does not exist, seems etcd server "
@@ -307,7 +686,8 @@ class EtcdAPI(object):
         if filters:
             services = self._filter_resources(services, filters)
         return self._process_list_result(
-            services, limit=limit, sort_key=sort_key)
+            services, limit=limit, marker=marker, sort_key=sort_key,
+            sort_dir=sort_dir)
 
     def list_zun_services_by_binary(self, binary):
         services = self.list_zun_services(filters={'binary': binary})
@@ -316,7 +696,7 @@ class EtcdAPI(object):
     def get_zun_service(self, host, binary):
         try:
             service = None
-            res = self.client.read('/zun_services/' + host + '_' + binary)
+            res = self._read('/zun_services/' + host + '_' + binary)
             service = translate_etcd_result(res, 'zun_service')
         except etcd.EtcdKeyNotFound:
             raise exception.ZunServiceNotFound(host=host, binary=binary)
@@ -327,10 +707,10 @@ class EtcdAPI(object):
         finally:
             return service
 
-    @lockutils.synchronized('etcd_zunservice')
     def destroy_zun_service(self, host, binary):
         try:
             self.client.delete('/zun_services/' + host + '_' + binary)
+            self._invalidate('/zun_services/' + host + '_' + binary)
         except etcd.EtcdKeyNotFound:
             raise exception.ZunServiceNotFound(host=host, binary=binary)
         except Exception as e:
@@ -338,15 +718,11 @@ class EtcdAPI(object):
                       six.text_type(e))
             raise
 
-    @lockutils.synchronized('etcd_zunservice')
     def update_zun_service(self, host, binary, values):
+        values['updated_at'] = timeutils.isotime()
         try:
-            target = self.client.read('/zun_services/' + host + '_' + binary)
-            target_value = json.loads(target.value)
-            values['updated_at'] = timeutils.isotime()
-            target_value.update(values)
-            target.value = json.dumps(target_value)
-            self.client.update(target)
+            self._cas_update('/zun_services/' + host + '_' + binary,
+                             lambda value: dict(value, **values))
         except etcd.EtcdKeyNotFound:
             raise exception.ZunServiceNotFound(host=host, binary=binary)
         except Exception as e:
@@ -366,21 +742,26 @@ class EtcdAPI(object):
             raise exception.ImageAlreadyExists(repo=repo, tag=tag)
 
         image = models.Image(values)
+        self._add_indexes(IMAGE_INDEX_PATH, IMAGE_INDEXES, image.as_dict())
         image.save()
         return image
 
-    @lockutils.synchronized('etcd_image')
     def update_image(self, image_uuid, values):
         if 'uuid' in values:
             msg = _('Cannot overwrite UUID for an existing image.')
             raise exception.InvalidParameterValue(err=msg)
 
+        def _update(old_value):
+            new_value = dict(old_value, **values)
+            self._add_indexes(IMAGE_INDEX_PATH, IMAGE_INDEXES, new_value,
+                              old_value)
+            return new_value
+
         try:
-            target = self.client.read('/images/' + image_uuid)
-            target_value = json.loads(target.value)
-            target_value.update(values)
-            target.value = json.dumps(target_value)
-            self.client.update(target)
+            old_value, new_value = self._cas_update('/images/' + image_uuid,
+                                                    _update)
+            self._remove_indexes(IMAGE_INDEX_PATH, IMAGE_INDEXES, old_value,
+                                 new_value)
         except etcd.EtcdKeyNotFound:
             raise exception.ImageNotFound(image=image_uuid)
         except Exception as e:
@@ -388,31 +769,14 @@ class EtcdAPI(object):
                       six.text_type(e))
             raise
 
-        return translate_etcd_result(target, 'image')
+        return models.Image(new_value)
 
     def list_images(self, context, filters=None, limit=None, marker=None,
                     sort_key=None, sort_dir=None):
-        try:
-            res = getattr(self.client.read('/images'), 'children', None)
-        except etcd.EtcdKeyNotFound:
-            # Before the first image been pulled, path '/image' does
-            # not exist.
-            return []
-        except Exception as e:
-            LOG.error(
-                "Error occurred while reading from etcd server: %s",
-                six.text_type(e))
-            raise
-
-        images = []
-        for i in res:
-            if i.value is not None:
-                images.append(translate_etcd_result(i, 'image'))
         filters = self._add_tenant_filters(context, filters)
-        filtered_images = self._filter_resources(images, filters)
-
-        return self._process_list_result(filtered_images,
-                                         limit=limit, sort_key=sort_key)
+        return self._list_resources(
+            '/images', 'image', IMAGE_INDEX_PATH, IMAGE_INDEXES, filters,
+            limit=limit, marker=marker, sort_key=sort_key, sort_dir=sort_dir)
 
     def get_image_by_uuid(self, context, image_uuid):
         try:
@@ -462,9 +826,9 @@ class EtcdAPI(object):
                 resource_classes, filters)
 
         return self._process_list_result(
-            resource_classes, limit=limit, sort_key=sort_key)
+            resource_classes, limit=limit, marker=marker, sort_key=sort_key,
+            sort_dir=sort_dir)
 
-    @lockutils.synchronized('etcd_resource_class')
     def create_resource_class(self, context, values):
         resource_class = models.ResourceClass(values)
         resource_class.save()
@@ -510,22 +874,18 @@ class EtcdAPI(object):
 
         return rcs[0]
 
-    @lockutils.synchronized('etcd_resource_class')
     def destroy_resource_class(self, context, uuid):
         resource_class = self._get_resource_class_by_uuid(context, uuid)
         self.client.delete('/resource_classes/' + resource_class.uuid)
 
-    @lockutils.synchronized('etcd_resource_class')
     def update_resource_class(self, context, uuid, values):
         if 'uuid' in values:
             msg = _("Cannot override UUID for an existing resource class.")
             raise exception.InvalidParameterValue(err=msg)
         try:
-            target = self.client.read('/resource_classes/' + uuid)
-            target_value = json.loads(target.value)
-            target_value.update(values)
-            target.value = json.dumps(target_value)
-            self.client.update(target)
+            old_value, new_value = self._cas_update(
+                '/resource_classes/' + uuid,
+                lambda value: dict(value, **values))
         except etcd.EtcdKeyNotFound:
             raise exception.ResourceClassNotFound(resource_class=uuid)
         except Exception as e:
@@ -533,4 +893,380 @@ class EtcdAPI(object):
                 'Error occurred while updating resource class: %s',
                 six.text_type(e))
             raise
-        return translate_etcd_result(target, 'resource_class')
+        return models.ResourceClass(new_value)
+
+    def list_compute_nodes(self, context, filters=None, limit=None,
+                           marker=None, sort_key=None, sort_dir=None):
+        # Without filters, all the compute nodes are read in one request,
+        # which is what the scheduler does to refresh its host states.
+        return self._list_resources(
+            '/compute_nodes', 'compute_node', COMPUTE_NODE_INDEX_PATH,
+            COMPUTE_NODE_INDEXES, filters or {}, limit=limit, marker=marker,
+            sort_key=sort_key, sort_dir=sort_dir)
+
+    def create_compute_node(self, context, values):
+        # ensure defaults are present for new compute nodes
+        if not values.get('uuid'):
+            values['uuid'] = uuidutils.generate_uuid()
+        values['created_at'] = timeutils.isotime()
+
+        compute_node = models.ComputeNode(values)
+        self._add_indexes(COMPUTE_NODE_INDEX_PATH, COMPUTE_NODE_INDEXES,
+                          compute_node.as_dict())
+        try:
+            compute_node.save()
+        except exception.ResourceExists:
+            raise exception.ComputeNodeAlreadyExists(
+                field='UUID', value=values['uuid'])
+        return compute_node
+
+    def get_compute_node(self, context, node_uuid):
+        try:
+            res = self.client.read('/compute_nodes/' + node_uuid)
+        except etcd.EtcdKeyNotFound:
+            raise exception.ComputeNodeNotFound(compute_node=node_uuid)
+        except Exception as e:
+            LOG.error('Error occurred while retrieving compute node: %s',
+                      six.text_type(e))
+            raise
+        return translate_etcd_result(res, 'compute_node')
+
+    def get_compute_node_by_hostname(self, context, hostname):
+        nodes = self.list_compute_nodes(context,
+                                        filters={'hostname': hostname})
+        if len(nodes) > 1:
+            raise exception.Conflict('Multiple compute nodes exist with same '
+                                     'hostname. Please use the uuid instead.')
+        elif len(nodes) == 0:
+            raise exception.ComputeNodeNotFound(compute_node=hostname)
+
+        return nodes[0]
+
+    def destroy_compute_node(self, context, node_uuid):
+        try:
+            value = self._cas_delete('/compute_nodes/' + node_uuid)
+        except etcd.EtcdKeyNotFound:
+            raise exception.ComputeNodeNotFound(compute_node=node_uuid)
+        self._remove_indexes(COMPUTE_NODE_INDEX_PATH, COMPUTE_NODE_INDEXES,
+                             value)
+
+    def update_compute_node(self, context, node_uuid, values):
+        if 'uuid' in values:
+            msg = _("Cannot overwrite UUID for an existing ComputeNode.")
+            raise exception.InvalidParameterValue(err=msg)
+        values['updated_at'] = timeutils.isotime()
+
+        def _update(old_value):
+            new_value = dict(old_value, **values)
+            self._add_indexes(COMPUTE_NODE_INDEX_PATH, COMPUTE_NODE_INDEXES,
+                              new_value, old_value)
+            return new_value
+
+        try:
+            old_value, new_value = self._cas_update(
+                '/compute_nodes/' + node_uuid, _update)
+        except etcd.EtcdKeyNotFound:
+            raise exception.ComputeNodeNotFound(compute_node=node_uuid)
+        except Exception as e:
+            LOG.error('Error occurred while updating compute node: %s',
+                      six.text_type(e))
+            raise
+
+        self._remove_indexes(COMPUTE_NODE_INDEX_PATH, COMPUTE_NODE_INDEXES,
+                             old_value, new_value)
+        return models.ComputeNode(new_value)
+
+    def list_resource_providers(self, context, filters=None, limit=None,
+                                marker=None, sort_key=None, sort_dir=None):
+        return self._list_resources(
+            '/resource_providers', 'resource_provider',
+            RESOURCE_PROVIDER_INDEX_PATH, RESOURCE_PROVIDER_INDEXES,
+            filters or {}, limit=limit, marker=marker, sort_key=sort_key,
+            sort_dir=sort_dir)
+
+    def create_resource_provider(self, context, values):
+        # ensure defaults are present for new resource providers
+        if not values.get('uuid'):
+            values['uuid'] = uuidutils.generate_uuid()
+        if values.get('id') is None:
+            values['id'] = self._next_id('resource_provider')
+
+        resource_provider = models.ResourceProvider(values)
+        self._add_indexes(RESOURCE_PROVIDER_INDEX_PATH,
+                          RESOURCE_PROVIDER_INDEXES,
+                          resource_provider.as_dict())
+        try:
+            resource_provider.save()
+        except exception.ResourceExists:
+            raise exception.ResourceProviderAlreadyExists(
+                field='UUID', value=values['uuid'])
+        return resource_provider
+
+    def get_resource_provider(self, context, provider_ident):
+        if uuidutils.is_uuid_like(provider_ident):
+            return self._get_resource_provider_by_uuid(context,
+                                                       provider_ident)
+        else:
+            return self._get_resource_provider_by_name(context,
+                                                       provider_ident)
+
+    def _get_resource_provider_by_uuid(self, context, provider_uuid):
+        try:
+            res = self.client.read('/resource_providers/' + provider_uuid)
+        except etcd.EtcdKeyNotFound:
+            raise exception.ResourceProviderNotFound(
+                resource_provider=provider_uuid)
+        except Exception as e:
+            LOG.error('Error occurred while retrieving resource provider: %s',
+                      six.text_type(e))
+            raise
+        return translate_etcd_result(res, 'resource_provider')
+
+    def _get_resource_provider_by_name(self, context, provider_name):
+        providers = self.list_resource_providers(
+            context, filters={'name': provider_name})
+        if len(providers) > 1:
+            raise exception.Conflict('Multiple resource providers exist with '
+                                     'same name. Please use the uuid instead.')
+        elif len(providers) == 0:
+            raise exception.ResourceProviderNotFound(
+                resource_provider=provider_name)
+
+        return providers[0]
+
+    def _get_resource_provider_path(self, context, provider_id):
+        """Return the key of a resource provider, from its id or uuid."""
+        if uuidutils.is_uuid_like(provider_id):
+            return '/resource_providers/' + provider_id
+        elif strutils.is_int_like(provider_id):
+            providers = self.list_resource_providers(
+                context, filters={'id': int(provider_id)})
+            if providers:
+                return '/resource_providers/' + providers[0].uuid
+            raise exception.ResourceProviderNotFound(
+                resource_provider=provider_id)
+        else:
+            raise exception.InvalidIdentity(identity=provider_id)
+
+    def destroy_resource_provider(self, context, provider_id):
+        path = self._get_resource_provider_path(context, provider_id)
+        try:
+            value = self._cas_delete(path)
+        except etcd.EtcdKeyNotFound:
+            raise exception.ResourceProviderNotFound(
+                resource_provider=provider_id)
+        self._remove_indexes(RESOURCE_PROVIDER_INDEX_PATH,
+                             RESOURCE_PROVIDER_INDEXES, value)
+
+    def update_resource_provider(self, context, provider_id, values):
+        if 'uuid' in values:
+            msg = _("Cannot overwrite UUID for an existing ResourceProvider.")
+            raise exception.InvalidParameterValue(err=msg)
+
+        def _update(old_value):
+            new_value = dict(old_value, **values)
+            self._add_indexes(RESOURCE_PROVIDER_INDEX_PATH,
+                              RESOURCE_PROVIDER_INDEXES, new_value, old_value)
+            return new_value
+
+        path = self._get_resource_provider_path(context, provider_id)
+        try:
+            old_value, new_value = self._cas_update(path, _update)
+        except etcd.EtcdKeyNotFound:
+            raise exception.ResourceProviderNotFound(
+                resource_provider=provider_id)
+        except Exception as e:
+            LOG.error('Error occurred while updating resource provider: %s',
+                      six.text_type(e))
+            raise
+
+        self._remove_indexes(RESOURCE_PROVIDER_INDEX_PATH,
+                             RESOURCE_PROVIDER_INDEXES, old_value, new_value)
+        return models.ResourceProvider(new_value)
+
+    def _read_placements(self, provider_id=None):
+        """Read the placement of a resource provider, or of all of them."""
+        if provider_id is None:
+            return [json.loads(node.value)
+                    for uuid, node in self._read_nodes(PLACEMENT_PATH)]
+        try:
+            res = self.client.read(PLACEMENT_PATH + '/' + str(provider_id))
+        except etcd.EtcdKeyNotFound:
+            return []
+        return [json.loads(res.value)]
+
+    def _list_placement_items(self, kind, model, filters, limit, marker,
+                              sort_key, sort_dir):
+        filters = filters or {}
+        items = []
+        for placement in self._read_placements(
+                filters.get('resource_provider_id')):
+            items.extend(model(item) for item in placement[kind].values())
+        return self._process_list_result(
+            self._filter_resources(items, filters), limit=limit,
+            marker=marker, sort_key=sort_key or 'id', sort_dir=sort_dir)
+
+    def _placement_index_key(self, kind, item_id):
+        return '/'.join((PLACEMENT_INDEX_PATH, kind, str(item_id)))
+
+    def _get_placement_item(self, kind, item_id):
+        try:
+            provider_id = self.client.read(
+                self._placement_index_key(kind, item_id)).value
+        except etcd.EtcdKeyNotFound:
+            return None
+        for placement in self._read_placements(provider_id):
+            return placement[kind].get(str(item_id))
+        return None
+
+    def _reserve_placement_id(self, kind, values):
+        """Write the index key of a new item, picking its id if it has none."""
+        provider_id = str(values['resource_provider_id'])
+        while True:
+            item_id = values.get('id')
+            if item_id is None:
+                item_id = int(uuidutils.generate_uuid(dashed=False), 16) >> 65
+            try:
+                self.client.write(self._placement_index_key(kind, item_id),
+                                  provider_id, prevExist=False)
+            except etcd.EtcdAlreadyExist:
+                if values.get('id') is not None:
+                    raise exception.UniqueConstraintViolated(
+                        fields={'id': item_id})
+                continue
+            values['id'] = item_id
+            return
+
+    def _create_placement_item(self, kind, values, unique_fields=()):
+        """Add an inventory or an allocation to its resource provider.
+
+        :returns: the added item.
+        """
+        self._reserve_placement_id(kind, values)
+        item_key = str(values['id'])
+
+        def _add(placement):
+            items = placement[kind]
+            if item_key in items:
+                raise exception.UniqueConstraintViolated(
+                    fields={'id': values['id']})
+            for item in items.values():
+                if unique_fields and all(item[f] == values[f]
+                                         for f in unique_fields):
+                    raise exception.UniqueConstraintViolated(
+                        fields={f: values[f] for f in unique_fields})
+            items = dict(items)
+            items[item_key] = values
+            return dict(placement, **{kind: items})
+
+        path = PLACEMENT_PATH + '/' + str(values['resource_provider_id'])
+        try:
+            try:
+                placement = _add({'inventories': {}, 'allocations': {}})
+                self.client.write(path, json.dumps(placement),
+                                  prevExist=False)
+            except etcd.EtcdAlreadyExist:
+                self._cas_update(path, _add)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                self.client.delete(self._placement_index_key(kind, item_key))
+        return values
+
+    def _update_placement_item(self, kind, item_id, values, not_found):
+        """Update or delete an inventory or an allocation.
+
+        The item is deleted if values is None.
+
+        :returns: the updated item.
+        """
+        if values is not None and ('id' in values or
+                                   'resource_provider_id' in values):
+            msg = _("Cannot move an inventory or an allocation to another "
+                    "id or resource provider.")
+            raise exception.InvalidParameterValue(err=msg)
+
+        item = self._get_placement_item(kind, item_id)
+        if item is None:
+            raise not_found
+        item_key = str(item_id)
+
+        def _update(placement):
+            items = dict(placement[kind])
+            if item_key not in items:
+                # It was deleted in the meantime
+                raise not_found
+            if values is None:
+                del items[item_key]
+            else:
+                items[item_key] = dict(items[item_key], **values)
+            return dict(placement, **{kind: items})
+
+        path = PLACEMENT_PATH + '/' + str(item['resource_provider_id'])
+        try:
+            old_placement, new_placement = self._cas_update(path, _update)
+        except etcd.EtcdKeyNotFound:
+            raise not_found
+        if values is None:
+            try:
+                self.client.delete(self._placement_index_key(kind, item_key))
+            except etcd.EtcdKeyNotFound:
+                pass
+        return new_placement[kind].get(item_key)
+
+    def list_inventories(self, context, filters=None, limit=None,
+                         marker=None, sort_key=None, sort_dir=None):
+        return self._list_placement_items(
+            'inventories', models.Inventory, filters, limit, marker,
+            sort_key, sort_dir)
+
+    def create_inventory(self, context, provider_id, values):
+        values['resource_provider_id'] = provider_id
+        inventory = self._create_placement_item(
+            'inventories', models.Inventory(values).as_dict(),
+            unique_fields=('resource_provider_id', 'resource_class_id'))
+        return models.Inventory(inventory)
+
+    def get_inventory(self, context, inventory_id):
+        inventory = self._get_placement_item('inventories', inventory_id)
+        if inventory is None:
+            raise exception.InventoryNotFound(inventory=inventory_id)
+        return models.Inventory(inventory)
+
+    def destroy_inventory(self, context, inventory_id):
+        self._update_placement_item(
+            'inventories', inventory_id, None,
+            exception.InventoryNotFound(inventory=inventory_id))
+
+    def update_inventory(self, context, inventory_id, values):
+        inventory = self._update_placement_item(
+            'inventories', inventory_id, values,
+            exception.InventoryNotFound(inventory=inventory_id))
+        return models.Inventory(inventory)
+
+    def list_allocations(self, context, filters=None, limit=None,
+                         marker=None, sort_key=None, sort_dir=None):
+        return self._list_placement_items(
+            'allocations', models.Allocation, filters, limit, marker,
+            sort_key, sort_dir)
+
+    def create_allocation(self, context, values):
+        allocation = self._create_placement_item(
+            'allocations', models.Allocation(values).as_dict())
+        return models.Allocation(allocation)
+
+    def get_allocation(self, context, allocation_id):
+        allocation = self._get_placement_item('allocations', allocation_id)
+        if allocation is None:
+            raise exception.AllocationNotFound(allocation=allocation_id)
+        return models.Allocation(allocation)
+
+    def destroy_allocation(self, context, allocation_id):
+        self._update_placement_item(
+            'allocations', allocation_id, None,
+            exception.AllocationNotFound(allocation=allocation_id))
+
+    def update_allocation(self, context, allocation_id, values):
+        allocation = self._update_placement_item(
+            'allocations', allocation_id, values,
+            exception.AllocationNotFound(allocation=allocation_id))
+        return models.Allocation(allocation)
@@ -0,0 +1,136 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""A read-through cache of etcd keys kept coherent by etcd watches."""
+
+import collections
+import time
+
+import etcd
+from oslo_log import log
+import six
+
+from zun.common import utils
+
+LOG = log.getLogger(__name__)
+
+# Seconds to wait before watching a path again after the watch failed
+WATCH_RETRY_INTERVAL = 5
+
+
+class EtcdCache(object):
+    """A bounded cache of the reads of the keys under some etcd paths.
+
+    A recursive watch on each path drops the cached keys written by any
+    etcd client, along with their cached parent directories. The keys
+    written by this process are also dropped as soon as they are written,
+    so that they are read back at once. A read which raced with a write is
+    only cached if the watch of its path did not process an event newer
+    than the read. A path is not cached until its watch is established, and
+    it is emptied whenever its watch fails or falls behind the event history
+    of etcd. The least recently used keys are evicted once there are more
+    than ``size`` of them.
+    """
+
+    def __init__(self, client, paths, size):
+        self.client = client
+        self.paths = tuple(paths)
+        self.size = size
+        self._entries = collections.OrderedDict()
+        # The etcd index up to which the events of each path were
+        # processed, None while the path is not watched.
+        self._indexes = dict.fromkeys(self.paths)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_path(self, key):
+        for path in self.paths:
+            if key == path or key.startswith(path + '/'):
+                return path
+        return None
+
+    def read(self, key):
+        """Read a key, from the cache if it is there."""
+        path = self._get_path(key)
+        if path is None or self._indexes[path] is None:
+            return self.client.read(key)
+
+        result = self._entries.pop(key, None)
+        if result is not None:
+            self.hits += 1
+            # The entries are kept in the order they were last used
+            self._entries[key] = result
+            return result
+
+        self.misses += 1
+        result = self.client.read(key)
+        index = self._indexes[path]
+        if index is not None and index <= result.etcd_index:
+            self._entries[key] = result
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def invalidate(self, key):
+        """Drop a key, its parent directories and the keys under it."""
+        prefix = key.rstrip('/') + '/'
+        for cached in list(self._entries):
+            if cached.startswith(prefix) or prefix.startswith(cached + '/'):
+                del self._entries[cached]
+        self._entries.pop(key, None)
+
+    def _reset(self, path):
+        self._indexes[path] = None
+        self.invalidate(path)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'size': len(self._entries)}
+
+    def start(self):
+        for path in self.paths:
+            utils.spawn_n(self._watch, path)
+
+    def _watch(self, path):
+        while True:
+            try:
+                self._sync(path)
+                while True:
+                    self._wait(path)
+            except Exception as e:
+                self._reset(path)
+                if isinstance(e, etcd.EtcdEventIndexCleared):
+                    LOG.info('The watch of %s fell behind, resyncing it',
+                             path)
+                else:
+                    LOG.warning('Failed to watch %(path)s: %(error)s',
+                                {'path': path, 'error': six.text_type(e)})
+                    time.sleep(WATCH_RETRY_INTERVAL)
+
+    def _sync(self, path):
+        """Start caching a path from the current etcd index."""
+        self._reset(path)
+        self._indexes[path] = self.client.read('/').etcd_index
+        LOG.debug('Caching the keys under %(path)s: %(stats)s',
+                  {'path': path, 'stats': self.stats()})
+
+    def _wait(self, path):
+        """Wait for the next event under a path and process it."""
+        try:
+            event = self.client.read(path, recursive=True, wait=True,
+                                     waitIndex=self._indexes[path] + 1)
+        except etcd.EtcdWatchTimedOut:
+            return
+        self.invalidate(event.key)
+        self._indexes[path] = event.modifiedIndex
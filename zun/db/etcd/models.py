@@ -45,14 +45,6 @@ class Base(object):
 
         return d
 
-    def path_already_exist(self, client, path):
-        try:
-            client.read(path)
-        except etcd.EtcdKeyNotFound:
-            return False
-
-        return True
-
     def update(self, values):
         """Make the model object behave like a dict."""
         for k, v in values.items():
@@ -64,12 +56,11 @@ class Base(object):
         client = session.client
         path = self.etcd_path(self.uuid)
 
-        if self.path_already_exist(client, path):
+        try:
+            client.write(path, json.dumps(self.as_dict()), prevExist=False)
+        except etcd.EtcdAlreadyExist:
             raise exception.ResourceExists(name=getattr(self, '__class__'))
 
-        client.write(path, json.dumps(self.as_dict()))
-        return
-
 
 class ZunService(Base):
     """Represents health status of various zun services"""
@@ -102,13 +93,12 @@ class ZunService(Base):
         client = session.client
         path = self.etcd_path(self.host + '_' + self.binary)
 
-        if self.path_already_exist(client, path):
+        try:
+            client.write(path, json.dumps(self.as_dict()), prevExist=False)
+        except etcd.EtcdAlreadyExist:
             raise exception.ZunServiceAlreadyExists(host=self.host,
                                                     binary=self.binary)
 
-        client.write(path, json.dumps(self.as_dict()))
-        return
-
 
 class Container(Base):
     """Represents a container."""
@@ -177,3 +167,105 @@ class ResourceClass(Base):
     @classmethod
     def fields(cls):
         return cls._fields
+
+
+class ComputeNode(Base):
+    """Represents a compute node."""
+
+    _path = '/compute_nodes'
+
+    _fields = objects.ComputeNode.fields.keys()
+
+    def __init__(self, compute_node_data):
+        self.path = ComputeNode.path()
+        for f in ComputeNode.fields():
+            setattr(self, f, None)
+        self.update(compute_node_data)
+
+    @classmethod
+    def path(cls):
+        return cls._path
+
+    @classmethod
+    def fields(cls):
+        return cls._fields
+
+
+class ResourceProvider(Base):
+    """Represents a resource provider."""
+
+    _path = '/resource_providers'
+
+    _fields = objects.ResourceProvider.fields.keys()
+
+    def __init__(self, resource_provider_data):
+        self.path = ResourceProvider.path()
+        for f in ResourceProvider.fields():
+            setattr(self, f, None)
+        self.can_host = 0
+        self.update(resource_provider_data)
+
+    @classmethod
+    def path(cls):
+        return cls._path
+
+    @classmethod
+    def fields(cls):
+        return cls._fields
+
+
+class Inventory(Base):
+    """Represents an inventory of a resource provider.
+
+    The inventories of a resource provider are stored along with its
+    allocations, in the placement key of the provider.
+    """
+
+    _path = '/placement'
+
+    _fields = ['id', 'resource_provider_id', 'resource_class_id', 'total',
+               'reserved', 'min_unit', 'max_unit', 'step_size',
+               'allocation_ratio', 'is_nested', 'blob', 'created_at',
+               'updated_at']
+
+    def __init__(self, inventory_data):
+        self.path = Inventory.path()
+        for f in Inventory.fields():
+            setattr(self, f, None)
+        self.update(inventory_data)
+
+    @classmethod
+    def path(cls):
+        return cls._path
+
+    @classmethod
+    def fields(cls):
+        return cls._fields
+
+
+class Allocation(Base):
+    """Represents an allocation of the resources of a resource provider.
+
+    The allocations of a resource provider are stored along with its
+    inventories, in the placement key of the provider.
+    """
+
+    _path = '/placement'
+
+    _fields = ['id', 'resource_provider_id', 'resource_class_id',
+               'consumer_id', 'used', 'is_nested', 'blob', 'created_at',
+               'updated_at']
+
+    def __init__(self, allocation_data):
+        self.path = Allocation.path()
+        for f in Allocation.fields():
+            setattr(self, f, None)
+        self.update(allocation_data)
+
+    @classmethod
+    def path(cls):
+        return cls._path
+
+    @classmethod
+    def fields(cls):
+        return cls._fields
@@ -0,0 +1,37 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Add container uuids to compute node
+
+Revision ID: 3f49fa2cd7e8
+Revises: a019998b09b5
+Create Date: 2017-06-02 09:41:23.518420
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '3f49fa2cd7e8'
+down_revision = 'a019998b09b5'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+import zun
+
+
+def upgrade():
+    op.add_column('compute_node',
+                  sa.Column('container_uuids',
+                            zun.db.sqlalchemy.models.JSONEncodedList(),
+                            nullable=True))
@@ -0,0 +1,32 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add index on container host
+
+Revision ID: a019998b09b5
+Revises: 5359d23b2322
+Create Date: 2017-05-20 10:12:47.218331
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'a019998b09b5'
+down_revision = '5359d23b2322'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+
+
+def upgrade():
+    op.create_index('container_host_idx', 'container', ['host'],
+                    unique=False)
@@ -237,6 +237,28 @@ class Connection(object):
             ref.update(values)
         return ref
 
+    def update_containers(self, context, values_by_uuid):
+        # Containers receiving identical updates are changed by a single
+        # UPDATE statement, and all statements run in one transaction.
+        groups = []
+        for container_uuid, values in values_by_uuid.items():
+            if 'uuid' in values or 'name' in values:
+                msg = _("Cannot batch update UUID or name of Containers.")
+                raise exception.InvalidParameterValue(err=msg)
+            for group_values, uuids in groups:
+                if group_values == values:
+                    uuids.append(container_uuid)
+                    break
+            else:
+                groups.append((values, [container_uuid]))
+
+        session = get_session()
+        with session.begin():
+            for values, uuids in groups:
+                query = model_query(models.Container, session=session)
+                query = query.filter(models.Container.uuid.in_(uuids))
+                query.update(values, synchronize_session=False)
+
     def destroy_zun_service(self, host, binary):
         session = get_session()
         with session.begin():
@@ -124,6 +124,7 @@ class Container(Base):
     __tablename__ = 'container'
     __table_args__ = (
         schema.UniqueConstraint('uuid', name='uniq_container0uuid'),
+        Index('container_host_idx', 'host'),
         table_args()
     )
     id = Column(Integer, primary_key=True)
@@ -286,3 +287,4 @@ class ComputeNode(Base):
     os = Column(String(64), nullable=True)
     kernel_version = Column(String(128), nullable=True)
     labels = Column(JSONEncodedDict)
+    container_uuids = Column(JSONEncodedList, nullable=True)
@@ -15,7 +15,9 @@
 import six
 import sys
 
+from eventlet import event
 from oslo_log import log as logging
+from oslo_utils import timeutils
 import stevedore
 
 from zun.common import exception
@@ -26,6 +28,8 @@ import zun.conf
 CONF = zun.conf.CONF
 LOG = logging.getLogger(__name__)
 
+_image_drivers = {}
+
 
 def load_image_driver(image_driver=None):
     """Load an image driver module.
@@ -58,8 +62,97 @@ def load_image_driver(image_driver=None):
         sys.exit(1)
 
 
+def get_image_driver(image_driver):
+    """Return the image driver singleton of the given name.
+
+    The driver is loaded on first use and reused by later calls.
+    """
+    driver = _image_drivers.get(image_driver)
+    if driver is None:
+        driver = load_image_driver(image_driver)
+        _image_drivers[image_driver] = driver
+    return driver
+
+
+def reload_image_drivers():
+    """Drop the loaded image drivers so that they are loaded again."""
+    _image_drivers.clear()
+
+
+class ImagePullCoordinator(object):
+    """Coalesce concurrent pulls of the same image on this host.
+
+    The first green thread pulling an image does the actual pull, the
+    others wait for it and share its result or its error. Pulls are keyed by
+    project as well, so that an image is never shared with a project which
+    couldn't pull it by itself.
+    """
+
+    def __init__(self):
+        self._pulls = {}
+        # Statistics about the image pulls of this host
+        self.pull_count = 0
+        self.pull_time = 0.0
+        self.coalesced_count = 0
+
+    def queue_depth(self, key=None):
+        """Return the number of green threads waiting for in-flight pulls."""
+        if key is not None:
+            return self._pulls[key]['waiters'] if key in self._pulls else 0
+        return sum(pull['waiters'] for pull in self._pulls.values())
+
+    def pull(self, key, func, *args, **kwargs):
+        pull = self._pulls.get(key)
+        if pull is not None:
+            pull['waiters'] += 1
+            self.coalesced_count += 1
+            LOG.debug('Waiting for the in-flight pull of image %s', key)
+            image, image_loaded = pull['event'].wait()
+            return dict(image), image_loaded
+
+        pull = {'event': event.Event(), 'waiters': 0}
+        self._pulls[key] = pull
+        watch = timeutils.StopWatch()
+        watch.start()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            pull['event'].send_exception(e)
+            raise
+        else:
+            pull['event'].send(result)
+            return result
+        finally:
+            del self._pulls[key]
+            elapsed = watch.elapsed()
+            self.pull_count += 1
+            self.pull_time += elapsed
+            LOG.debug('Pulled image %(key)s in %(elapsed).3f seconds for '
+                      '%(count)s requests', {'key': key, 'elapsed': elapsed,
+                                             'count': pull['waiters'] + 1})
+
+
+PULL_COORDINATOR = ImagePullCoordinator()
+
+
 def pull_image(context, repo, tag, image_pull_policy='always',
-               image_driver=None):
+               image_driver=None, load_image=None):
+    """Pull an image, coalesced with the concurrent pulls of this host.
+
+    :param load_image: a function loading an image file into the container
+                       engine. If given, a pulled image file is loaded once
+                       for all the coalesced pulls, and the image is always
+                       returned as loaded.
+    :returns: a tuple of the image and of whether it is loaded.
+    """
+    key = (image_driver, repo, tag, image_pull_policy, context.project_id,
+           load_image is not None)
+    return PULL_COORDINATOR.pull(key, _pull_image, context, repo, tag,
+                                 image_pull_policy, image_driver, load_image)
+
+
+def _pull_image(context, repo, tag, image_pull_policy, image_driver,
+                load_image=None):
     if image_driver:
         image_driver_list = [image_driver.lower()]
     else:
@@ -67,7 +160,7 @@ def pull_image(context, repo, tag, image_pull_policy='always',
 
     for driver in image_driver_list:
         try:
-            image_driver = load_image_driver(driver)
+            image_driver = get_image_driver(driver)
             image, image_loaded = image_driver.pull_image(
                 context, repo, tag, image_pull_policy)
             if image:
@@ -81,6 +174,9 @@ def pull_image(context, repo, tag, image_pull_policy='always',
             raise exception.ZunException(six.text_type(e))
     if not image:
         raise exception.ImageNotFound("Image %s not found" % repo)
+    if not image_loaded and load_image is not None:
+        load_image(image['path'])
+        image_loaded = True
     return image, image_loaded
 
 
@@ -93,7 +189,7 @@ def search_image(context, image_name, image_driver, exact_match):
         image_driver_list = CONF.image_driver_list
     for driver in image_driver_list:
         try:
-            image_driver = load_image_driver(driver)
+            image_driver = get_image_driver(driver)
             imgs = image_driver.search_image(context, repo, tag,
                                              exact_match=exact_match)
             images.extend(imgs)
@@ -12,16 +12,19 @@
 # limitations under the License.
 
 import hashlib
+import json
 import os
 import six
 
 from oslo_log import log as logging
 from oslo_utils import fileutils
+from oslo_utils import timeutils
 
 from zun.common import exception
 from zun.common.i18n import _
 from zun.common import utils as common_utils
 import zun.conf
+from zun.container.docker import utils as docker_utils
 from zun.image import driver
 from zun.image.glance import utils
 
@@ -55,24 +58,72 @@ class GlanceDriver(driver.ContainerImageDriver):
             else:
                 return None
 
+    def _get_checksum_index_path(self, image_path):
+        return image_path + '.checksum'
+
+    def _stat_image(self, image_path):
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime, stat.st_ino]
+
+    def _read_checksum_index(self, image_path):
+        try:
+            with open(self._get_checksum_index_path(image_path)) as fd:
+                return json.load(fd)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _write_checksum_index(self, image_path, stat, checksum):
+        """Record the checksum of an image tarball next to it.
+
+        The checksum is only trusted as long as the size, mtime and inode of
+        the tarball are unchanged.
+        """
+        if stat is None:
+            return
+        index_path = self._get_checksum_index_path(image_path)
+        tmp_path = index_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as fd:
+                json.dump({'stat': stat, 'checksum': checksum}, fd)
+            os.rename(tmp_path, index_path)
+        except (IOError, OSError) as e:
+            LOG.warning('Failed to write checksum index of image %s: %s',
+                        image_path, six.text_type(e))
+
+    def _compute_checksum(self, image_path):
+        md5sum = hashlib.md5()
+        with open(image_path, 'rb') as fd:
+            while True:
+                # read 10MB of data each time
+                data = fd.read(10 * 1024 * 1024)
+                if not data:
+                    break
+                md5sum.update(data)
+        return md5sum.hexdigest()
+
+    def _verify_checksum(self, image_path, checksum):
+        stat = self._stat_image(image_path)
+        if stat is not None:
+            index = self._read_checksum_index(image_path)
+            if index and index.get('stat') == stat:
+                LOG.debug('Using the indexed checksum of image %s',
+                          image_path)
+                return index.get('checksum') == checksum
+
+        md5sum = self._compute_checksum(image_path)
+        self._write_checksum_index(image_path, stat, md5sum)
+        return md5sum == checksum
+
     def pull_image(self, context, repo, tag, image_pull_policy):
         # TODO(shubhams): glance driver does not handle tags
         #              once metadata is stored in db then handle tags
         image_loaded = False
         image = self._search_image_on_host(context, repo)
         if image:
-            image_path = image['path']
-            image_checksum = image['checksum']
-            md5sum = hashlib.md5()
-            with open(image_path, 'rb') as fd:
-                while True:
-                    # read 10MB of data each time
-                    data = fd.read(10 * 1024 * 1024)
-                    if not data:
-                        break
-                    md5sum.update(data)
-            md5sum = md5sum.hexdigest()
-            if md5sum == image_checksum:
+            if self._verify_checksum(image['path'], image['checksum']):
                 image_loaded = True
                 return image, image_loaded
 
@@ -99,20 +150,74 @@ class GlanceDriver(driver.ContainerImageDriver):
         except Exception as e:
             msg = _('Cannot download image from glance: {0}')
             raise exception.ZunException(msg.format(e))
+        images_directory = CONF.glance.images_directory
+        out_path = os.path.join(images_directory, image_meta.id + '.tar')
+        if CONF.glance.image_load_mode == 'stream':
+            return self._stream_image(repo, image_chunks, out_path)
         try:
-            images_directory = CONF.glance.images_directory
             fileutils.ensure_tree(images_directory)
-            out_path = os.path.join(images_directory, image_meta.id + '.tar')
+            md5sum = hashlib.md5()
             with open(out_path, 'wb') as fd:
                 for chunk in image_chunks:
                     fd.write(chunk)
+                    md5sum.update(chunk)
         except Exception as e:
             msg = _('Error occurred while writing image: {0}')
             raise exception.ZunException(msg.format(e))
+        self._write_checksum_index(out_path, self._stat_image(out_path),
+                                   md5sum.hexdigest())
         LOG.debug('Image %s was downloaded to path : %s'
                   % (repo, out_path))
         return {'image': repo, 'path': out_path}, image_loaded
 
+    def _stream_image(self, repo, image_chunks, out_path):
+        """Load the image data from glance into docker as it arrives.
+
+        If [glance]cache_streamed_images is set, the data is written into
+        the images directory on the way, so that later pulls find it there.
+        """
+        tee_path = out_path if CONF.glance.cache_streamed_images else None
+        md5sum = hashlib.md5()
+        copied = {'bytes': 0}
+        watch = timeutils.StopWatch()
+        watch.start()
+        LOG.debug('Streaming image %s from glance into docker' % repo)
+        try:
+            fd = None
+            if tee_path:
+                fileutils.ensure_tree(os.path.dirname(tee_path))
+                fd = open(tee_path, 'wb')
+
+            def _image_data():
+                for chunk in image_chunks:
+                    copied['bytes'] += len(chunk)
+                    if fd:
+                        fd.write(chunk)
+                        md5sum.update(chunk)
+                    yield chunk
+
+            try:
+                # The load lasts as long as the download, so don't hold a
+                # client of the shared pool for it.
+                with docker_utils.docker_client(pooled=False) as docker:
+                    docker.load_image(_image_data())
+            finally:
+                if fd:
+                    fd.close()
+        except Exception as e:
+            if tee_path:
+                fileutils.delete_if_exists(tee_path)
+            msg = _('Error occurred while streaming image into docker: {0}')
+            raise exception.ZunException(msg.format(e))
+        LOG.debug('Image %(repo)s was streamed into docker: %(bytes)s bytes '
+                  'in %(elapsed).3f seconds',
+                  {'repo': repo, 'bytes': copied['bytes'],
+                   'elapsed': watch.elapsed()})
+        if tee_path:
+            self._write_checksum_index(tee_path, self._stat_image(tee_path),
+                                       md5sum.hexdigest())
+        return {'image': repo, 'path': tee_path}, True
+
     def search_image(self, context, repo, tag, exact_match):
         # TODO(mkrai): glance driver does not handle tags
         #       once metadata is stored in db then handle tags
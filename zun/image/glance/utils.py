@@ -29,7 +29,7 @@ def create_glanceclient(context):
         :param context: context to create client object
         :returns: Glance client object
     """
-    osc = clients.OpenStackClients(context)
+    osc = clients.get_clients(context)
     return osc.glance()
 
 
@@ -29,7 +29,8 @@ class KuryrNetwork(network.Network):
 
     def init(self, context, docker_api):
         self.docker = docker_api
-        self.neutron = clients.OpenStackClients(context).neutron()
+        self.context = context
+        self.neutron = clients.get_clients(context).neutron()
 
     def create_network(self, name, neutron_net_id):
         """Create a docker network with Kuryr driver.
@@ -118,9 +119,12 @@ class KuryrNetwork(network.Network):
         """
         network = self.inspect_network(network_name)
         neutron_net_id = network['Options']['neutron.net.uuid']
-        neutron_port = self.neutron.create_port({'port': {
-            'network_id': neutron_net_id,
-        }})
+        port_dict = {'network_id': neutron_net_id}
+        if self.context.is_admin and self.context.project_id:
+            # An admin context acting for a project, e.g. the one which
+            # refills the sandbox pool, creates the port in that project.
+            port_dict['tenant_id'] = self.context.project_id
+        neutron_port = self.neutron.create_port({'port': port_dict})
 
         ipv4_address = None
         ipv6_address = None
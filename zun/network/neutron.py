@@ -0,0 +1,78 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Bulk lookups of neutron resources."""
+
+import collections
+import datetime
+
+from oslo_utils import timeutils
+
+# Network names rarely change, so they are cached for a short while
+NETWORK_NAME_CACHE_TTL = 60
+# Maximum number of cached network names, the least recently used ones are
+# evicted first
+NETWORK_NAME_CACHE_SIZE = 1024
+
+# The cached names and their expiry, keyed by (project id, network id) so
+# that a name is only served to the project which looked it up
+_network_names = collections.OrderedDict()
+
+
+def get_network_names(neutron, project_id, network_ids):
+    """Return the names of networks, keyed by network id.
+
+    The names which aren't cached for the project are fetched with a single
+    list_networks call. Networks which can't be found are left out of the
+    result.
+    """
+    now = timeutils.utcnow()
+    names = {}
+    missing_ids = []
+    for network_id in set(network_ids):
+        key = (project_id, network_id)
+        entry = _network_names.pop(key, None)
+        if entry is not None and entry[1] > now:
+            names[network_id] = entry[0]
+            # The entries are kept in the order they were last used
+            _network_names[key] = entry
+        else:
+            missing_ids.append(network_id)
+
+    if missing_ids:
+        expires_at = now + datetime.timedelta(seconds=NETWORK_NAME_CACHE_TTL)
+        networks = neutron.list_networks(
+            id=missing_ids, fields=['id', 'name']).get('networks', [])
+        for network in networks:
+            _network_names[(project_id, network['id'])] = (
+                network.get('name'), expires_at)
+            names[network['id']] = network.get('name')
+        while len(_network_names) > NETWORK_NAME_CACHE_SIZE:
+            _network_names.popitem(last=False)
+    return names
+
+
+def get_ports_by_mac(neutron, mac_addresses):
+    """Return the ids of the ports of MAC addresses, keyed by MAC address.
+
+    The ports are fetched with a single list_ports call.
+    """
+    mac_addresses = list(set(mac_addresses))
+    if not mac_addresses:
+        return {}
+    ports = neutron.list_ports(
+        mac_address=mac_addresses,
+        fields=['id', 'mac_address']).get('ports', [])
+    port_ids = {}
+    for port in ports:
+        port_ids.setdefault(port['mac_address'], port['id'])
+    return port_ids
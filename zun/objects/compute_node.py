@@ -25,7 +25,8 @@ class ComputeNode(base.ZunPersistentObject, base.ZunObject):
     # Version 1.3: Add cpus, cpu_used
     # Version 1.4: Add host operating system info
     # Version 1.5: Add host labels info
-    VERSION = '1.5'
+    # Version 1.6: Add container_uuids
+    VERSION = '1.6'
 
     fields = {
         'uuid': fields.UUIDField(read_only=True, nullable=False),
@@ -45,6 +46,7 @@ class ComputeNode(base.ZunPersistentObject, base.ZunObject):
         'os': fields.StringField(nullable=True),
         'kernel_version': fields.StringField(nullable=True),
         'labels': fields.DictOfStringsField(nullable=True),
+        'container_uuids': fields.ListOfStringsField(nullable=True),
     }
 
     @staticmethod
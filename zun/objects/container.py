@@ -36,7 +36,9 @@ class Container(base.ZunPersistentObject, base.ZunObject):
     # Version 1.14: Add method 'list_by_host'
     # Version 1.15: Combine tty and stdin_open
     # Version 1.16: Add websocket_url and token
-    VERSION = '1.16'
+    # Version 1.17: Add method 'save_all'
+    # Version 1.18: Add container_committing and image_uploading task states
+    VERSION = '1.18'
 
     fields = {
         'id': fields.IntegerField(),
@@ -190,6 +192,22 @@ class Container(base.ZunPersistentObject, base.ZunObject):
 
         self.obj_reset_changes()
 
+    @base.remotable_classmethod
+    def save_all(cls, context, containers):
+        """Save updates to a list of Containers in one batch.
+
+        :param context: Security context.
+        :param containers: a list of :class:`Container` object.
+        """
+        updates = {container.uuid: container.obj_get_changes()
+                   for container in containers
+                   if container.obj_what_changed()}
+        if updates:
+            dbapi.update_containers(context, updates)
+
+        for container in containers:
+            container.obj_reset_changes()
+
     @base.remotable
     def refresh(self, context=None):
         """Loads updates for this Container.
@@ -24,9 +24,10 @@ from zun.scheduler import driver
 class ChanceScheduler(driver.Scheduler):
     """Implements Scheduler as a random node selector."""
 
-    def _schedule(self, context):
+    def _schedule(self, context, hosts=None):
         """Picks a host that is up at random."""
-        hosts = self.hosts_up(context)
+        if hosts is None:
+            hosts = self.hosts_up(context)
         if not hosts:
             msg = _("Is the appropriate service running?")
             raise exception.NoValidHost(reason=msg)
@@ -36,8 +37,10 @@ class ChanceScheduler(driver.Scheduler):
     def select_destinations(self, context, containers):
         """Selects random destinations."""
         dests = []
+        # Look up the hosts once for the whole batch of containers
+        hosts = self.hosts_up(context)
         for container in containers:
-            host = self._schedule(context)
+            host = self._schedule(context, hosts)
             host_state = dict(host=host, nodename=None, limits=None)
             dests.append(host_state)
 
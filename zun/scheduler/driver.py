@@ -24,23 +24,15 @@ import abc
 import six
 
 from zun.api import servicegroup
-from zun import objects
 
 
 @six.add_metaclass(abc.ABCMeta)
 class Scheduler(object):
     """The base class that all Scheduler classes should inherit from."""
 
-    def __init__(self):
-        self.servicegroup_api = servicegroup.ServiceGroup()
-
     def hosts_up(self, context):
         """Return the list of hosts that have a running service."""
-
-        services = objects.ZunService.list_by_binary(context, 'zun-compute')
-        return [service.host
-                for service in services
-                if self.servicegroup_api.service_is_up(service)]
+        return servicegroup.get_liveness_cache().get_up_hosts(context)
 
     @abc.abstractmethod
     def select_destinations(self, context, containers):
@@ -1,98 +1,132 @@
-#    Licensed under the Apache License, Version 2.0 (the "License"); you may
-#    not use this file except in compliance with the License. You may obtain
-#    a copy of the License at
-#
-#         http://www.apache.org/licenses/LICENSE-2.0
-#
-#    Unless required by applicable law or agreed to in writing, software
-#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
-#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
-#    License for the specific language governing permissions and limitations
-#    under the License.
-
-"""
-The FilterScheduler is for scheduling container to a host according to
-your filters configured.
-You can customize this scheduler by specifying your own Host Filters.
-"""
-import random
-
-from zun.common import exception
-from zun.common.i18n import _
-import zun.conf
-from zun import objects
-from zun.scheduler import driver
-from zun.scheduler import filters
-
-
-CONF = zun.conf.CONF
-
-
-class FilterScheduler(driver.Scheduler):
-    """Scheduler that can be used for filtering zun compute."""
-
-    def __init__(self, *args, **kwargs):
-        super(FilterScheduler, self).__init__(*args, **kwargs)
-        self.filter_handler = filters.HostFilterHandler()
-        filter_classes = self.filter_handler.get_matching_classes(
-            CONF.scheduler.available_filters)
-        self.filter_cls_map = {cls.__name__: cls for cls in filter_classes}
-        self.filter_obj_map = {}
-        self.enabled_filters = self._choose_host_filters(self._load_filters())
-
-    def _schedule(self, context, container):
-        """Picks a host according to filters."""
-        hosts = self.hosts_up(context)
-        nodes = objects.ComputeNode.list(context)
-        nodes = [node for node in nodes if node.hostname in hosts]
-        nodes = self.filter_handler.get_filtered_objects(self.enabled_filters,
-                                                         nodes,
-                                                         container)
-        if not nodes:
-            msg = _("Is the appropriate service running?")
-            raise exception.NoValidHost(reason=msg)
-
-        return random.choice(nodes)
-
-    def select_destinations(self, context, containers):
-        """Selects destinations by filters."""
-        dests = []
-        for container in containers:
-            node = self._schedule(context, container)
-            host_state = dict(host=node.hostname, nodename=None, limits=None)
-            dests.append(host_state)
-
-        if len(dests) < 1:
-            reason = _('There are not enough hosts available.')
-            raise exception.NoValidHost(reason=reason)
-
-        return dests
-
-    def _choose_host_filters(self, filter_cls_names):
-        """Choose good filters
-
-        Since the caller may specify which filters to use we need
-        to have an authoritative list of what is permissible. This
-        function checks the filter names against a predefined set
-        of acceptable filters.
-        """
-        if not isinstance(filter_cls_names, (list, tuple)):
-            filter_cls_names = [filter_cls_names]
-
-        good_filters = []
-        bad_filters = []
-        for filter_name in filter_cls_names:
-            if filter_name not in self.filter_obj_map:
-                if filter_name not in self.filter_cls_map:
-                    bad_filters.append(filter_name)
-                    continue
-                filter_cls = self.filter_cls_map[filter_name]
-                self.filter_obj_map[filter_name] = filter_cls()
-            good_filters.append(self.filter_obj_map[filter_name])
-        if bad_filters:
-            msg = ", ".join(bad_filters)
-            raise exception.SchedulerHostFilterNotFound(filter_name=msg)
-        return good_filters
-
-    def _load_filters(self):
-        return CONF.scheduler.enabled_filters
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+The FilterScheduler is for scheduling container to a host according to
+your filters configured.
+You can customize this scheduler by specifying your own Host Filters.
+"""
+import random
+
+from oslo_log import log as logging
+
+from zun.common import exception
+from zun.common.i18n import _
+import zun.conf
+from zun.scheduler import driver
+from zun.scheduler import filters
+from zun.scheduler import host_manager
+from zun.scheduler import weights
+
+
+CONF = zun.conf.CONF
+LOG = logging.getLogger(__name__)
+
+
+class FilterScheduler(driver.Scheduler):
+    """Scheduler that can be used for filtering zun compute."""
+
+    def __init__(self, *args, **kwargs):
+        super(FilterScheduler, self).__init__(*args, **kwargs)
+        self.filter_handler = filters.HostFilterHandler()
+        filter_classes = self.filter_handler.get_matching_classes(
+            CONF.scheduler.available_filters)
+        self.filter_cls_map = {cls.__name__: cls for cls in filter_classes}
+        self.filter_obj_map = {}
+        self.enabled_filters = self._choose_host_filters(self._load_filters())
+        self.weight_handler = weights.HostWeightHandler()
+        weigher_classes = self.weight_handler.get_matching_classes(
+            CONF.scheduler.weight_classes)
+        self.weighers = [cls() for cls in weigher_classes]
+        self.host_manager = host_manager.get_host_manager()
+
+    def _schedule(self, context, container):
+        """Picks a host according to filters and weighers."""
+        host_states = self.host_manager.get_host_states(context)
+        return self._select_node(host_states, container)
+
+    def _select_node(self, nodes, container):
+        nodes = self.filter_handler.get_filtered_objects(self.enabled_filters,
+                                                         nodes,
+                                                         container)
+        if not nodes:
+            msg = _("Is the appropriate service running?")
+            raise exception.NoValidHost(reason=msg)
+
+        # Shuffle the nodes so that ties between equally weighed nodes are
+        # broken randomly.
+        random.shuffle(nodes)
+        weighed_nodes = self.weight_handler.get_weighed_objects(
+            self.weighers, nodes, container)
+        LOG.debug("Weighed %(nodes)s", {'nodes': weighed_nodes})
+        return weighed_nodes[0].obj
+
+    def select_destinations(self, context, containers):
+        """Selects destinations by filters.
+
+        All the containers are placed in a single pass over the host states.
+        The resources of each container are claimed before the next one is
+        placed, so that the containers of a batch see each other. If one of
+        the containers can't be placed, the claims of the whole batch are
+        released.
+        """
+        host_states = self.host_manager.get_host_states(context)
+        dests = []
+        claims = []
+        try:
+            for container in containers:
+                node = self._select_node(host_states, container)
+                # Claim the resources right away, so that the next
+                # placements see them before the compute host reports them.
+                claims.append((node, node.consume_from_request(container)))
+                host_state = dict(host=node.hostname, nodename=None,
+                                  limits=None)
+                dests.append(host_state)
+        except exception.NoValidHost:
+            for node, claim in claims:
+                node.release_claim(claim)
+            raise
+
+        if len(dests) < 1:
+            reason = _('There are not enough hosts available.')
+            raise exception.NoValidHost(reason=reason)
+
+        return dests
+
+    def _choose_host_filters(self, filter_cls_names):
+        """Choose good filters
+
+        Since the caller may specify which filters to use we need
+        to have an authoritative list of what is permissible. This
+        function checks the filter names against a predefined set
+        of acceptable filters.
+        """
+        if not isinstance(filter_cls_names, (list, tuple)):
+            filter_cls_names = [filter_cls_names]
+
+        good_filters = []
+        bad_filters = []
+        for filter_name in filter_cls_names:
+            if filter_name not in self.filter_obj_map:
+                if filter_name not in self.filter_cls_map:
+                    bad_filters.append(filter_name)
+                    continue
+                filter_cls = self.filter_cls_map[filter_name]
+                self.filter_obj_map[filter_name] = filter_cls()
+            good_filters.append(self.filter_obj_map[filter_name])
+        if bad_filters:
+            msg = ", ".join(bad_filters)
+            raise exception.SchedulerHostFilterNotFound(filter_name=msg)
+        return good_filters
+
+    def _load_filters(self):
+        return CONF.scheduler.enabled_filters
@@ -0,0 +1,45 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import math
+
+from oslo_log import log as logging
+
+from zun.scheduler import filters
+
+LOG = logging.getLogger(__name__)
+
+
+class NUMAFilter(filters.BaseHostFilter):
+    """Filter the hosts which can fit a container in one NUMA node
+
+    A host passes if one of its NUMA nodes has enough CPUs which are not
+    pinned to hold the CPUs requested by the container. Hosts which don't
+    report a NUMA topology always pass.
+    """
+
+    run_filter_once_per_request = True
+
+    def host_passes(self, host_state, container):
+        if not container.cpu or not host_state.numa_topology:
+            return True
+
+        requested_cpus = int(math.ceil(container.cpu))
+        for numa_node in host_state.numa_topology.nodes:
+            if len(numa_node.free_cpus) >= requested_cpus:
+                return True
+
+        LOG.debug("%(host_state)s does not have a NUMA node with "
+                  "%(requested_cpus)d free cpus",
+                  {'host_state': host_state,
+                   'requested_cpus': requested_cpus})
+        return False
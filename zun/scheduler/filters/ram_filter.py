@@ -0,0 +1,38 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_log import log as logging
+
+from zun.common import utils
+from zun.scheduler import filters
+
+LOG = logging.getLogger(__name__)
+
+
+class RAMFilter(filters.BaseHostFilter):
+    """Filter the containers by memory request"""
+
+    run_filter_once_per_request = True
+
+    def host_passes(self, host_state, container):
+        requested_ram = utils.get_memory_mb(container.memory)
+        if not requested_ram:
+            return True
+
+        if host_state.mem_available < requested_ram:
+            LOG.debug("%(host_state)s does not have %(requested_ram)d MB "
+                      "usable ram, it only has %(usable_ram)d MB usable ram.",
+                      {'host_state': host_state,
+                       'requested_ram': requested_ram,
+                       'usable_ram': host_state.mem_available})
+            return False
+        return True
@@ -0,0 +1,191 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Manage hosts in the current zone.
+"""
+
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+from zun.api import servicegroup
+from zun.common import context as zun_context
+from zun.common import utils
+import zun.conf
+from zun import objects
+
+CONF = zun.conf.CONF
+LOG = logging.getLogger(__name__)
+
+_host_manager = None
+
+
+class HostState(object):
+    """Mutable information about a host, as seen by the scheduler.
+
+    The state is filled in from the ComputeNode record of the host. The
+    containers placed on the host by the scheduler are claimed against the
+    state right away, so that later placements see them before the host
+    reports them. A claim is dropped once the host reports its container, or
+    after [scheduler]host_claim_timeout seconds.
+    """
+
+    def __init__(self, hostname):
+        self.hostname = hostname
+        self.cpus = 0
+        self.cpu_used = 0.0
+        self.mem_total = 0
+        self.mem_free = 0
+        self.mem_available = 0
+        self.total_containers = 0
+        self.running_containers = 0
+        self.numa_topology = None
+        self.labels = None
+        self.updated = None
+        self.claims = []
+
+    def __repr__(self):
+        return ("(%(hostname)s) cpus: %(cpus)s cpu_used: %(cpu_used)s "
+                "mem_available: %(mem_available)sMB containers: "
+                "%(total_containers)s" % self.__dict__)
+
+    def update(self, compute_node):
+        """Update the state from the ComputeNode record of the host."""
+        self._expire_claims()
+        updated = compute_node.updated_at or compute_node.created_at
+        if updated is not None:
+            updated = timeutils.normalize_time(updated)
+            if self.updated is not None and updated <= self.updated:
+                # The record hasn't changed since the last update
+                return
+
+        self.cpus = compute_node.cpus
+        self.cpu_used = compute_node.cpu_used
+        self.mem_total = compute_node.mem_total
+        self.mem_free = compute_node.mem_free
+        self.mem_available = compute_node.mem_available
+        self.total_containers = compute_node.total_containers
+        self.running_containers = compute_node.running_containers
+        self.numa_topology = compute_node.numa_topology
+        self.labels = compute_node.labels
+        self.updated = updated
+
+        # Keep the claims of the containers the host doesn't report yet
+        if self.claims:
+            reported = set(compute_node.container_uuids or [])
+            self.claims = [claim for claim in self.claims
+                           if claim['uuid'] not in reported]
+        for claim in self.claims:
+            self._apply_claim(claim)
+
+    def consume_from_request(self, container):
+        """Claim the resources of a container placed on this host."""
+        claim = {
+            'uuid': container.uuid,
+            'cpu': container.cpu or 0,
+            'memory': utils.get_memory_mb(container.memory),
+            'claimed_at': timeutils.utcnow(),
+        }
+        self.claims.append(claim)
+        self._apply_claim(claim)
+        return claim
+
+    def release_claim(self, claim):
+        """Give back the resources of a claim which was not used."""
+        if claim in self.claims:
+            self.claims.remove(claim)
+            self._apply_claim(claim, sign=-1)
+
+    def _expire_claims(self):
+        for claim in list(self.claims):
+            if timeutils.is_older_than(claim['claimed_at'],
+                                       CONF.scheduler.host_claim_timeout):
+                LOG.debug("The claim of container %(uuid)s on %(host)s "
+                          "expired", {'uuid': claim['uuid'],
+                                      'host': self.hostname})
+                self.release_claim(claim)
+
+    def _apply_claim(self, claim, sign=1):
+        self.cpu_used += sign * claim['cpu']
+        self.mem_free -= sign * claim['memory']
+        self.mem_available -= sign * claim['memory']
+        self.total_containers += sign
+
+
+class HostManager(object):
+    """Keep the states of the compute hosts in memory.
+
+    The first lookup loads the compute nodes from the database. Afterwards,
+    lookups are served from memory and the snapshot is refreshed in the
+    background once it is older than [scheduler]host_state_refresh_interval
+    seconds. The liveness of the hosts is answered by the liveness cache of
+    zun.api.servicegroup.
+
+    The host manager is per process: each zun-api worker keeps its own host
+    states and claims, and doesn't see the claims of the other workers.
+    """
+
+    def __init__(self):
+        self._host_states = {}
+        self._refreshed_at = None
+        self._refresh_thread = None
+
+    def _needs_refresh(self):
+        if self._refreshed_at is None:
+            return True
+        return timeutils.is_older_than(
+            self._refreshed_at, CONF.scheduler.host_state_refresh_interval)
+
+    def refresh(self, context):
+        """Reconcile the snapshot with the database."""
+        nodes = objects.ComputeNode.list(context)
+        host_states = {}
+        for node in nodes:
+            host_state = self._host_states.get(node.hostname)
+            if host_state is None:
+                host_state = HostState(node.hostname)
+            host_state.update(node)
+            host_states[node.hostname] = host_state
+        self._host_states = host_states
+        self._refreshed_at = timeutils.utcnow()
+        LOG.debug("Refreshed the states of %d host(s)", len(host_states))
+
+    def _refresh_in_background(self):
+        if self._refresh_thread is None:
+            self._refresh_thread = utils.spawn(self._background_refresh)
+
+    def _background_refresh(self):
+        try:
+            self.refresh(zun_context.get_admin_context(all_tenants=True))
+        except Exception:
+            LOG.exception("Failed to refresh the host states")
+        finally:
+            self._refresh_thread = None
+
+    def get_host_states(self, context):
+        """Return the states of the hosts which are up."""
+        if self._refreshed_at is None:
+            self.refresh(context)
+        elif self._needs_refresh():
+            self._refresh_in_background()
+        liveness = servicegroup.get_liveness_cache()
+        return [host_state for hostname, host_state
+                in self._host_states.items()
+                if liveness.host_is_up(context, hostname)]
+
+
+def get_host_manager():
+    """Return the host manager shared by the schedulers of the process."""
+    global _host_manager
+    if _host_manager is None:
+        _host_manager = HostManager()
+    return _host_manager
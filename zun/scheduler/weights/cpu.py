@@ -0,0 +1,39 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+CPU Weigher. Weigh hosts by the ratio of their CPUs which is free.
+
+The default is to spread containers across all hosts evenly. If you prefer
+stacking, you can set the 'cpu_weight_multiplier' option to a negative
+number and the weighing has the opposite effect of the default.
+"""
+
+import zun.conf
+from zun.scheduler import weights
+
+CONF = zun.conf.CONF
+
+
+class CPUWeigher(weights.BaseHostWeigher):
+    minval = 0
+    maxval = 1
+
+    def weight_multiplier(self):
+        """Override the weight multiplier."""
+        return CONF.scheduler.cpu_weight_multiplier
+
+    def _weigh_object(self, host_state, container):
+        """Higher weights win. We want spreading to be the default."""
+        if not host_state.cpus:
+            return 0
+        return (host_state.cpus - host_state.cpu_used) / host_state.cpus
@@ -45,7 +45,7 @@ class ContainerStateSyncPeriodicJob(periodic_task.PeriodicTasks):
     def sync_container_state(self, ctx):
         LOG.debug('Start syncing container states.')
 
-        containers = objects.Container.list(ctx)
+        containers = objects.Container.list_by_host(ctx, self.host)
         self.driver.update_containers_states(ctx, containers)
 
         LOG.debug('Complete syncing container states.')
@@ -62,3 +62,5 @@ def setup(conf, tg):
         pt.run_periodic_tasks,
         periodic_interval_max=conf.periodic_interval_max,
         context=None)
+    pt.driver.start_event_watcher(tg)
+    pt.driver.start_sandbox_pool(tg)
@@ -13,6 +13,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import collections
 import copy
 import os
 
@@ -23,8 +24,12 @@ from oslotest import base
 import pecan
 import testscenarios
 
+from zun.api import servicegroup
+from zun.common import clients
 from zun.common import context as zun_context
 import zun.conf
+from zun.container.docker import sandbox_pool
+from zun.network import neutron
 from zun.objects import base as objects_base
 
 from zun.tests import conf_fixture
@@ -87,6 +92,21 @@ class TestCase(base.BaseTestCase):
         self.mock_make_context = p.start()
         self.addCleanup(p.stop)
 
+        # Don't share the caches of the process between tests
+        p = mock.patch.object(servicegroup, '_liveness_cache', None)
+        p.start()
+        self.addCleanup(p.stop)
+        p = mock.patch.object(clients, '_clients_cache', None)
+        p.start()
+        self.addCleanup(p.stop)
+        p = mock.patch.object(sandbox_pool, '_sandbox_pool', None)
+        p.start()
+        self.addCleanup(p.stop)
+        p = mock.patch.object(neutron, '_network_names',
+                              collections.OrderedDict())
+        p.start()
+        self.addCleanup(p.stop)
+
         self.policy = self.useFixture(policy_fixture.PolicyFixture())
         self.useFixture(conf_fixture.ConfFixture())
 
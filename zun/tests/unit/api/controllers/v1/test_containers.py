@@ -18,13 +18,19 @@ from oslo_utils import uuidutils
 
 from zun.common import consts
 from zun.common import exception
+import zun.conf
 from zun import objects
 from zun.tests.unit.api import base as api_base
 from zun.tests.unit.db import utils
 from zun.tests.unit.objects import utils as obj_utils
 
+CONF = zun.conf.CONF
+
 
 class TestContainerController(api_base.FunctionalTest):
+
+    count_headers = {'OpenStack-API-Version': 'container 1.2'}
+
     @patch('zun.compute.api.API.container_run')
     @patch('zun.compute.api.API.image_search')
     def test_run_container(self, mock_search, mock_container_run):
@@ -94,6 +100,96 @@ class TestContainerController(api_base.FunctionalTest):
         self.assertEqual(202, response.status_int)
         self.assertTrue(mock_container_create.called)
 
+    @patch('zun.compute.api.API.container_create_many')
+    @patch('zun.compute.api.API.image_search')
+    def test_create_many_containers(self, mock_search,
+                                    mock_container_create_many):
+        params = ('{"name": "MyDocker", "image": "ubuntu",'
+                  '"command": "env", "memory": "512"}')
+        response = self.app.post('/v1/containers?count=3&run=true',
+                                 params=params,
+                                 content_type='application/json',
+                                 headers=self.count_headers)
+
+        self.assertEqual(202, response.status_int)
+        self.assertEqual(1, mock_search.call_count)
+        self.assertEqual(1, mock_container_create_many.call_count)
+        new_containers = mock_container_create_many.call_args[0][1]
+        self.assertTrue(mock_container_create_many.call_args[0][2])
+        self.assertEqual(['MyDocker-1', 'MyDocker-2', 'MyDocker-3'],
+                         [c.name for c in new_containers])
+        self.assertEqual(['MyDocker-1', 'MyDocker-2', 'MyDocker-3'],
+                         [c['name'] for c in response.json['containers']])
+
+    @patch('zun.compute.api.API.container_create_many')
+    @patch('zun.compute.api.API.image_search')
+    def test_create_many_containers_over_limit(self, mock_search,
+                                               mock_container_create_many):
+        CONF.set_override('max_container_count', 2, group='api')
+        params = ('{"name": "MyDocker", "image": "ubuntu",'
+                  '"command": "env", "memory": "512"}')
+        self.assertRaises(AppError, self.app.post, '/v1/containers?count=3',
+                          params=params, content_type='application/json',
+                          headers=self.count_headers)
+        self.assertFalse(mock_container_create_many.called)
+
+    @patch('zun.compute.api.API.container_create_many')
+    @patch('zun.compute.api.API.image_search')
+    def test_create_many_containers_wrong_count(self, mock_search,
+                                                mock_container_create_many):
+        params = ('{"name": "MyDocker", "image": "ubuntu",'
+                  '"command": "env", "memory": "512"}')
+        with self.assertRaisesRegexp(AppError,
+                                     "Invalid input for query parameters"):
+            self.app.post('/v1/containers?count=0', params=params,
+                          content_type='application/json',
+                          headers=self.count_headers)
+        self.assertFalse(mock_container_create_many.called)
+
+    @patch('zun.compute.api.API.container_create_many')
+    @patch('zun.compute.api.API.image_search')
+    def test_create_many_containers_empty_count(self, mock_search,
+                                                mock_container_create_many):
+        params = ('{"name": "MyDocker", "image": "ubuntu",'
+                  '"command": "env", "memory": "512"}')
+        with self.assertRaisesRegexp(AppError,
+                                     "Valid count values are positive"):
+            self.app.post('/v1/containers?count=', params=params,
+                          content_type='application/json',
+                          headers=self.count_headers)
+        self.assertFalse(mock_container_create_many.called)
+
+    @patch('zun.compute.api.API.container_create_many')
+    @patch('zun.compute.api.API.image_search')
+    def test_create_many_containers_old_version(self, mock_search,
+                                                mock_container_create_many):
+        params = ('{"name": "MyDocker", "image": "ubuntu",'
+                  '"command": "env", "memory": "512"}')
+        with self.assertRaisesRegexp(AppError,
+                                     "count parameter requires API version"):
+            self.app.post('/v1/containers?count=2', params=params,
+                          content_type='application/json',
+                          headers={'OpenStack-API-Version': 'container 1.1'})
+        self.assertFalse(mock_container_create_many.called)
+
+    @patch('zun.objects.Container.destroy')
+    @patch('zun.objects.Container.create')
+    @patch('zun.compute.api.API.container_create_many')
+    @patch('zun.compute.api.API.image_search')
+    def test_create_many_containers_rollback(self, mock_search,
+                                             mock_container_create_many,
+                                             mock_create, mock_destroy):
+        mock_create.side_effect = [
+            None, exception.ContainerAlreadyExists(field='name',
+                                                   value='MyDocker-2')]
+        params = ('{"name": "MyDocker", "image": "ubuntu",'
+                  '"command": "env", "memory": "512"}')
+        self.assertRaises(AppError, self.app.post, '/v1/containers?count=3',
+                          params=params, content_type='application/json',
+                          headers=self.count_headers)
+        self.assertFalse(mock_container_create_many.called)
+        self.assertEqual(1, mock_destroy.call_count)
+
     @patch('zun.compute.api.API.container_create')
     def test_create_container_image_not_specified(self, mock_container_create):
 
@@ -152,14 +248,14 @@ class TestContainerController(api_base.FunctionalTest):
         self.assertEqual(202, response.status_int)
         self.assertIn('status_reason', response.json.keys())
 
-    @patch('zun.compute.api.API.container_show')
+    @patch('zun.compute.api.API.container_show_many')
     @patch('zun.compute.api.API.container_create')
     @patch('zun.compute.api.API.container_delete')
     @patch('zun.compute.api.API.image_search')
     def test_create_container_with_command(self, mock_search,
                                            mock_container_delete,
                                            mock_container_create,
-                                           mock_container_show):
+                                           mock_container_show_many):
         mock_container_create.side_effect = lambda x, y: y
         # Create a container with a command
         params = ('{"name": "MyDocker", "image": "ubuntu",'
@@ -172,7 +268,8 @@ class TestContainerController(api_base.FunctionalTest):
         # get all containers
         container = objects.Container.list(self.context)[0]
         container.status = 'Stopped'
-        mock_container_show.return_value = container
+        container.save(self.context)
+        mock_container_show_many.side_effect = lambda x, y: y
         response = self.app.get('/v1/containers/')
         self.assertEqual(200, response.status_int)
         self.assertEqual(2, len(response.json))
@@ -195,12 +292,12 @@ class TestContainerController(api_base.FunctionalTest):
         self.assertEqual(0, len(c))
         self.assertTrue(mock_container_create.called)
 
-    @patch('zun.compute.api.API.container_show')
+    @patch('zun.compute.api.API.container_show_many')
     @patch('zun.compute.api.API.container_create')
     @patch('zun.compute.api.API.image_search')
     def test_create_container_without_memory(self, mock_search,
                                              mock_container_create,
-                                             mock_container_show):
+                                             mock_container_show_many):
         mock_container_create.side_effect = lambda x, y: y
         # Create a container with a command
         params = ('{"name": "MyDocker", "image": "ubuntu",'
@@ -213,7 +310,8 @@ class TestContainerController(api_base.FunctionalTest):
         # get all containers
         container = objects.Container.list(self.context)[0]
         container.status = 'Stopped'
-        mock_container_show.return_value = container
+        container.save(self.context)
+        mock_container_show_many.side_effect = lambda x, y: y
         response = self.app.get('/v1/containers/')
         self.assertEqual(200, response.status_int)
         self.assertEqual(2, len(response.json))
@@ -226,12 +324,12 @@ class TestContainerController(api_base.FunctionalTest):
         self.assertEqual({"key1": "val1", "key2": "val2"},
                          c.get('environment'))
 
-    @patch('zun.compute.api.API.container_show')
+    @patch('zun.compute.api.API.container_show_many')
     @patch('zun.compute.api.API.container_create')
     @patch('zun.compute.api.API.image_search')
     def test_create_container_without_environment(self, mock_search,
                                                   mock_container_create,
-                                                  mock_container_show):
+                                                  mock_container_show_many):
         mock_container_create.side_effect = lambda x, y: y
         # Create a container with a command
         params = ('{"name": "MyDocker", "image": "ubuntu",'
@@ -243,7 +341,8 @@ class TestContainerController(api_base.FunctionalTest):
         # get all containers
         container = objects.Container.list(self.context)[0]
         container.status = 'Stopped'
-        mock_container_show.return_value = container
+        container.save(self.context)
+        mock_container_show_many.side_effect = lambda x, y: y
         response = self.app.get('/v1/containers/')
         self.assertEqual(200, response.status_int)
         self.assertEqual(2, len(response.json))
@@ -255,12 +354,12 @@ class TestContainerController(api_base.FunctionalTest):
         self.assertEqual('512M', c.get('memory'))
         self.assertEqual({}, c.get('environment'))
 
-    @patch('zun.compute.api.API.container_show')
+    @patch('zun.compute.api.API.container_show_many')
     @patch('zun.compute.api.API.container_create')
     @patch('zun.compute.api.API.image_search')
     def test_create_container_without_name(self, mock_search,
                                            mock_container_create,
-                                           mock_container_show):
+                                           mock_container_show_many):
         # No name param
         mock_container_create.side_effect = lambda x, y: y
         params = ('{"image": "ubuntu", "command": "env", "memory": "512",'
@@ -272,7 +371,8 @@ class TestContainerController(api_base.FunctionalTest):
         # get all containers
         container = objects.Container.list(self.context)[0]
         container.status = 'Stopped'
-        mock_container_show.return_value = container
+        container.save(self.context)
+        mock_container_show_many.side_effect = lambda x, y: y
         response = self.app.get('/v1/containers/')
         self.assertEqual(200, response.status_int)
         self.assertEqual(2, len(response.json))
@@ -285,14 +385,14 @@ class TestContainerController(api_base.FunctionalTest):
         self.assertEqual({"key1": "val1", "key2": "val2"},
                          c.get('environment'))
 
-    @patch('zun.compute.rpcapi.API.container_show')
+    @patch('zun.compute.rpcapi.API.container_show_many')
     @patch('zun.compute.rpcapi.API.container_create')
     @patch('zun.compute.api.API.image_search')
     def test_create_container_with_restart_policy_no_retry_0(
             self,
             mock_search,
             mock_container_create,
-            mock_container_show):
+            mock_container_show_many):
         mock_container_create.side_effect = lambda x, y: y
         # Create a container with a command
         params = ('{"name": "MyDocker", "image": "ubuntu",'
@@ -306,7 +406,8 @@ class TestContainerController(api_base.FunctionalTest):
         # get all containers
         container = objects.Container.list(self.context)[0]
         container.status = 'Stopped'
-        mock_container_show.return_value = container
+        container.save(self.context)
+        mock_container_show_many.side_effect = lambda x, y, z: z
         response = self.app.get('/v1/containers/')
         self.assertEqual(200, response.status_int)
         self.assertEqual(2, len(response.json))
@@ -319,14 +420,14 @@ class TestContainerController(api_base.FunctionalTest):
         self.assertEqual({"Name": "no", "MaximumRetryCount": "0"},
                          c.get('restart_policy'))
 
-    @patch('zun.compute.rpcapi.API.container_show')
+    @patch('zun.compute.rpcapi.API.container_show_many')
     @patch('zun.compute.rpcapi.API.container_create')
     @patch('zun.compute.api.API.image_search')
     def test_create_container_with_restart_policy_no_retry_6(
             self,
             mock_search,
             mock_container_create,
-            mock_container_show):
+            mock_container_show_many):
         mock_container_create.side_effect = lambda x, y: y
         # Create a container with a command
         params = ('{"name": "MyDocker", "image": "ubuntu",'
@@ -340,7 +441,8 @@ class TestContainerController(api_base.FunctionalTest):
         # get all containers
         container = objects.Container.list(self.context)[0]
         container.status = 'Stopped'
-        mock_container_show.return_value = container
+        container.save(self.context)
+        mock_container_show_many.side_effect = lambda x, y, z: z
         response = self.app.get('/v1/containers/')
         self.assertEqual(200, response.status_int)
         self.assertEqual(2, len(response.json))
@@ -353,14 +455,14 @@ class TestContainerController(api_base.FunctionalTest):
         self.assertEqual({"Name": "no", "MaximumRetryCount": "0"},
                          c.get('restart_policy'))
 
-    @patch('zun.compute.rpcapi.API.container_show')
+    @patch('zun.compute.rpcapi.API.container_show_many')
     @patch('zun.compute.rpcapi.API.container_create')
     @patch('zun.compute.api.API.image_search')
     def test_create_container_with_restart_policy_miss_retry(
             self,
             mock_search,
             mock_container_create,
-            mock_container_show):
+            mock_container_show_many):
         mock_container_create.side_effect = lambda x, y: y
         # Create a container with a command
         params = ('{"name": "MyDocker", "image": "ubuntu",'
@@ -373,7 +475,8 @@ class TestContainerController(api_base.FunctionalTest):
         # get all containers
         container = objects.Container.list(self.context)[0]
         container.status = 'Stopped'
-        mock_container_show.return_value = container
+        container.save(self.context)
+        mock_container_show_many.side_effect = lambda x, y, z: z
         response = self.app.get('/v1/containers/')
         self.assertEqual(200, response.status_int)
         self.assertEqual(2, len(response.json))
@@ -386,14 +489,14 @@ class TestContainerController(api_base.FunctionalTest):
         self.assertEqual({"Name": "no", "MaximumRetryCount": "0"},
                          c.get('restart_policy'))
 
-    @patch('zun.compute.rpcapi.API.container_show')
+    @patch('zun.compute.rpcapi.API.container_show_many')
     @patch('zun.compute.rpcapi.API.container_create')
     @patch('zun.compute.api.API.image_search')
     def test_create_container_with_restart_policy_unless_stopped(
             self,
             mock_search,
             mock_container_create,
-            mock_container_show):
+            mock_container_show_many):
         mock_container_create.side_effect = lambda x, y: y
         # Create a container with a command
         params = ('{"name": "MyDocker", "image": "ubuntu",'
@@ -407,7 +510,8 @@ class TestContainerController(api_base.FunctionalTest):
         # get all containers
         container = objects.Container.list(self.context)[0]
         container.status = 'Stopped'
-        mock_container_show.return_value = container
+        container.save(self.context)
+        mock_container_show_many.side_effect = lambda x, y, z: z
         response = self.app.get('/v1/containers/')
         self.assertEqual(200, response.status_int)
         self.assertEqual(2, len(response.json))
@@ -420,14 +524,14 @@ class TestContainerController(api_base.FunctionalTest):
         self.assertEqual({"Name": "unless-stopped", "MaximumRetryCount": "0"},
                          c.get('restart_policy'))
 
-    @patch('zun.compute.rpcapi.API.container_show')
+    @patch('zun.compute.rpcapi.API.container_show_many')
     @patch('zun.compute.rpcapi.API.container_create')
     @patch('zun.compute.api.API.image_search')
     def test_create_container_with_restart_policy_always_and_retrycount(
             self,
             mock_search,
             mock_container_create,
-            mock_container_show):
+            mock_container_show_many):
         mock_container_create.side_effect = lambda x, y: y
         # Create a container with a command
         params = ('{"name": "MyDocker", "image": "ubuntu",'
@@ -452,14 +556,14 @@ class TestContainerController(api_base.FunctionalTest):
                           params=params, content_type='application/json')
         self.assertTrue(mock_container_create.not_called)
 
-    @patch('zun.compute.api.API.container_show')
+    @patch('zun.compute.api.API.container_show_many')
     @patch('zun.objects.Container.list')
     def test_get_all_containers(self, mock_container_list,
-                                mock_container_show):
+                                mock_container_show_many):
         test_container = utils.get_test_container()
         containers = [objects.Container(self.context, **test_container)]
         mock_container_list.return_value = containers
-        mock_container_show.return_value = containers[0]
+        mock_container_show_many.return_value = containers
 
         response = self.app.get('/v1/containers/')
 
@@ -472,14 +576,14 @@ class TestContainerController(api_base.FunctionalTest):
         self.assertEqual(test_container['uuid'],
                          actual_containers[0].get('uuid'))
 
-    @patch('zun.compute.api.API.container_show')
+    @patch('zun.compute.api.API.container_show_many')
     @patch('zun.objects.Container.list')
     def test_get_all_has_status_reason_and_image_pull_policy(
-            self, mock_container_list, mock_container_show):
+            self, mock_container_list, mock_container_show_many):
         test_container = utils.get_test_container()
         containers = [objects.Container(self.context, **test_container)]
         mock_container_list.return_value = containers
-        mock_container_show.return_value = containers[0]
+        mock_container_show_many.return_value = containers
 
         response = self.app.get('/v1/containers/')
         self.assertEqual(200, response.status_int)
@@ -490,11 +594,10 @@ class TestContainerController(api_base.FunctionalTest):
         self.assertIn('status_reason', actual_containers[0].keys())
         self.assertIn('image_pull_policy', actual_containers[0].keys())
 
-    @patch('zun.compute.api.API.container_show')
+    @patch('zun.compute.api.API.container_show_many')
     @patch('zun.objects.Container.list')
-    def test_get_all_containers_with_pagination_marker(self,
-                                                       mock_container_list,
-                                                       mock_container_show):
+    def test_get_all_containers_with_pagination_marker(
+            self, mock_container_list, mock_container_show_many):
         container_list = []
         for id_ in range(4):
             test_container = utils.create_test_container(
@@ -503,7 +606,7 @@ class TestContainerController(api_base.FunctionalTest):
             container_list.append(objects.Container(self.context,
                                                     **test_container))
         mock_container_list.return_value = container_list[-1:]
-        mock_container_show.return_value = container_list[-1]
+        mock_container_show_many.return_value = container_list[-1:]
         response = self.app.get('/v1/containers/?limit=3&marker=%s'
                                 % container_list[2].uuid)
 
@@ -513,14 +616,14 @@ class TestContainerController(api_base.FunctionalTest):
         self.assertEqual(container_list[-1].uuid,
                          actual_containers[0].get('uuid'))
 
-    @patch('zun.compute.api.API.container_show')
+    @patch('zun.compute.api.API.container_show_many')
     @patch('zun.objects.Container.list')
     def test_get_all_containers_with_exception(self, mock_container_list,
-                                               mock_container_show):
+                                               mock_container_show_many):
         test_container = utils.get_test_container()
         containers = [objects.Container(self.context, **test_container)]
         mock_container_list.return_value = containers
-        mock_container_show.side_effect = Exception
+        mock_container_show_many.side_effect = Exception
 
         response = self.app.get('/v1/containers/')
 
@@ -0,0 +1,99 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+import mock
+from oslo_utils import timeutils
+
+from zun.api import servicegroup
+from zun import objects
+from zun.tests import base
+
+
+class TestServiceLivenessCache(base.TestCase):
+
+    def setUp(self):
+        super(TestServiceLivenessCache, self).setUp()
+        self.liveness = servicegroup.ServiceLivenessCache()
+        p = mock.patch.object(objects.ZunService, 'list_by_binary')
+        self.mock_list = p.start()
+        self.addCleanup(p.stop)
+        p = mock.patch.object(objects.ZunService, 'get_by_host_and_binary',
+                              return_value=None)
+        self.mock_get = p.start()
+        self.addCleanup(p.stop)
+
+    def _get_service(self, host, seconds_ago=0):
+        last_seen_up = timeutils.utcnow(True) - datetime.timedelta(
+            seconds=seconds_ago)
+        return objects.ZunService(self.context, host=host,
+                                  binary='zun-compute', forced_down=False,
+                                  last_seen_up=last_seen_up)
+
+    def test_host_is_up(self):
+        self.mock_list.return_value = [self._get_service('host1'),
+                                       self._get_service('host2', 3600)]
+        self.assertTrue(self.liveness.host_is_up(self.context, 'host1'))
+        self.assertFalse(self.liveness.host_is_up(self.context, 'host2'))
+        self.assertFalse(self.liveness.host_is_up(self.context, 'host3'))
+        self.assertEqual(['host1'],
+                         self.liveness.get_up_hosts(self.context))
+        self.mock_list.assert_called_once_with(self.context, 'zun-compute')
+
+    def test_host_is_up_checks_down_host(self):
+        self.mock_list.return_value = [self._get_service('host1', 3600)]
+        self.assertFalse(self.liveness.host_is_up(self.context, 'host1'))
+        self.mock_get.assert_not_called()
+
+        # The host reported since it was loaded
+        self.liveness._checked_at['host1'] -= datetime.timedelta(seconds=60)
+        self.mock_get.return_value = self._get_service('host1')
+        self.assertTrue(self.liveness.host_is_up(self.context, 'host1'))
+        self.mock_get.assert_called_once_with(self.context, 'host1',
+                                              'zun-compute')
+        self.assertTrue(self.liveness.host_is_up(self.context, 'host1'))
+        self.assertEqual(1, self.mock_get.call_count)
+
+    def test_host_is_up_checks_down_host_once_per_ttl(self):
+        self.mock_list.return_value = [self._get_service('host1', 3600)]
+        self.assertFalse(self.liveness.host_is_up(self.context, 'host1'))
+        self.liveness._checked_at['host1'] -= datetime.timedelta(seconds=60)
+        self.assertFalse(self.liveness.host_is_up(self.context, 'host1'))
+        self.assertFalse(self.liveness.host_is_up(self.context, 'host1'))
+        self.assertEqual([], self.liveness.get_up_hosts(self.context))
+        # The host was read again by the first lookup
+        self.assertEqual(1, self.mock_get.call_count)
+
+    def test_host_is_up_refresh_in_background(self):
+        self.config(service_liveness_cache_ttl=0)
+        self.mock_list.return_value = [self._get_service('host1')]
+        self.assertTrue(self.liveness.host_is_up(self.context, 'host1'))
+
+        self.mock_list.return_value = []
+        self.liveness._refreshed_at -= datetime.timedelta(seconds=1)
+        # The cached service is used while the services are reloaded
+        self.assertTrue(self.liveness.host_is_up(self.context, 'host1'))
+        self.liveness._refresh_thread.wait()
+        self.assertFalse(self.liveness.host_is_up(self.context, 'host1'))
+
+    def test_invalidate(self):
+        self.mock_list.return_value = [self._get_service('host1')]
+        self.assertTrue(self.liveness.host_is_up(self.context, 'host1'))
+        self.mock_list.return_value = []
+        self.liveness.invalidate()
+        self.assertFalse(self.liveness.host_is_up(self.context, 'host1'))
+        self.assertEqual(2, self.mock_list.call_count)
+
+    def test_get_liveness_cache(self):
+        liveness = servicegroup.get_liveness_cache()
+        self.assertIs(liveness, servicegroup.get_liveness_cache())
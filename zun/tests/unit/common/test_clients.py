@@ -10,11 +10,15 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
 import mock
 
 from glanceclient import client as glanceclient
+from oslo_utils import timeutils
 
 from zun.common import clients
+from zun.common import context
 from zun.common import exception
 import zun.conf
 from zun.tests import base
@@ -112,3 +116,67 @@ class ClientsTest(base.BaseTestCase):
         glance = obj.glance()
         glance_cached = obj.glance()
         self.assertEqual(glance, glance_cached)
+
+
+class ClientsCacheTest(base.TestCase):
+
+    def setUp(self):
+        super(ClientsCacheTest, self).setUp()
+        self.cache = clients.ClientsCache()
+
+    def _get_context(self, auth_token='fake_token', expires_at=None,
+                     project_id='fake_project'):
+        token_info = None
+        if expires_at is not None:
+            token_info = {'token': {'expires_at': expires_at.isoformat()}}
+        return context.RequestContext(auth_token=auth_token,
+                                      auth_token_info=token_info,
+                                      project_id=project_id,
+                                      user_id='fake_user')
+
+    def test_get_reuses_clients(self):
+        ctx = self._get_context()
+        osc = self.cache.get(ctx)
+        self.assertIs(osc, self.cache.get(self._get_context()))
+        self.assertIsNot(osc, self.cache.get(
+            self._get_context(auth_token='other_token')))
+        self.assertIsNot(osc, self.cache.get(
+            self._get_context(project_id='other_project')))
+
+    def test_get_expired_ttl(self):
+        self.config(client_cache_ttl=0)
+        ctx = self._get_context()
+        osc = self.cache.get(ctx)
+        self.assertIsNot(osc, self.cache.get(ctx))
+
+    def test_get_token_about_to_expire(self):
+        expires_at = timeutils.utcnow() + datetime.timedelta(seconds=30)
+        ctx = self._get_context(expires_at=expires_at)
+        osc = self.cache.get(ctx)
+        self.assertIsNot(osc, self.cache.get(ctx))
+
+        expires_at = timeutils.utcnow() + datetime.timedelta(hours=1)
+        ctx = self._get_context(expires_at=expires_at)
+        osc = self.cache.get(ctx)
+        self.assertIs(osc, self.cache.get(ctx))
+
+    def test_get_evicts_least_recently_used(self):
+        self.config(client_cache_size=2)
+        osc1 = self.cache.get(self._get_context(auth_token='token1'))
+        osc2 = self.cache.get(self._get_context(auth_token='token2'))
+        self.assertIs(osc1, self.cache.get(
+            self._get_context(auth_token='token1')))
+        self.cache.get(self._get_context(auth_token='token3'))
+        self.assertIs(osc1, self.cache.get(
+            self._get_context(auth_token='token1')))
+        self.assertIsNot(osc2, self.cache.get(
+            self._get_context(auth_token='token2')))
+
+    def test_get_cache_disabled(self):
+        self.config(client_cache_size=0)
+        ctx = self._get_context()
+        self.assertIsNot(self.cache.get(ctx), self.cache.get(ctx))
+
+    def test_get_clients(self):
+        ctx = self._get_context()
+        self.assertIs(clients.get_clients(ctx), clients.get_clients(ctx))
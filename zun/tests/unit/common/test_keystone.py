@@ -0,0 +1,35 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+
+from zun.common import keystone
+from zun.tests import base
+
+
+class KeystoneClientTest(base.BaseTestCase):
+
+    def setUp(self):
+        super(KeystoneClientTest, self).setUp()
+        p = mock.patch.object(keystone, '_http_adapters', None)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_sessions_share_adapters(self):
+        sessions = [keystone.KeystoneClientV3(mock.Mock())._get_session(
+            mock.Mock()).session for i in range(2)]
+        self.assertIsNot(sessions[0], sessions[1])
+        for prefix in ('http://', 'https://'):
+            self.assertIs(sessions[0].get_adapter(prefix + 'server.test'),
+                          sessions[1].get_adapter(prefix + 'server.test'))
+        sessions[0].headers['X-Test'] = 'test'
+        self.assertNotIn('X-Test', sessions[1].headers)
@@ -76,6 +76,11 @@ class TestUtils(base.TestCase):
         self.assertTrue(utils.should_pull_image('ifnotpresent', False))
         self.assertFalse(utils.should_pull_image('ifnotpresent', True))
 
+    def test_get_memory_mb(self):
+        self.assertEqual(512, utils.get_memory_mb('512M'))
+        self.assertEqual(512, utils.get_memory_mb('512'))
+        self.assertEqual(0, utils.get_memory_mb(None))
+
     def test_validate_container_state(self):
         container = Container(self.context, **db_utils.get_test_container())
         container.status = 'Stopped'
@@ -0,0 +1,67 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from zun.common import consts
+from zun.common import exception
+from zun.compute import api
+from zun import objects
+from zun.tests import base
+from zun.tests.unit.db import utils
+
+
+class TestAPI(base.TestCase):
+
+    def setUp(self):
+        super(TestAPI, self).setUp()
+        p = mock.patch('zun.scheduler.client.SchedulerClient')
+        p.start()
+        self.addCleanup(p.stop)
+        self.compute_api = api.API()
+        self.mock_select = self.compute_api.scheduler_client \
+            .select_destinations
+
+    def _get_containers(self, count):
+        return [objects.Container(self.context, **utils.get_test_container(
+            uuid='fake-uuid-%d' % i)) for i in range(count)]
+
+    @mock.patch('zun.compute.rpcapi.API.container_create_many')
+    @mock.patch.object(objects.Container, 'save')
+    def test_container_create_many(self, mock_save, mock_create_many):
+        containers = self._get_containers(3)
+        self.mock_select.return_value = [
+            {'host': 'host1', 'nodename': None, 'limits': None},
+            {'host': 'host2', 'nodename': None, 'limits': None},
+            {'host': 'host1', 'nodename': None, 'limits': None}]
+        self.compute_api.container_create_many(self.context, containers,
+                                               True)
+        self.mock_select.assert_called_once_with(self.context, containers)
+        self.assertEqual(['host1', 'host2', 'host1'],
+                         [c.host for c in containers])
+        self.assertEqual(2, mock_create_many.call_count)
+        mock_create_many.assert_any_call(
+            self.context, 'host1', [containers[0], containers[2]], True)
+        mock_create_many.assert_any_call(
+            self.context, 'host2', [containers[1]], True)
+
+    @mock.patch('zun.compute.rpcapi.API.container_create_many')
+    @mock.patch.object(objects.Container, 'save')
+    def test_container_create_many_no_valid_host(self, mock_save,
+                                                 mock_create_many):
+        containers = self._get_containers(2)
+        self.mock_select.side_effect = exception.NoValidHost(reason='full')
+        self.compute_api.container_create_many(self.context, containers,
+                                               False)
+        for container in containers:
+            self.assertEqual(consts.ERROR, container.status)
+        self.assertFalse(mock_create_many.called)
@@ -12,8 +12,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import glanceclient
 import mock
+import requests
 
+from io import BytesIO
 from io import StringIO
 from zun.common import consts
 from zun.common import exception
@@ -56,11 +59,93 @@ class TestManager(base.TestCase):
         mock_create_sandbox.return_value = 'fake_id'
         self.compute_manager._do_container_create(self.context, container)
         mock_save.assert_called_with(self.context)
-        mock_pull.assert_any_call(self.context, container.image, 'latest',
-                                  'always', 'glance')
+        mock_pull.assert_any_call(
+            self.context, container.image, 'latest', 'always', 'glance',
+            load_image=self.compute_manager.driver.load_image)
         mock_create.assert_called_once_with(self.context, container,
                                             'fake_id', image)
 
+    @mock.patch.object(Container, 'save')
+    @mock.patch('zun.image.driver.pull_image')
+    @mock.patch.object(fake_driver, 'create')
+    @mock.patch.object(fake_driver, 'create_sandbox')
+    def test_container_create_records_timings(self, mock_create_sandbox,
+                                              mock_create, mock_pull,
+                                              mock_save):
+        container = Container(self.context, **utils.get_test_container())
+        image = {'image': 'repo', 'path': 'out_path', 'driver': 'glance'}
+        mock_pull.return_value = image, False
+        mock_create_sandbox.return_value = 'fake_id'
+        mock_create.side_effect = lambda context, container, *args: container
+        container = self.compute_manager._do_container_create(self.context,
+                                                              container)
+        for key in ('sandbox_create_seconds', 'image_pull_seconds',
+                    'container_create_seconds', 'create_seconds'):
+            self.assertIn(key, container.meta)
+
+    @mock.patch.object(Container, 'save')
+    @mock.patch.object(fake_driver, 'create_sandbox')
+    @mock.patch.object(fake_driver, 'create')
+    @mock.patch('zun.image.driver.pull_image')
+    @mock.patch.object(manager.Manager, '_do_sandbox_cleanup')
+    @mock.patch.object(manager.Manager, '_fail_container')
+    def test_container_create_sandbox_failed(
+            self, mock_fail, mock_cleanup, mock_pull, mock_create,
+            mock_create_sandbox, mock_save):
+        container = Container(self.context, **utils.get_test_container())
+        image = {'image': 'repo', 'path': 'out_path', 'driver': 'glance'}
+        mock_pull.return_value = image, True
+        mock_create_sandbox.side_effect = exception.ZunException(
+            message="Sandbox Failed")
+        self.compute_manager._do_container_create(self.context, container)
+        mock_fail.assert_called_once_with(self.context,
+                                          container, "Sandbox Failed")
+        # The image of the container was still pulled to completion
+        self.assertEqual(2, mock_pull.call_count)
+        mock_cleanup.assert_not_called()
+        mock_create.assert_not_called()
+
+    @mock.patch.object(Container, 'save')
+    @mock.patch.object(fake_driver, 'create_sandbox')
+    @mock.patch.object(manager.Manager, '_pull_container_image')
+    @mock.patch.object(manager.Manager, '_do_sandbox_cleanup')
+    @mock.patch.object(manager.Manager, '_fail_container')
+    def test_container_create_pull_image_failed_cleanup_sandbox(
+            self, mock_fail, mock_cleanup, mock_pull, mock_create_sandbox,
+            mock_save):
+        container = Container(self.context, **utils.get_test_container())
+        mock_pull.side_effect = exception.ImageNotFound("Image Not Found")
+        mock_create_sandbox.return_value = 'fake_id'
+        with mock.patch('zun.image.driver.pull_image',
+                        return_value=({'path': 'out_path'}, True)):
+            self.compute_manager._do_container_create(self.context,
+                                                      container)
+        mock_cleanup.assert_called_once_with(self.context, 'fake_id')
+        mock_fail.assert_called_once_with(self.context,
+                                          container, "Image Not Found")
+        self.assertIn('image_pull_seconds', container.meta)
+
+    @mock.patch('zun.common.utils.spawn_n')
+    def test_container_create_many(self, mock_spawn_n):
+        containers = [Container(self.context, **utils.get_test_container())
+                      for i in range(2)]
+        self.compute_manager.container_create_many(self.context, containers,
+                                                   False)
+        mock_spawn_n.assert_has_calls([
+            mock.call(self.compute_manager._do_container_create,
+                      self.context, containers[0]),
+            mock.call(self.compute_manager._do_container_create,
+                      self.context, containers[1])])
+
+    @mock.patch('zun.common.utils.spawn_n')
+    def test_container_create_many_with_run(self, mock_spawn_n):
+        containers = [Container(self.context, **utils.get_test_container())]
+        self.compute_manager.container_create_many(self.context, containers,
+                                                   True)
+        mock_spawn_n.assert_called_once_with(
+            self.compute_manager._do_container_run, self.context,
+            containers[0])
+
     @mock.patch.object(Container, 'save')
     @mock.patch.object(fake_driver, 'create_sandbox')
     @mock.patch('zun.image.driver.pull_image')
@@ -132,8 +217,9 @@ class TestManager(base.TestCase):
         container.status = 'Stopped'
         self.compute_manager._do_container_run(self.context, container)
         mock_save.assert_called_with(self.context)
-        mock_pull.assert_any_call(self.context, container.image, 'latest',
-                                  'always', 'glance')
+        mock_pull.assert_any_call(
+            self.context, container.image, 'latest', 'always', 'glance',
+            load_image=self.compute_manager.driver.load_image)
         mock_create.assert_called_once_with(self.context, container,
                                             None, image)
         mock_start.assert_called_once_with(container)
@@ -151,8 +237,12 @@ class TestManager(base.TestCase):
         mock_save.assert_called_with(self.context)
         mock_fail.assert_called_with(self.context,
                                      container, 'Image Not Found')
-        mock_pull.assert_called_once_with(self.context, 'kubernetes/pause',
-                                          'latest', 'ifnotpresent', 'docker')
+        # The image of the container is pulled along with the sandbox image
+        mock_pull.assert_any_call(
+            self.context, 'kubernetes/pause', 'latest', 'ifnotpresent',
+            'docker',
+            load_image=self.compute_manager.driver.load_image)
+        self.assertEqual(2, mock_pull.call_count)
 
     @mock.patch.object(Container, 'save')
     @mock.patch('zun.image.driver.pull_image')
@@ -167,8 +257,12 @@ class TestManager(base.TestCase):
         mock_save.assert_called_with(self.context)
         mock_fail.assert_called_with(self.context,
                                      container, 'Image Not Found')
-        mock_pull.assert_called_once_with(self.context, 'kubernetes/pause',
-                                          'latest', 'ifnotpresent', 'docker')
+        # The image of the container is pulled along with the sandbox image
+        mock_pull.assert_any_call(
+            self.context, 'kubernetes/pause', 'latest', 'ifnotpresent',
+            'docker',
+            load_image=self.compute_manager.driver.load_image)
+        self.assertEqual(2, mock_pull.call_count)
 
     @mock.patch.object(Container, 'save')
     @mock.patch('zun.image.driver.pull_image')
@@ -183,8 +277,12 @@ class TestManager(base.TestCase):
         mock_save.assert_called_with(self.context)
         mock_fail.assert_called_with(self.context,
                                      container, 'Docker Error occurred')
-        mock_pull.assert_called_once_with(self.context, 'kubernetes/pause',
-                                          'latest', 'ifnotpresent', 'docker')
+        # The image of the container is pulled along with the sandbox image
+        mock_pull.assert_any_call(
+            self.context, 'kubernetes/pause', 'latest', 'ifnotpresent',
+            'docker',
+            load_image=self.compute_manager.driver.load_image)
+        self.assertEqual(2, mock_pull.call_count)
 
     @mock.patch.object(Container, 'save')
     @mock.patch('zun.image.driver.pull_image')
@@ -202,8 +300,9 @@ class TestManager(base.TestCase):
         mock_save.assert_called_with(self.context)
         mock_fail.assert_called_with(self.context,
                                      container, 'Docker Error occurred')
-        mock_pull.assert_any_call(self.context, container.image, 'latest',
-                                  'always', 'glance')
+        mock_pull.assert_any_call(
+            self.context, container.image, 'latest', 'always', 'glance',
+            load_image=self.compute_manager.driver.load_image)
         mock_create.assert_called_once_with(self.context, container, None,
                                             {'name': 'nginx', 'path': None})
 
@@ -275,6 +374,24 @@ class TestManager(base.TestCase):
                           self.compute_manager.container_show,
                           self.context, container)
 
+    @mock.patch.object(Container, 'save')
+    @mock.patch.object(fake_driver, 'show_many')
+    def test_container_show_many(self, mock_show_many, mock_save):
+        container = Container(self.context, **utils.get_test_container())
+        container.obj_reset_changes()
+        mock_show_many.return_value = [container]
+        self.compute_manager.container_show_many(self.context, [container])
+        mock_show_many.assert_called_once_with([container])
+        mock_save.assert_not_called()
+
+    @mock.patch.object(fake_driver, 'show_many')
+    def test_container_show_many_failed(self, mock_show_many):
+        container = Container(self.context, **utils.get_test_container())
+        mock_show_many.side_effect = exception.DockerError
+        self.assertRaises(exception.DockerError,
+                          self.compute_manager.container_show_many,
+                          self.context, [container])
+
     @mock.patch.object(Container, 'save')
     @mock.patch.object(fake_driver, 'reboot')
     def test_container_reboot(self, mock_reboot, mock_save):
@@ -492,27 +609,12 @@ class TestManager(base.TestCase):
         mock_pull.return_value = ret, True
         mock_inspect.return_value = {'Id': 'fake-id', 'Size': 512}
         self.compute_manager._do_image_pull(self.context, image)
-        mock_pull.assert_any_call(self.context, image.repo, image.tag)
+        mock_pull.assert_any_call(
+            self.context, image.repo, image.tag,
+            load_image=self.compute_manager.driver.load_image)
         mock_save.assert_called_once()
         mock_inspect.assert_called_once_with(image.repo + ":" + image.tag)
 
-    @mock.patch.object(fake_driver, 'load_image')
-    @mock.patch.object(fake_driver, 'inspect_image')
-    @mock.patch.object(Image, 'save')
-    @mock.patch('zun.image.driver.pull_image')
-    def test_image_pull_not_loaded(self, mock_pull, mock_save,
-                                   mock_inspect, mock_load):
-        image = Image(self.context, **utils.get_test_image())
-        repo_tag = image.repo + ":" + image.tag
-        ret = {'image': 'repo', 'path': 'out_path', 'driver': 'glance'}
-        mock_pull.return_value = ret, False
-        mock_inspect.return_value = {'Id': 'fake-id', 'Size': 512}
-        self.compute_manager._do_image_pull(self.context, image)
-        mock_pull.assert_any_call(self.context, image.repo, image.tag)
-        mock_save.assert_called_once()
-        mock_inspect.assert_called_once_with(repo_tag)
-        mock_load.assert_called_once_with(ret['path'])
-
     @mock.patch.object(fake_driver, 'execute_resize')
     def test_container_exec_resize(self, mock_resize):
         self.compute_manager.container_exec_resize(
@@ -526,11 +628,12 @@ class TestManager(base.TestCase):
                           self.compute_manager.container_exec_resize,
                           self.context, 'fake_exec_id', "100", "100")
 
+    @mock.patch.object(Container, 'save')
     @mock.patch('zun.image.driver.upload_image')
     @mock.patch.object(fake_driver, 'get_image')
     @mock.patch.object(fake_driver, 'commit')
     def test_container_commit(self, mock_commit,
-                              mock_get_image, mock_upload_image):
+                              mock_get_image, mock_upload_image, mock_save):
         container = Container(self.context, **utils.get_test_container())
         mock_get_image_response = mock.MagicMock()
         mock_get_image_response.data = StringIO().read()
@@ -540,11 +643,84 @@ class TestManager(base.TestCase):
         self.compute_manager._do_container_commit(self.context,
                                                   container, 'repo', 'tag')
         mock_commit.assert_called_once_with(container, 'repo', 'tag')
+        self.assertIsNone(container.task_state)
+        self.assertEqual(3, mock_save.call_count)
 
+    @mock.patch.object(Container, 'save')
     @mock.patch.object(fake_driver, 'commit')
-    def test_container_commit_failed(self, mock_commit):
+    def test_container_commit_failed(self, mock_commit, mock_save):
         container = Container(self.context, **utils.get_test_container())
         mock_commit.side_effect = exception.DockerError
         self.assertRaises(exception.DockerError,
                           self.compute_manager._do_container_commit,
                           self.context, container, 'repo', 'tag')
+        self.assertIsNone(container.task_state)
+
+    @mock.patch.object(Container, 'save')
+    @mock.patch('zun.image.driver.upload_image')
+    @mock.patch.object(fake_driver, 'get_image')
+    @mock.patch.object(fake_driver, 'commit')
+    def test_container_commit_deleted_container(self, mock_commit,
+                                                mock_get_image,
+                                                mock_upload_image, mock_save):
+        container = Container(self.context, **utils.get_test_container())
+        mock_get_image.return_value = BytesIO(b'image')
+        mock_save.side_effect = [None, None,
+                                 exception.ContainerNotFound(container='c')]
+        self.compute_manager._do_container_commit(self.context,
+                                                  container, 'repo', 'tag')
+        mock_upload_image.assert_called_once_with(
+            self.context, 'repo', 'tag', mock.ANY, mock.ANY)
+        self.assertEqual(3, mock_save.call_count)
+
+    @mock.patch.object(manager, 'IMAGE_PROGRESS_INTERVAL', 4)
+    @mock.patch.object(Container, 'save')
+    def test_image_upload_reader(self, mock_save):
+        container = Container(self.context, **utils.get_test_container())
+        reader = manager.ImageUploadReader(self.context, container,
+                                           BytesIO(b'x' * 10))
+        chunks = []
+        for size in (3, 3, 3, 3):
+            chunks.append(reader.read(size))
+        self.assertEqual([b'xxx', b'xxx', b'xxx', b'x'], chunks)
+        self.assertEqual(b'', reader.read(3))
+        self.assertEqual(10, reader.uploaded)
+        # The progress is saved once 4 and 8 bytes are uploaded
+        self.assertEqual(2, mock_save.call_count)
+        self.assertEqual('Uploaded 0 MiB of the image',
+                         container.status_detail)
+
+    @mock.patch('requests.Session.request')
+    @mock.patch('zun.image.glance.utils.create_glanceclient')
+    @mock.patch('zun.image.glance.driver.GlanceDriver.update_image')
+    @mock.patch('zun.image.glance.driver.GlanceDriver.create_image')
+    @mock.patch.object(Container, 'save')
+    @mock.patch.object(fake_driver, 'get_image')
+    @mock.patch.object(fake_driver, 'commit')
+    def test_container_commit_upload_to_glance(
+            self, mock_commit, mock_get_image, mock_save, mock_create_image,
+            mock_update_image, mock_create_glanceclient, mock_request):
+        container = Container(self.context, **utils.get_test_container())
+        container.status_detail = 'Up 2 minutes'
+        mock_get_image.return_value = BytesIO(b'x' * 100000)
+        mock_update_image.return_value = mock.Mock(id='image-id')
+        mock_create_glanceclient.return_value = glanceclient.Client(
+            '2', endpoint='http://glance:9292', token='token')
+        uploaded = []
+
+        def _request(method, url, data=None, **kwargs):
+            uploaded.append(b''.join(data))
+            response = requests.Response()
+            response.status_code = 204
+            response.raw = mock.Mock(version=11)
+            response._content = b''
+            return response
+
+        mock_request.side_effect = _request
+        self.compute_manager._do_container_commit(self.context,
+                                                  container, 'repo', 'tag')
+        self.assertEqual([b'x' * 100000], uploaded)
+        self.assertEqual('http://glance:9292/v2/images/image-id/file',
+                         mock_request.call_args[0][1])
+        self.assertIsNone(container.task_state)
+        self.assertEqual('Up 2 minutes', container.status_detail)
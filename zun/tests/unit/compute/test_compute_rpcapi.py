@@ -41,3 +41,64 @@ class TestAPI(base.TestCase):
         self.assertRaises(exception.ContainerHostNotUp,
                           self.compute_rpcapi.container_delete,
                           self.context, test_container_obj, False)
+
+    @mock.patch('zun.api.servicegroup.ServiceGroup.service_is_up')
+    @mock.patch('zun.objects.ZunService.list_by_binary')
+    @mock.patch('zun.common.rpc_service.API._call')
+    def test_container_show_many_with_host_not_up(self, mock_rpc_call,
+                                                  mock_list,
+                                                  mock_service_is_up):
+        test_container = utils.get_test_container()
+        test_container_obj = objects.Container(self.context, **test_container)
+        test_service = utils.get_test_zun_service(host="fake_host")
+        test_service_obj = objects.ZunService(self.context, **test_service)
+        mock_list.return_value = [test_service_obj]
+        mock_service_is_up.return_value = False
+        self.assertRaises(exception.ComputeHostNotUp,
+                          self.compute_rpcapi.container_show_many,
+                          self.context, "fake_host", [test_container_obj])
+        self.assertFalse(mock_rpc_call.called)
+
+    @mock.patch('zun.api.servicegroup.ServiceGroup.service_is_up')
+    @mock.patch('zun.objects.ZunService.list_by_binary')
+    @mock.patch('zun.common.rpc_service.API._call')
+    def test_container_show_many(self, mock_rpc_call, mock_list,
+                                 mock_service_is_up):
+        test_container = utils.get_test_container()
+        test_container_obj = objects.Container(self.context, **test_container)
+        test_service = utils.get_test_zun_service(host="fake_host")
+        test_service_obj = objects.ZunService(self.context, **test_service)
+        mock_list.return_value = [test_service_obj]
+        mock_service_is_up.return_value = True
+        self.compute_rpcapi.container_show_many(
+            self.context, "fake_host", [test_container_obj])
+        mock_rpc_call.assert_called_once_with(
+            self.context, "fake_host", 'container_show_many',
+            containers=[test_container_obj])
+
+    @mock.patch('zun.api.servicegroup.ServiceGroup.service_is_up')
+    @mock.patch('zun.objects.ZunService.list_by_binary')
+    @mock.patch('zun.common.rpc_service.API._call')
+    def test_container_show_caches_liveness(self, mock_rpc_call, mock_list,
+                                            mock_service_is_up):
+        test_container = utils.get_test_container(host="fake_host")
+        test_container_obj = objects.Container(self.context, **test_container)
+        test_service = utils.get_test_zun_service(host="fake_host")
+        test_service_obj = objects.ZunService(self.context, **test_service)
+        mock_list.return_value = [test_service_obj]
+        mock_service_is_up.return_value = True
+        for i in range(3):
+            self.compute_rpcapi.container_show(self.context,
+                                               test_container_obj)
+        self.assertEqual(3, mock_rpc_call.call_count)
+        mock_list.assert_called_once_with(self.context, 'zun-compute')
+
+    @mock.patch('zun.common.rpc_service.API._cast')
+    def test_container_create_many(self, mock_rpc_cast):
+        test_container = utils.get_test_container()
+        test_container_obj = objects.Container(self.context, **test_container)
+        self.compute_rpcapi.container_create_many(
+            self.context, "fake_host", [test_container_obj], True)
+        mock_rpc_cast.assert_called_once_with(
+            self.context, "fake_host", 'container_create_many',
+            containers=[test_container_obj], run=True)
@@ -10,16 +10,22 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
 from docker import errors
 import mock
 
+from oslo_utils import timeutils
 from oslo_utils import units
+from oslo_utils import uuidutils
 
 from zun.common import consts
 from zun import conf
+from zun.container.docker import cpu_ledger
 from zun.container.docker.driver import DockerDriver
 from zun.container.docker.driver import NovaDockerDriver
 from zun.container.docker import utils as docker_utils
+from zun.network import neutron as neutron_api
 from zun import objects
 from zun.tests.unit.container import base
 from zun.tests.unit.objects import utils as obj_utils
@@ -65,6 +71,8 @@ class TestDockerDriver(base.DriverTestCase):
         self.mock_docker.get_image = mock.Mock()
         self.driver.get_image(name='image_name')
         self.mock_docker.get_image.assert_called_once_with('image_name')
+        # The client is held until the image is read
+        self.dfc_context_manager.__exit__.assert_not_called()
 
     def test_load_image(self):
         self.mock_docker.load_image = mock.Mock()
@@ -79,6 +87,28 @@ class TestDockerDriver(base.DriverTestCase):
         self.driver.images(repo='test')
         self.mock_docker.images.assert_called_once_with('test', False)
 
+    @mock.patch('zun.objects.container.Container.save')
+    def test_create_with_one_pooled_client(self, mock_save):
+        self.mock_docker.create_container.return_value = {'Id': 'val1'}
+        pool = docker_utils.DockerClientPool(1)
+        pool.create = mock.Mock(return_value=self.mock_docker)
+        self.mock_docker.healthy = True
+        self.mock_docker.last_used = None
+        self.dfc_context_manager.__enter__.side_effect = pool.get
+        self.dfc_context_manager.__exit__.side_effect = (
+            lambda *args: pool.put(self.mock_docker))
+
+        def _get_addresses(context, container):
+            # The client of the create was given back to the pool
+            self.assertEqual(1, pool.free())
+            return {}
+
+        with mock.patch.object(self.driver, 'get_addresses',
+                               side_effect=_get_addresses):
+            self.driver.create(self.context, self.mock_default_container,
+                               'test_sandbox', {'path': ''})
+        self.assertEqual(1, pool.free())
+
     @mock.patch('zun.objects.container.Container.save')
     def test_create_image_path_is_none(self, mock_save):
         self.mock_docker.create_host_config = mock.Mock(
@@ -152,21 +182,79 @@ class TestDockerDriver(base.DriverTestCase):
         self.driver.list(self.context)
         self.mock_docker.list_containers.assert_called_once_with()
 
-    @mock.patch('zun.objects.container.Container.save')
-    def test_update_containers_states(self, mock_save):
+    @mock.patch('zun.objects.container.Container.save_all')
+    def test_update_containers_states(self, mock_save_all):
+        mock_container = obj_utils.get_test_container(
+            self.context, status='Running', host='host2')
+        conf.CONF.set_override('host', 'host2')
+        self.mock_docker.list_containers.return_value = [
+            {'Id': mock_container.container_id, 'State': 'exited',
+             'Names': ['/zun-' + mock_container.uuid]}]
+        self.driver.update_containers_states(self.context, [mock_container])
+        self.assertEqual(mock_container.status, 'Stopped')
+        mock_save_all.assert_called_once_with(self.context, [mock_container])
+
+    @mock.patch('zun.objects.container.Container.save_all')
+    @mock.patch('zun.objects.container.Container.get_by_uuid')
+    def test_update_containers_states_host_changed(self, mock_get,
+                                                   mock_save_all):
         mock_container = obj_utils.get_test_container(
             self.context, status='Running', host='host1')
-        mock_container_2 = obj_utils.get_test_container(
-            self.context, status='Stopped')
+        mock_get.return_value = mock_container
+        conf.CONF.set_override('host', 'host2')
+        self.mock_docker.list_containers.return_value = [
+            {'Id': mock_container.container_id, 'State': 'running',
+             'Names': ['/zun-' + mock_container.uuid]}]
+        self.driver.update_containers_states(self.context, [])
+        mock_get.assert_called_once_with(self.context, mock_container.uuid)
+        self.assertEqual(mock_container.host, 'host2')
+        self.assertEqual(mock_container.status, 'Running')
+        mock_save_all.assert_called_once_with(self.context, [mock_container])
+
+    @mock.patch('zun.objects.container.Container.save_all')
+    @mock.patch('zun.container.docker.driver.DockerDriver.get_addresses_many')
+    def test_update_containers_states_addresses(self, mock_get_addresses,
+                                                mock_save_all):
+        containers = [
+            obj_utils.get_test_container(
+                self.context, uuid=uuidutils.generate_uuid(),
+                container_id=container_id, status='Running', host='host2',
+                addresses=addresses, meta={'sandbox_id': 'sandbox'})
+            for container_id, addresses in (('c1', None), ('c2', {}),
+                                            ('c3', {'private': []}))]
+        conf.CONF.set_override('host', 'host2')
+        self.mock_docker.list_containers.return_value = [
+            {'Id': container.container_id, 'State': 'running',
+             'Names': ['/zun-' + container.uuid]}
+            for container in containers]
+        mock_get_addresses.return_value = {
+            containers[0].uuid: {'private': [{'addr': '10.0.0.1'}]},
+            containers[1].uuid: {}}
+        self.driver.update_containers_states(self.context, containers)
+        # The addresses are resolved in a single call
+        mock_get_addresses.assert_called_once_with(self.context,
+                                                   containers[:2])
+        self.assertEqual({'private': [{'addr': '10.0.0.1'}]},
+                         containers[0].addresses)
+        mock_save_all.assert_called_once_with(self.context, containers[:1])
+
+    @mock.patch('zun.objects.container.Container.save_all')
+    @mock.patch('zun.container.docker.driver.DockerDriver.get_addresses_many')
+    def test_update_containers_states_addresses_failed(self,
+                                                       mock_get_addresses,
+                                                       mock_save_all):
+        container = obj_utils.get_test_container(
+            self.context, status='Stopped', host='host2', addresses=None,
+            meta={'sandbox_id': 'sandbox'})
         conf.CONF.set_override('host', 'host2')
-        with mock.patch.object(self.driver, 'list') as mock_list:
-            mock_list.return_value = [mock_container_2]
-            self.assertEqual(mock_container.host, 'host1')
-            self.assertEqual(mock_container.status, 'Running')
-            self.driver.update_containers_states(
-                self.context, [mock_container])
-            self.assertEqual(mock_container.host, 'host2')
-            self.assertEqual(mock_container.status, 'Stopped')
+        self.mock_docker.list_containers.return_value = [
+            {'Id': container.container_id, 'State': 'running',
+             'Names': ['/zun-' + container.uuid]}]
+        mock_get_addresses.side_effect = Exception('neutron is down')
+        self.driver.update_containers_states(self.context, [container])
+        # The state is synced even though the addresses can't be resolved
+        self.assertEqual('Running', container.status)
+        mock_save_all.assert_called_once_with(self.context, [container])
 
     def test_show_success(self):
         self.mock_docker.inspect_container = mock.Mock(
@@ -207,6 +295,78 @@ class TestDockerDriver(base.DriverTestCase):
                 mock_container.container_id)
             self.assertEqual(1, mock_init.call_count)
 
+    def test_show_many(self):
+        mock_container = obj_utils.get_test_container(
+            self.context, status=consts.STOPPED)
+        mock_container_2 = obj_utils.get_test_container(
+            self.context, container_id='missing', status=consts.RUNNING)
+        self.mock_docker.list_containers.return_value = [
+            {'Id': mock_container.container_id, 'State': 'running'}]
+        result = self.driver.show_many([mock_container, mock_container_2])
+        self.mock_docker.list_containers.assert_called_once_with()
+        self.mock_docker.inspect_container.assert_not_called()
+        self.assertEqual(consts.RUNNING, result[0].status)
+        self.assertEqual(consts.ERROR, result[1].status)
+
+    def test_show_many_status_detail(self):
+        mock_container = obj_utils.get_test_container(self.context)
+        self.mock_docker.list_containers.return_value = [
+            {'Id': mock_container.container_id, 'State': 'paused',
+             'Status': 'Up 2 hours (Paused)'}]
+        result = self.driver.show_many([mock_container])
+        self.assertEqual(consts.PAUSED, result[0].status)
+        self.assertEqual('Up 2 hours (paused)', result[0].status_detail)
+
+        self.mock_docker.list_containers.return_value = [
+            {'Id': mock_container.container_id, 'State': 'exited',
+             'Status': 'Exited (137) 5 minutes ago'}]
+        result = self.driver.show_many([mock_container])
+        self.assertEqual(consts.STOPPED, result[0].status)
+        self.assertEqual('Exited(137) 5 minutes ago ',
+                         result[0].status_detail)
+
+    def test_show_many_ports(self):
+        mock_container = obj_utils.get_test_container(self.context,
+                                                      ports=[80])
+        self.mock_docker.list_containers.return_value = [
+            {'Id': mock_container.container_id, 'State': 'running',
+             'Ports': [{'PrivatePort': 8080, 'Type': 'tcp'}]}]
+        result = self.driver.show_many([mock_container])
+        self.assertEqual([8080], result[0].ports)
+
+        # The listing has no ports for the containers which aren't running
+        for state in ('exited', 'created'):
+            self.mock_docker.list_containers.return_value = [
+                {'Id': mock_container.container_id, 'State': state,
+                 'Ports': []}]
+            result = self.driver.show_many([mock_container])
+            self.assertEqual([8080], result[0].ports)
+
+    def test_show_many_matches_show(self):
+        started_at = (timeutils.utcnow() - datetime.timedelta(minutes=3))
+        self.mock_docker.inspect_container.return_value = {
+            'State': {'Running': True, 'Paused': False, 'Error': '',
+                      'StartedAt': started_at.strftime('%Y-%m-%dT%H:%M:%S'),
+                      'FinishedAt': '0001-01-01T00:00:00Z'},
+            'Config': {'Hostname': 'testhost',
+                       'ExposedPorts': {'80/tcp': {}}}}
+        self.mock_docker.list_containers.return_value = [
+            {'Id': 'ddcb39a3fcec', 'State': 'running',
+             'Status': 'Up 3 minutes',
+             'Ports': [{'PrivatePort': 80, 'Type': 'tcp'}]}]
+        values = {'container_id': 'ddcb39a3fcec', 'status': consts.STOPPED,
+                  'status_detail': None, 'hostname': 'testhost',
+                  'ports': [80]}
+        shown = self.driver.show(
+            obj_utils.get_test_container(self.context, **values))
+        shown_many = self.driver.show_many(
+            [obj_utils.get_test_container(self.context, **values)])[0]
+        for field in ('status', 'hostname', 'ports'):
+            self.assertEqual(getattr(shown, field),
+                             getattr(shown_many, field))
+        self.assertEqual('Up 3 mins', shown.status_detail)
+        self.assertEqual('Up 3 minutes', shown_many.status_detail)
+
     def test_reboot(self):
         self.mock_docker.restart = mock.Mock()
         mock_container = mock.MagicMock()
@@ -381,6 +541,46 @@ class TestDockerDriver(base.DriverTestCase):
             'kubernetes/pause', name=sandbox_name, hostname=sandbox_name[:63])
         self.assertEqual(result_sandbox_id, 'val1')
 
+    @mock.patch('zun.container.docker.sandbox_pool.SandboxPool.claim')
+    @mock.patch('zun.container.docker.driver.DockerDriver.get_sandbox_name')
+    def test_create_sandbox_from_pool(self, mock_get_sandbox_name,
+                                      mock_claim):
+        CONF.set_override('sandbox_pool_size', 2, group='docker')
+        mock_get_sandbox_name.return_value = 'my_test_sandbox'
+        mock_claim.return_value = 'pooled'
+        with mock.patch.object(self.driver, '_get_available_network') as \
+                mock_get_network:
+            mock_get_network.return_value = {'id': 'net-id'}
+            result_sandbox_id = self.driver.create_sandbox(
+                self.context, mock.MagicMock(), 'kubernetes/pause')
+        self.assertEqual('pooled', result_sandbox_id)
+        self.assertEqual(('fake_project', 'kubernetes/pause', 'net-id'),
+                         mock_claim.call_args[0][0])
+        self.mock_docker.rename.assert_called_once_with('pooled',
+                                                        'my_test_sandbox')
+        self.mock_docker.create_container.assert_not_called()
+
+    @mock.patch('zun.container.docker.sandbox_pool.SandboxPool.release')
+    @mock.patch('zun.container.docker.sandbox_pool.SandboxPool.claim')
+    @mock.patch('zun.network.kuryr_network.KuryrNetwork'
+                '.connect_container_to_network')
+    @mock.patch('zun.container.docker.driver.DockerDriver.get_sandbox_name')
+    def test_create_sandbox_pool_rename_failed(self, mock_get_sandbox_name,
+                                               mock_connect, mock_claim,
+                                               mock_release):
+        CONF.set_override('sandbox_pool_size', 2, group='docker')
+        mock_get_sandbox_name.return_value = 'my_test_sandbox'
+        mock_claim.return_value = 'pooled'
+        self.mock_docker.rename.side_effect = errors.APIError(
+            'Conflict', mock.MagicMock(status_code=409), 'name in use')
+        self.mock_docker.create_container = mock.Mock(
+            return_value={'Id': 'val1'})
+        with mock.patch.object(self.driver, '_get_available_network'):
+            result_sandbox_id = self.driver.create_sandbox(
+                self.context, mock.MagicMock(), 'kubernetes/pause')
+        self.assertEqual('val1', result_sandbox_id)
+        mock_release.assert_called_once_with('pooled')
+
     def test_delete_sandbox(self):
         self.mock_docker.remove_container = mock.Mock()
         self.driver.delete_sandbox(context=self.context,
@@ -433,9 +633,11 @@ class TestDockerDriver(base.DriverTestCase):
         mock_port_id = 'f17d93cf-28e1-4a85-957d-8de8c3f91dfe'
         mock_net_name = 'test_net'
         mock_list_ports = mock_neutron_client.return_value.list_ports
-        mock_list_ports.return_value = {'ports': [{'id': mock_port_id}]}
-        mock_show_network = mock_neutron_client.return_value.show_network
-        mock_show_network.return_value = {'network': {'name': mock_net_name}}
+        mock_list_ports.return_value = {'ports': [
+            {'id': mock_port_id, 'mac_address': 'fa:16:3e:85:e7:d5'}]}
+        mock_list_networks = mock_neutron_client.return_value.list_networks
+        mock_list_networks.return_value = {'networks': [
+            {'id': 'default', 'name': mock_net_name}]}
         mock_get_sandbox_id.return_value = 'test_sandbox_id'
         self.mock_docker.inspect_container = mock.Mock(
             return_value={'NetworkSettings': {'Networks': {'default': {
@@ -453,6 +655,90 @@ class TestDockerDriver(base.DriverTestCase):
             {'addr': 'fe80::4', 'version': 6, 'port': mock_port_id}]}
         self.assertEqual(expected_addresses, result_addresses)
 
+    @mock.patch('zun.common.clients.OpenStackClients.neutron')
+    def test_get_addresses_many(self, mock_neutron_client):
+        mock_list_ports = mock_neutron_client.return_value.list_ports
+        mock_list_ports.return_value = {'ports': [
+            {'id': 'port1', 'mac_address': 'fa:16:3e:00:00:01'},
+            {'id': 'port2', 'mac_address': 'fa:16:3e:00:00:02'}]}
+        mock_list_networks = mock_neutron_client.return_value.list_networks
+        mock_list_networks.return_value = {'networks': [
+            {'id': 'net1', 'name': 'private'}]}
+        sandboxes = {
+            'sandbox1': {'net1-fake_project': {
+                'IPAddress': '10.0.0.1', 'GlobalIPv6Address': '',
+                'MacAddress': 'fa:16:3e:00:00:01'}},
+            'sandbox2': {'net1-fake_project': {
+                'IPAddress': '10.0.0.2', 'GlobalIPv6Address': '',
+                'MacAddress': 'fa:16:3e:00:00:02'},
+                'net2-fake_project': {
+                'IPAddress': '10.1.0.2', 'GlobalIPv6Address': '',
+                'MacAddress': 'fa:16:3e:00:00:03'}},
+        }
+        self.mock_docker.inspect_container = mock.Mock(
+            side_effect=lambda sandbox_id: {
+                'NetworkSettings': {'Networks': sandboxes[sandbox_id]}})
+        containers = [mock.MagicMock(uuid='uuid1',
+                                     meta={'sandbox_id': 'sandbox1'}),
+                      mock.MagicMock(uuid='uuid2',
+                                     meta={'sandbox_id': 'sandbox2'})]
+        result = self.driver.get_addresses_many(self.context, containers)
+
+        self.assertEqual('port1', result['uuid1']['private'][0]['port'])
+        self.assertEqual('10.0.0.2', result['uuid2']['private'][0]['addr'])
+        self.assertEqual('port2', result['uuid2']['private'][0]['port'])
+        self.assertEqual(['private'], list(result['uuid2']))
+        self.assertEqual(1, mock_list_networks.call_count)
+        self.assertEqual(['net1', 'net2'], sorted(
+            mock_list_networks.call_args[1]['id']))
+        self.assertEqual(1, mock_list_ports.call_count)
+        self.assertEqual(['fa:16:3e:00:00:01', 'fa:16:3e:00:00:02'], sorted(
+            mock_list_ports.call_args[1]['mac_address']))
+
+    @mock.patch('zun.common.clients.OpenStackClients.neutron')
+    @mock.patch('zun.container.docker.driver.DockerDriver.get_sandbox_id')
+    def test_get_addresses_caches_network_names(self, mock_get_sandbox_id,
+                                                mock_neutron_client):
+        mock_list_ports = mock_neutron_client.return_value.list_ports
+        mock_list_ports.return_value = {'ports': []}
+        mock_list_networks = mock_neutron_client.return_value.list_networks
+        mock_list_networks.return_value = {'networks': [
+            {'id': 'net1', 'name': 'private'}]}
+        mock_get_sandbox_id.return_value = 'test_sandbox_id'
+        self.mock_docker.inspect_container = mock.Mock(
+            return_value={'NetworkSettings': {'Networks': {
+                'net1-fake_project': {'IPAddress': '10.0.0.1',
+                                      'MacAddress': 'fa:16:3e:00:00:01'}}}})
+        for i in range(2):
+            result_addresses = self.driver.get_addresses(
+                self.context, mock.MagicMock())
+            self.assertEqual('', result_addresses['private'][0]['port'])
+        self.assertEqual(1, mock_list_networks.call_count)
+        self.assertEqual(2, mock_list_ports.call_count)
+
+    def test_get_network_names_per_project(self):
+        neutron = mock.Mock()
+        neutron.list_networks.return_value = {'networks': [
+            {'id': 'net1', 'name': 'private'}]}
+        for project_id in ('project1', 'project2', 'project1'):
+            self.assertEqual({'net1': 'private'},
+                             neutron_api.get_network_names(
+                                 neutron, project_id, ['net1']))
+        self.assertEqual(2, neutron.list_networks.call_count)
+
+    @mock.patch.object(neutron_api, 'NETWORK_NAME_CACHE_SIZE', 1)
+    def test_get_network_names_evicts(self):
+        neutron = mock.Mock()
+        neutron.list_networks.side_effect = lambda id, fields: {
+            'networks': [{'id': network_id, 'name': network_id}
+                         for network_id in id]}
+        neutron_api.get_network_names(neutron, 'project1', ['net1'])
+        neutron_api.get_network_names(neutron, 'project1', ['net2'])
+        self.assertEqual([('project1', 'net2')],
+                         list(neutron_api._network_names))
+        neutron_api.get_network_names(neutron, 'project1', ['net1'])
+        self.assertEqual(3, neutron.list_networks.call_count)
+
     def test_execute_resize(self):
         self.mock_docker.exec_resize = mock.Mock()
         fake_exec_id = 'fake_id'
@@ -485,7 +771,8 @@ class TestDockerDriver(base.DriverTestCase):
         self.assertEqual('3.10.0-123', kernel_version)
         self.assertEqual({"dev.type": "product"}, labels)
 
-    def test_get_cpu_used(self):
+    @mock.patch.object(cpu_ledger, 'LEDGER', new_callable=cpu_ledger.CpuLedger)
+    def test_get_cpu_used(self, mock_ledger):
         self.mock_docker.containers = mock.Mock()
         self.mock_docker.containers.return_value = [{'Id': '123456'}]
         self.mock_docker.inspect_container = mock.Mock()
@@ -496,6 +783,42 @@ class TestDockerDriver(base.DriverTestCase):
         cpu_used = self.driver.get_cpu_used()
         self.assertEqual(1.0, cpu_used)
 
+    def test_get_container_uuids(self):
+        self.mock_docker.list_containers.return_value = [
+            {'Id': '1', 'Names': ['/zun-fake-uuid']},
+            {'Id': '2', 'Names': ['/zun-sandbox-fake-uuid']},
+            {'Id': '3', 'Names': ['/other']}]
+        self.assertEqual(['fake-uuid'], self.driver.get_container_uuids())
+
+    @mock.patch.object(cpu_ledger, 'LEDGER', new_callable=cpu_ledger.CpuLedger)
+    def test_get_cpu_used_from_ledger(self, mock_ledger):
+        mock_ledger.set('123456', 0.5)
+        self.mock_docker.containers = mock.Mock()
+        self.mock_docker.containers.return_value = [{'Id': '123456'},
+                                                    {'Id': '654321'}]
+        self.mock_docker.inspect_container = mock.Mock()
+        self.mock_docker.inspect_container.return_value = {
+            'HostConfig': {'CpuPeriod': 100000,
+                           'CpuQuota': 200000}}
+        self.assertEqual(2.5, self.driver.get_cpu_used())
+        self.mock_docker.inspect_container.assert_called_once_with('654321')
+
+        self.mock_docker.inspect_container.reset_mock()
+        self.assertEqual(2.5, self.driver.get_cpu_used())
+        self.assertFalse(self.mock_docker.inspect_container.called)
+
+    @mock.patch.object(cpu_ledger, 'LEDGER', new_callable=cpu_ledger.CpuLedger)
+    def test_get_cpu_used_resync_ledger(self, mock_ledger):
+        self.config(cpu_ledger_sync_interval=0, group='docker')
+        mock_ledger.set('123456', 0.5)
+        self.mock_docker.containers = mock.Mock()
+        self.mock_docker.containers.return_value = [{'Id': '123456'}]
+        self.mock_docker.inspect_container = mock.Mock()
+        self.mock_docker.inspect_container.return_value = {
+            'HostConfig': {'CpuPeriod': 100000,
+                           'CpuQuota': 100000}}
+        self.assertEqual(1.0, self.driver.get_cpu_used())
+
 
 class TestNovaDockerDriver(base.DriverTestCase):
     def setUp(self):
@@ -589,6 +912,8 @@ class TestNovaDockerDriver(base.DriverTestCase):
             'test_test_server_name')
         self.assertEqual(result_address, 'test_address')
 
+    @mock.patch(
+        'zun.container.docker.driver.DockerDriver.get_container_uuids')
     @mock.patch('oslo_concurrency.processutils.execute')
     @mock.patch('zun.container.driver.ContainerDriver.get_host_mem')
     @mock.patch(
@@ -596,7 +921,7 @@ class TestNovaDockerDriver(base.DriverTestCase):
     @mock.patch(
         'zun.container.docker.driver.DockerDriver.get_cpu_used')
     def test_get_available_resources(self, mock_cpu_used, mock_info, mock_mem,
-                                     mock_output):
+                                     mock_output, mock_uuids):
         self.driver = DockerDriver()
         mock_output.return_value = LSCPU_ON
         conf.CONF.set_override('floating_cpu_set', "0")
@@ -605,6 +930,7 @@ class TestNovaDockerDriver(base.DriverTestCase):
                                   'CentOS', '3.10.0-123',
                                   {'dev.type': 'product'})
         mock_cpu_used.return_value = 1.0
+        mock_uuids.return_value = ['fake-uuid']
         node_obj = objects.ComputeNode()
         self.driver.get_available_resources(node_obj)
         self.assertEqual(_numa_topo_spec, node_obj.numa_topology.to_list())
@@ -622,3 +948,4 @@ class TestNovaDockerDriver(base.DriverTestCase):
         self.assertEqual('CentOS', node_obj.os)
         self.assertEqual('3.10.0-123', node_obj.kernel_version)
         self.assertEqual({'dev.type': 'product'}, node_obj.labels)
+        self.assertEqual(['fake-uuid'], node_obj.container_uuids)
@@ -0,0 +1,138 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import time
+
+import mock
+
+from zun.common import consts
+from zun.common import exception
+from zun.container.docker.driver import DockerDriver
+from zun.container.docker import event_watcher
+from zun.container.docker import utils as docker_utils
+from zun.tests.unit.container import base
+from zun.tests.unit.objects import utils as obj_utils
+
+
+class TestDockerEventWatcher(base.DriverTestCase):
+    def setUp(self):
+        super(TestDockerEventWatcher, self).setUp()
+        self.watcher = event_watcher.DockerEventWatcher(DockerDriver())
+        self.container = obj_utils.get_test_container(
+            self.context, status=consts.RUNNING)
+        self.container.obj_reset_changes()
+        get_patcher = mock.patch('zun.objects.Container.get_by_uuid')
+        self.mock_get = get_patcher.start()
+        self.mock_get.return_value = self.container
+        self.addCleanup(get_patcher.stop)
+
+    def _event(self, action, name=None, container_id=None, **attributes):
+        attributes['name'] = name or 'zun-' + self.container.uuid
+        return {
+            'Type': 'container',
+            'Action': action,
+            'Actor': {
+                'ID': container_id or self.container.container_id,
+                'Attributes': attributes,
+            },
+            'time': int(time.time()),
+            'timeNano': int(time.time() * 10 ** 9),
+        }
+
+    @mock.patch('zun.objects.Container.save')
+    def test_process_event_die(self, mock_save):
+        self.watcher.process_event(self.context,
+                                   self._event('die', exitCode='137'))
+        self.mock_get.assert_called_once_with(self.context,
+                                              self.container.uuid)
+        self.assertEqual(consts.STOPPED, self.container.status)
+        self.assertTrue(self.container.status_detail.startswith('Exited(137)'))
+        mock_save.assert_called_once_with(self.context)
+
+    @mock.patch('zun.objects.Container.save')
+    def test_process_event_pause(self, mock_save):
+        self.watcher.process_event(self.context, self._event('pause'))
+        self.assertEqual(consts.PAUSED, self.container.status)
+        mock_save.assert_called_once_with(self.context)
+
+    @mock.patch('zun.objects.Container.save')
+    def test_process_event_unchanged(self, mock_save):
+        self.container.status_detail = None
+        self.container.obj_reset_changes()
+        self.watcher.process_event(self.context, self._event('unpause'))
+        mock_save.assert_not_called()
+
+    @mock.patch('zun.objects.Container.save')
+    def test_process_event_destroy_while_deleting(self, mock_save):
+        self.container.task_state = consts.CONTAINER_DELETING
+        self.container.obj_reset_changes()
+        self.watcher.process_event(self.context, self._event('destroy'))
+        self.assertEqual(consts.RUNNING, self.container.status)
+        mock_save.assert_not_called()
+
+    @mock.patch('zun.objects.Container.save')
+    def test_process_event_destroy(self, mock_save):
+        self.watcher.process_event(self.context, self._event('destroy'))
+        self.assertEqual(consts.ERROR, self.container.status)
+        mock_save.assert_called_once_with(self.context)
+
+    def test_process_event_ignore_sandbox(self):
+        self.watcher.process_event(
+            self.context,
+            self._event('die', name='zun-sandbox-' + self.container.uuid))
+        self.mock_get.assert_not_called()
+
+    def test_process_event_ignore_unknown_action(self):
+        self.watcher.process_event(self.context, self._event('attach'))
+        self.mock_get.assert_not_called()
+
+    @mock.patch('zun.objects.Container.save')
+    def test_process_event_container_id_mismatch(self, mock_save):
+        self.watcher.process_event(
+            self.context, self._event('die', container_id='other'))
+        mock_save.assert_not_called()
+
+    def test_process_event_container_not_found(self):
+        self.mock_get.side_effect = exception.ContainerNotFound(
+            container=self.container.uuid)
+        self.watcher.process_event(self.context, self._event('die'))
+
+    @mock.patch.object(event_watcher.DockerEventWatcher, 'process_event')
+    @mock.patch.object(docker_utils, 'docker_client')
+    def test_watch_resumes_from_last_event(self, mock_client,
+                                           mock_process_event):
+        mock_docker = mock.MagicMock()
+        mock_client.return_value.__enter__.return_value = mock_docker
+        event = self._event('start')
+        mock_docker.events.return_value = iter([event])
+        self.watcher.watch()
+        self.assertEqual(1, mock_process_event.call_count)
+
+        mock_docker.events.return_value = iter([])
+        self.watcher.watch()
+        mock_docker.events.assert_called_with(
+            since='%d.%09d' % divmod(event['timeNano'], 10 ** 9),
+            filters={'type': 'container'}, decode=True)
+
+    @mock.patch.object(event_watcher.DockerEventWatcher, 'process_event')
+    def test_consume_skips_redelivered_events(self, mock_process_event):
+        start = self._event('start')
+        die = self._event('die')
+        die['timeNano'] = start['timeNano'] + 1
+        self.watcher.consume(self.context, [start, die])
+        # Docker sends the events of the time it resumes from again
+        restart = self._event('restart')
+        restart['timeNano'] = die['timeNano']
+        self.watcher.consume(self.context, [die, restart])
+        self.assertEqual([start, die, restart],
+                         [c[0][1] for c in
+                          mock_process_event.call_args_list])
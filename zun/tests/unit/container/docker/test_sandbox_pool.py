@@ -0,0 +1,100 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+
+import mock
+from oslo_utils import timeutils
+
+from zun import conf
+from zun.container.docker import sandbox_pool
+from zun.container.docker import utils as docker_utils
+from zun.tests.unit.container import base
+
+CONF = conf.CONF
+
+KEY = ('fake_project', 'kubernetes/pause', 'net-id')
+
+
+class TestSandboxPool(base.DriverTestCase):
+    def setUp(self):
+        super(TestSandboxPool, self).setUp()
+        CONF.set_override('sandbox_pool_size', 2, group='docker')
+        self.driver = mock.MagicMock()
+        self.driver._create_sandbox.side_effect = ['sb1', 'sb2', 'sb3']
+        self.pool = sandbox_pool.SandboxPool(self.driver)
+        # Run the background tasks inline
+        p = mock.patch('zun.common.utils.spawn_n',
+                       side_effect=lambda func, *args: func(*args))
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_claim_fills_the_pool(self):
+        self.assertIsNone(self.pool.claim(KEY, ['net']))
+        self.assertEqual(2, self.pool.size(KEY))
+        self.driver._create_sandbox.assert_called_with(
+            mock.ANY, mock.ANY, 'kubernetes/pause', ['net'])
+        ctx, name = self.driver._create_sandbox.call_args[0][:2]
+        self.assertTrue(ctx.is_admin)
+        self.assertEqual('fake_project', ctx.project_id)
+        self.assertTrue(name.startswith(sandbox_pool.POOL_SANDBOX_PREFIX))
+
+        self.assertEqual('sb1', self.pool.claim(KEY, ['net']))
+        self.assertEqual(2, self.pool.size(KEY))
+        self.assertEqual(3, self.driver._create_sandbox.call_count)
+
+    def test_fill_failure(self):
+        self.driver._create_sandbox.side_effect = Exception('boom')
+        self.assertIsNone(self.pool.claim(KEY, ['net']))
+        self.assertEqual(0, self.pool.size(KEY))
+        self.assertEqual(set(), self.pool._filling)
+
+    def test_claim_skips_expired_sandboxes(self):
+        self.pool.claim(KEY, ['net'])
+        self.pool._sandboxes[KEY][0] = (
+            'sb1', timeutils.utcnow() - datetime.timedelta(seconds=3600))
+        self.assertEqual('sb2', self.pool.claim(KEY, ['net']))
+        self.driver.delete_sandbox.assert_called_once_with(mock.ANY, 'sb1')
+
+    def test_expire_unclaimed_key(self):
+        self.pool.claim(KEY, ['net'])
+        networks, claimed_at = self.pool._demand[KEY]
+        self.pool._demand[KEY] = (
+            networks, claimed_at - datetime.timedelta(seconds=3600))
+        self.pool.expire()
+        self.assertEqual({}, self.pool._demand)
+        self.assertEqual({}, self.pool._sandboxes)
+        self.assertEqual(2, self.driver.delete_sandbox.call_count)
+
+    def test_expire_keeps_fresh_sandboxes(self):
+        self.pool.claim(KEY, ['net'])
+        self.pool.expire()
+        self.assertEqual(2, self.pool.size(KEY))
+        self.driver.delete_sandbox.assert_not_called()
+
+    @mock.patch.object(docker_utils, 'docker_client')
+    def test_cleanup(self, mock_client):
+        self.pool.claim(KEY, ['net'])
+        mock_docker = mock_client.return_value.__enter__.return_value
+        mock_docker.containers.return_value = [{'Id': 'sb1'},
+                                               {'Id': 'leftover'}]
+        self.pool.cleanup()
+        mock_docker.containers.assert_called_once_with(
+            all=True, filters={'name': sandbox_pool.POOL_SANDBOX_PREFIX})
+        self.driver.delete_sandbox.assert_called_once_with(mock.ANY,
+                                                           'leftover')
+
+    @mock.patch.object(docker_utils, 'docker_client')
+    def test_cleanup_failure(self, mock_client):
+        mock_client.side_effect = Exception('boom')
+        self.pool.cleanup()
+        self.driver.delete_sandbox.assert_not_called()
@@ -0,0 +1,123 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+
+from docker import errors
+import mock
+from oslo_utils import timeutils
+import requests
+
+from zun.common import exception
+from zun.container.docker import utils as docker_utils
+from zun.tests import base
+
+
+class TestDockerClientPool(base.TestCase):
+    def setUp(self):
+        super(TestDockerClientPool, self).setUp()
+        create_patcher = mock.patch.object(docker_utils, '_create_client')
+        self.mock_create = create_patcher.start()
+        self.addCleanup(create_patcher.stop)
+        self.mock_create.side_effect = self._fake_client
+        pool_patcher = mock.patch.object(docker_utils, '_client_pool', None)
+        pool_patcher.start()
+        self.addCleanup(pool_patcher.stop)
+
+    def _fake_client(self):
+        docker = mock.MagicMock()
+        docker.healthy = True
+        docker.last_used = None
+        return docker
+
+    def test_docker_client_reuses_client(self):
+        with docker_utils.docker_client() as docker1:
+            pass
+        with docker_utils.docker_client() as docker2:
+            pass
+        self.assertIs(docker1, docker2)
+        self.assertEqual(1, self.mock_create.call_count)
+        docker1.close.assert_not_called()
+
+    def test_docker_client_not_pooled(self):
+        with docker_utils.docker_client(pooled=False) as docker:
+            pass
+        docker.close.assert_called_once_with()
+        self.assertEqual(0, docker_utils.get_client_pool().current_size)
+
+    def test_docker_client_api_error(self):
+        def _raise_api_error():
+            with docker_utils.docker_client():
+                raise errors.APIError('Error', mock.Mock(status_code=500))
+
+        self.assertRaises(exception.DockerError, _raise_api_error)
+        with docker_utils.docker_client():
+            pass
+        self.assertEqual(1, self.mock_create.call_count)
+
+    def test_docker_client_replaced_after_connection_error(self):
+        def _raise_connection_error():
+            with docker_utils.docker_client():
+                raise requests.exceptions.ConnectionError()
+
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          _raise_connection_error)
+        with docker_utils.docker_client() as docker:
+            pass
+        self.assertEqual(2, self.mock_create.call_count)
+        self.assertTrue(docker.healthy)
+
+    def test_docker_client_health_check(self):
+        self.config(client_health_check_interval=60, group='docker')
+        with docker_utils.docker_client() as docker1:
+            pass
+        docker1.last_used = timeutils.utcnow() - datetime.timedelta(
+            seconds=120)
+        docker1.ping.side_effect = requests.exceptions.ConnectionError()
+        with docker_utils.docker_client() as docker2:
+            pass
+        docker1.ping.assert_called_once_with()
+        docker1.close.assert_called_once_with()
+        self.assertIsNot(docker1, docker2)
+
+    def test_pool_records_wait_time(self):
+        self.config(client_pool_size=1, group='docker')
+        pool = docker_utils.get_client_pool()
+        docker = pool.get()
+        with mock.patch.object(docker_utils.pools.Pool, 'get',
+                               return_value=docker):
+            pool.get()
+        self.assertEqual(1, pool.wait_count)
+
+    def test_open_stream_holds_client_until_read(self):
+        self.mock_create.side_effect = None
+        stream = docker_utils.open_stream('get_image', 'image')
+        docker = self.mock_create.return_value
+        docker.get_image.assert_called_once_with('image')
+        raw = docker.get_image.return_value
+        raw.read.side_effect = [b'data', b'']
+        self.assertEqual(b'data', stream.read(4))
+        docker.close.assert_not_called()
+        self.assertEqual(b'', stream.read(4))
+        docker.close.assert_called_once_with()
+        raw.close.assert_called_once_with()
+        stream.close()
+        docker.close.assert_called_once_with()
+
+    def test_open_stream_api_error(self):
+        self.mock_create.side_effect = None
+        docker = self.mock_create.return_value
+        docker.get_image.side_effect = errors.APIError(
+            'Error', mock.Mock(status_code=500))
+        self.assertRaises(exception.DockerError,
+                          docker_utils.open_stream, 'get_image', 'image')
+        docker.close.assert_called_once_with()
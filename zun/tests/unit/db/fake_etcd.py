@@ -0,0 +1,145 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""An in-memory etcd v2 keyspace with the interface of etcd.Client."""
+
+import etcd
+
+
+class FakeEtcdClient(object):
+
+    def __init__(self):
+        self.etcd_index = 0
+        # key -> (value, createdIndex, modifiedIndex) of the leaf keys, the
+        # directories are implied by the keys under them.
+        self.nodes = {}
+        self.events = []
+        self.reads = []
+
+    def _is_dir(self, key):
+        prefix = key.rstrip('/') + '/'
+        return any(k.startswith(prefix) for k in self.nodes)
+
+    def _node(self, key):
+        value, created, modified = self.nodes[key]
+        return {'key': key, 'value': value, 'createdIndex': created,
+                'modifiedIndex': modified}
+
+    def _dir_node(self, key, recursive, sort):
+        prefix = '' if key == '/' else key.rstrip('/')
+        children = {}
+        for k in self.nodes:
+            if not k.startswith(prefix + '/'):
+                continue
+            child = prefix + '/' + k[len(prefix) + 1:].split('/', 1)[0]
+            if child == k:
+                children[child] = self._node(k)
+            elif recursive:
+                children[child] = self._dir_node(child, recursive, sort)
+            else:
+                children[child] = {'key': child, 'dir': True}
+        nodes = list(children.values())
+        if sort:
+            nodes.sort(key=lambda n: n['key'])
+        return {'key': key, 'dir': True, 'nodes': nodes}
+
+    def _result(self, action, node, prev_node=None):
+        result = etcd.EtcdResult(action, node, prevNode=prev_node)
+        result.etcd_index = self.etcd_index
+        return result
+
+    def read(self, key, recursive=False, sorted=False, wait=False,
+             waitIndex=None, timeout=None):
+        if wait:
+            return self._watch(key, recursive, waitIndex)
+        self.reads.append(key)
+        if key in self.nodes:
+            return self._result('get', self._node(key))
+        if key == '/' or self._is_dir(key):
+            return self._result('get',
+                                self._dir_node(key, recursive, sorted))
+        raise etcd.EtcdKeyNotFound('Key not found : %s' % key)
+
+    def get(self, key):
+        return self.read(key)
+
+    def _watch(self, key, recursive, wait_index):
+        for event in self.events:
+            event_key = event.key
+            if wait_index is not None and event.modifiedIndex < wait_index:
+                continue
+            if event_key == key or (
+                    recursive and event_key.startswith(key.rstrip('/') + '/')):
+                return event
+        raise etcd.EtcdWatchTimedOut('Watch timed out')
+
+    def _record(self, action, node, prev_node=None):
+        event = self._result(action, node, prev_node)
+        event.modifiedIndex = self.etcd_index
+        self.events.append(event)
+        return event
+
+    def write(self, key, value, ttl=None, dir=False, append=False,
+              prevExist=None, prevIndex=None, prevValue=None):
+        if append:
+            key = '%s/%020d' % (key.rstrip('/'), self.etcd_index + 1)
+        if self._is_dir(key):
+            raise etcd.EtcdNotFile('Not a file : %s' % key)
+        exists = key in self.nodes
+        if prevExist is False and exists:
+            raise etcd.EtcdAlreadyExist('Key already exists : %s' % key)
+        compare = prevIndex is not None or prevValue is not None
+        if (prevExist or compare) and not exists:
+            raise etcd.EtcdKeyNotFound('Key not found : %s' % key)
+        prev_node = self._node(key) if exists else None
+        if prevIndex is not None and prev_node['modifiedIndex'] != prevIndex:
+            raise etcd.EtcdCompareFailed('Compare failed : [%s != %s]' % (
+                prevIndex, prev_node['modifiedIndex']))
+        if prevValue is not None and prev_node['value'] != prevValue:
+            raise etcd.EtcdCompareFailed('Compare failed : [%s != %s]' % (
+                prevValue, prev_node['value']))
+
+        self.etcd_index += 1
+        created = prev_node['createdIndex'] if exists else self.etcd_index
+        self.nodes[key] = (value, created, self.etcd_index)
+        if compare:
+            action = 'compareAndSwap'
+        else:
+            action = 'set' if exists else 'create'
+        return self._record(action, self._node(key), prev_node)
+
+    def update(self, obj):
+        return self.write(obj.key, obj.value, prevExist=True,
+                          prevIndex=obj.modifiedIndex)
+
+    def delete(self, key, recursive=None, dir=None, prevIndex=None,
+               prevValue=None):
+        if key in self.nodes:
+            prev_node = self._node(key)
+            if prevIndex not in (None, prev_node['modifiedIndex']):
+                raise etcd.EtcdCompareFailed('Compare failed : [%s != %s]' % (
+                    prevIndex, prev_node['modifiedIndex']))
+            if prevValue not in (None, prev_node['value']):
+                raise etcd.EtcdCompareFailed('Compare failed : [%s != %s]' % (
+                    prevValue, prev_node['value']))
+            del self.nodes[key]
+            self.etcd_index += 1
+            return self._record('delete', {'key': key}, prev_node)
+        if self._is_dir(key):
+            if not recursive:
+                raise etcd.EtcdNotFile('Not a file : %s' % key)
+            prefix = key.rstrip('/') + '/'
+            for k in [k for k in self.nodes if k.startswith(prefix)]:
+                del self.nodes[k]
+            self.etcd_index += 1
+            return self._record('delete', {'key': key, 'dir': True})
+        raise etcd.EtcdKeyNotFound('Key not found : %s' % key)
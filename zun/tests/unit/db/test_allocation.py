@@ -10,6 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
 from oslo_config import cfg
 from oslo_utils import uuidutils
 
@@ -17,6 +18,7 @@ from zun.common import exception
 import zun.conf
 from zun.db import api as dbapi
 from zun.tests.unit.db import base
+from zun.tests.unit.db import fake_etcd
 from zun.tests.unit.db import utils
 
 CONF = zun.conf.CONF
@@ -153,3 +155,88 @@ class DbAllocationTestCase(base.DbTestCase):
         self.assertRaises(exception.AllocationNotFound,
                           dbapi.update_allocation, self.context,
                           allocation_id, {'used': new_used})
+
+
+class EtcdDbAllocationTestCase(DbAllocationTestCase):
+    """Run the tests of the allocations against an in-memory etcd."""
+
+    def setUp(self):
+        super(EtcdDbAllocationTestCase, self).setUp()
+        cfg.CONF.set_override('db_type', 'etcd')
+        self.dbapi = dbapi._get_dbdriver_instance()
+        self.client = fake_etcd.FakeEtcdClient()
+        p = mock.patch.object(self.dbapi, 'client', self.client)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_allocations_of_a_provider_in_one_key(self):
+        for i in range(3):
+            utils.create_test_allocation(
+                resource_provider_id=1, context=self.context,
+                consumer_id=uuidutils.generate_uuid())
+        utils.create_test_inventory(resource_provider_id=1,
+                                    context=self.context)
+        self.assertEqual(['/placement/1'],
+                         [k for k in self.client.nodes
+                          if k.startswith('/placement/')])
+
+    def test_create_allocation_concurrently(self):
+        utils.create_test_allocation(resource_provider_id=1,
+                                     context=self.context)
+        update = self.client.update
+        calls = []
+
+        def _concurrent_update(obj):
+            if obj.key == '/placement/1' and not calls:
+                # Another process allocates from the provider first
+                calls.append(obj)
+                utils.create_test_allocation(
+                    resource_provider_id=1, context=self.context,
+                    consumer_id=uuidutils.generate_uuid())
+            return update(obj)
+
+        with mock.patch.object(self.client, 'update', _concurrent_update):
+            utils.create_test_allocation(
+                resource_provider_id=1, context=self.context,
+                consumer_id=uuidutils.generate_uuid())
+        self.assertEqual(1, len(calls))
+        res = dbapi.list_allocations(
+            self.context, filters={'resource_provider_id': 1})
+        self.assertEqual(3, len(res))
+        self.assertEqual(3, len(set(r.id for r in res)))
+
+    def test_get_allocation_reads_its_provider_only(self):
+        allocation = utils.create_test_allocation(resource_provider_id=1,
+                                                  context=self.context)
+        utils.create_test_allocation(resource_provider_id=2,
+                                     context=self.context)
+        del self.client.reads[:]
+        dbapi.get_allocation(self.context, allocation.id)
+        dbapi.update_allocation(self.context, allocation.id, {'used': 2})
+        self.assertNotIn('/placement', self.client.reads)
+        self.assertNotIn('/placement/2', self.client.reads)
+        self.assertFalse([k for k in self.client.nodes
+                          if k.startswith('/ids')])
+
+    def test_create_allocation_duplicate_id(self):
+        utils.create_test_allocation(id=7, resource_provider_id=1,
+                                     context=self.context)
+        self.assertRaises(exception.UniqueConstraintViolated,
+                          utils.create_test_allocation, id=7,
+                          resource_provider_id=2, context=self.context)
+        self.assertEqual(1, dbapi.get_allocation(
+            self.context, 7).resource_provider_id)
+
+    def test_destroy_allocation_removes_index(self):
+        allocation = utils.create_test_allocation(context=self.context)
+        dbapi.destroy_allocation(self.context, allocation.id)
+        self.assertFalse([k for k in self.client.nodes
+                          if k.startswith('/placement_index/')])
+
+    def test_rebuild_indexes_of_allocations(self):
+        allocation = utils.create_test_allocation(context=self.context)
+        # An allocation written before the placement index existed
+        self.client.delete('/placement_index/allocations/%s' % allocation.id)
+        self.dbapi.rebuild_indexes()
+        res = dbapi.get_allocation(self.context, allocation.id)
+        self.assertEqual(allocation.id, res.id)
@@ -12,6 +12,7 @@
 
 """Tests for manipulating compute nodes via the DB API"""
 
+import mock
 from oslo_config import cfg
 from oslo_utils import uuidutils
 import six
@@ -20,6 +21,7 @@ from zun.common import exception
 import zun.conf
 from zun.db import api as dbapi
 from zun.tests.unit.db import base
+from zun.tests.unit.db import fake_etcd
 from zun.tests.unit.db import utils
 
 CONF = zun.conf.CONF
@@ -159,3 +161,38 @@ class DbComputeNodeTestCase(base.DbTestCase):
         self.assertRaises(exception.InvalidParameterValue,
                           dbapi.update_compute_node, self.context,
                           node.uuid, {'uuid': ''})
+
+
+class EtcdDbComputeNodeTestCase(DbComputeNodeTestCase):
+    """Run the tests of the compute nodes against an in-memory etcd."""
+
+    def setUp(self):
+        super(EtcdDbComputeNodeTestCase, self).setUp()
+        cfg.CONF.set_override('db_type', 'etcd')
+        self.dbapi = dbapi._get_dbdriver_instance()
+        self.client = fake_etcd.FakeEtcdClient()
+        p = mock.patch.object(self.dbapi, 'client', self.client)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_list_compute_nodes_in_one_read(self):
+        for i in range(3):
+            utils.create_test_compute_node(
+                uuid=uuidutils.generate_uuid(), context=self.context,
+                hostname='node' + str(i))
+        del self.client.reads[:]
+        res = dbapi.list_compute_nodes(self.context)
+        self.assertEqual(3, len(res))
+        self.assertEqual(['/compute_nodes'], self.client.reads)
+
+    def test_update_compute_node_hostname(self):
+        node = utils.create_test_compute_node(context=self.context)
+        res = dbapi.update_compute_node(self.context, node.uuid,
+                                        {'hostname': 'new-hostname'})
+        self.assertIsNotNone(res.updated_at)
+        res = dbapi.get_compute_node_by_hostname(self.context,
+                                                 'new-hostname')
+        self.assertEqual(node.uuid, res.uuid)
+        self.assertRaises(exception.ComputeNodeNotFound,
+                          dbapi.get_compute_node_by_hostname,
+                          self.context, node.hostname)
@@ -25,8 +25,8 @@ import zun.conf
 from zun.db import api as dbapi
 from zun.db.etcd.api import EtcdAPI as etcd_api
 from zun.tests.unit.db import base
+from zun.tests.unit.db import fake_etcd
 from zun.tests.unit.db import utils
-from zun.tests.unit.db.utils import FakeEtcdMultipleResult
 from zun.tests.unit.db.utils import FakeEtcdResult
 
 CONF = zun.conf.CONF
@@ -203,6 +203,36 @@ class DbContainerTestCase(base.DbTestCase):
                                      {'image': new_image})
         self.assertEqual(new_image, res.image)
 
+    def test_update_containers(self):
+        container1 = utils.create_test_container(
+            name='container-one', uuid=uuidutils.generate_uuid(),
+            context=self.context)
+        container2 = utils.create_test_container(
+            name='container-two', uuid=uuidutils.generate_uuid(),
+            context=self.context)
+        container3 = utils.create_test_container(
+            name='container-three', uuid=uuidutils.generate_uuid(),
+            context=self.context)
+
+        dbapi.update_containers(self.context, {
+            container1.uuid: {'status': 'Stopped'},
+            container2.uuid: {'status': 'Stopped'},
+            container3.uuid: {'status': 'Running', 'host': 'new-host'}})
+
+        res = dbapi.get_container_by_uuid(self.context, container1.uuid)
+        self.assertEqual('Stopped', res.status)
+        res = dbapi.get_container_by_uuid(self.context, container2.uuid)
+        self.assertEqual('Stopped', res.status)
+        res = dbapi.get_container_by_uuid(self.context, container3.uuid)
+        self.assertEqual('Running', res.status)
+        self.assertEqual('new-host', res.host)
+
+    def test_update_containers_uuid(self):
+        container = utils.create_test_container(context=self.context)
+        self.assertRaises(exception.InvalidParameterValue,
+                          dbapi.update_containers, self.context,
+                          {container.uuid: {'uuid': ''}})
+
     def test_update_container_with_the_same_name(self):
         container1 = utils.create_test_container(
             name='container-one',
@@ -239,6 +269,13 @@ class EtcdDbContainerTestCase(base.DbTestCase):
         cfg.CONF.set_override('db_type', 'etcd')
         super(EtcdDbContainerTestCase, self).setUp()
 
+    def _use_fake_etcd(self):
+        client = fake_etcd.FakeEtcdClient()
+        p = mock.patch.object(self.dbapi, 'client', client)
+        p.start()
+        self.addCleanup(p.stop)
+        return client
+
     @mock.patch.object(etcd_client, 'read')
     @mock.patch.object(etcd_client, 'write')
     def test_create_container(self, mock_write, mock_read):
@@ -252,8 +289,13 @@ class EtcdDbContainerTestCase(base.DbTestCase):
                           group="compute",
                           enforce_type=True)
         mock_read.side_effect = etcd.EtcdKeyNotFound
-        utils.create_test_container(context=self.context)
-        mock_read.side_effect = lambda *args: None
+        container = utils.create_test_container(context=self.context)
+
+        def _write(key, *args, **kwargs):
+            if key == '/containers/' + container.uuid:
+                raise etcd.EtcdAlreadyExist
+
+        mock_write.side_effect = _write
         self.assertRaises(exception.ResourceExists,
                           utils.create_test_container,
                           context=self.context)
@@ -270,17 +312,19 @@ class EtcdDbContainerTestCase(base.DbTestCase):
         self.assertEqual(container.id, res.id)
         self.assertEqual(container.uuid, res.uuid)
 
-    @mock.patch.object(etcd_client, 'read')
-    @mock.patch.object(etcd_client, 'write')
-    def test_get_container_by_name(self, mock_write, mock_read):
-        mock_read.side_effect = etcd.EtcdKeyNotFound
+    def test_get_container_by_name(self):
+        client = self._use_fake_etcd()
         container = utils.create_test_container(context=self.context)
-        mock_read.side_effect = lambda *args: FakeEtcdMultipleResult(
-            [container.as_dict()])
+        utils.create_test_container(context=self.context, name='other',
+                                    uuid=uuidutils.generate_uuid())
+        del client.reads[:]
         res = dbapi.get_container_by_name(
             self.context, container.name)
         self.assertEqual(container.id, res.id)
         self.assertEqual(container.uuid, res.uuid)
+        # One read of the name index and one of the container
+        self.assertEqual(2, len(client.reads))
+        self.assertNotIn('/containers', client.reads)
 
     @mock.patch.object(etcd_client, 'read')
     def test_get_container_that_does_not_exist(self, mock_read):
@@ -290,54 +334,96 @@ class EtcdDbContainerTestCase(base.DbTestCase):
                           self.context,
                           uuidutils.generate_uuid())
 
-    @mock.patch.object(etcd_client, 'read')
-    @mock.patch.object(etcd_client, 'write')
-    def test_list_containers(self, mock_write, mock_read):
+    def test_list_containers(self):
+        self._use_fake_etcd()
         uuids = []
-        containers = []
-        mock_read.side_effect = etcd.EtcdKeyNotFound
         for i in range(1, 6):
             container = utils.create_test_container(
                 uuid=uuidutils.generate_uuid(),
                 context=self.context,
                 name='cont' + str(i))
-            containers.append(container.as_dict())
             uuids.append(six.text_type(container['uuid']))
-        mock_read.side_effect = lambda *args: FakeEtcdMultipleResult(
-            containers)
         res = dbapi.list_containers(self.context)
         res_uuids = [r.uuid for r in res]
         self.assertEqual(sorted(uuids), sorted(res_uuids))
 
-    @mock.patch.object(etcd_client, 'read')
-    @mock.patch.object(etcd_client, 'write')
-    def test_list_containers_sorted(self, mock_write, mock_read):
+    def test_list_containers_sorted(self):
+        self._use_fake_etcd()
         uuids = []
-        containers = []
-        mock_read.side_effect = etcd.EtcdKeyNotFound
         for i in range(5):
             container = utils.create_test_container(
                 uuid=uuidutils.generate_uuid(),
                 context=self.context,
                 name='cont' + str(i))
-            containers.append(container.as_dict())
             uuids.append(six.text_type(container.uuid))
-        mock_read.side_effect = lambda *args: FakeEtcdMultipleResult(
-            containers)
         res = dbapi.list_containers(self.context, sort_key='uuid')
         res_uuids = [r.uuid for r in res]
         self.assertEqual(sorted(uuids), res_uuids)
 
+        res = dbapi.list_containers(self.context, sort_key='uuid',
+                                    sort_dir='desc')
+        self.assertEqual(sorted(uuids, reverse=True), [r.uuid for r in res])
+
+        res = dbapi.list_containers(self.context, sort_key='name',
+                                    sort_dir='desc')
+        self.assertEqual(['cont4', 'cont3', 'cont2', 'cont1', 'cont0'],
+                         [r.name for r in res])
+
         self.assertRaises(exception.InvalidParameterValue,
                           dbapi.list_containers,
                           self.context,
                           sort_key='foo')
 
-    @mock.patch.object(etcd_client, 'read')
-    @mock.patch.object(etcd_client, 'write')
-    def test_list_containers_with_filters(self, mock_write, mock_read):
-        mock_read.side_effect = etcd.EtcdKeyNotFound
+    def _list_pages(self, limit, **kwargs):
+        pages = []
+        marker = None
+        while True:
+            page = dbapi.list_containers(self.context, limit=limit,
+                                         marker=marker, **kwargs)
+            if not page:
+                return pages
+            pages.append([r.uuid for r in page])
+            marker = page[-1]
+
+    def test_list_containers_paginated(self):
+        client = self._use_fake_etcd()
+        uuids = []
+        for i in range(7):
+            container = utils.create_test_container(
+                uuid=uuidutils.generate_uuid(),
+                context=self.context,
+                name='cont' + str(i))
+            uuids.append(container.uuid)
+        uuids.sort()
+
+        self.assertEqual([uuids[0:3], uuids[3:6], uuids[6:]],
+                         self._list_pages(3))
+        self.assertEqual([uuids[::-1][0:3], uuids[::-1][3:6], [uuids[0]]],
+                         self._list_pages(3, sort_dir='desc'))
+
+        # Only the records of the page are read when the filters are
+        # indexed
+        del client.reads[:]
+        dbapi.list_containers(self.context, limit=2,
+                              filters={'host': container.host})
+        self.assertEqual(3, len(client.reads))
+
+    def test_list_containers_paginated_by_image(self):
+        self._use_fake_etcd()
+        uuids = []
+        for i in range(5):
+            container = utils.create_test_container(
+                uuid=uuidutils.generate_uuid(),
+                context=self.context,
+                name='cont' + str(i),
+                image='image' + str(i % 2))
+            uuids.append(container.uuid)
+        pages = self._list_pages(2, sort_key='image')
+        self.assertEqual([2, 2, 1], [len(page) for page in pages])
+        self.assertEqual(sorted(uuids), sorted(sum(pages, [])))
 
+    def test_list_containers_with_filters(self):
+        self._use_fake_etcd()
         container1 = utils.create_test_container(
             name='container-one',
             uuid=uuidutils.generate_uuid(),
@@ -347,9 +433,6 @@ class EtcdDbContainerTestCase(base.DbTestCase):
             uuid=uuidutils.generate_uuid(),
             context=self.context)
 
-        mock_read.side_effect = lambda *args: FakeEtcdMultipleResult(
-            [container1.as_dict(), container2.as_dict()])
-
         res = dbapi.list_containers(
             self.context, filters={'name': 'container-one'})
         self.assertEqual([container1.id], [r.id for r in res])
@@ -367,28 +450,122 @@ class EtcdDbContainerTestCase(base.DbTestCase):
             filters={'name': container1.name})
         self.assertEqual([container1.id], [r.id for r in res])
 
-    @mock.patch.object(etcd_client, 'read')
-    @mock.patch.object(etcd_client, 'write')
-    @mock.patch.object(etcd_client, 'delete')
-    def test_destroy_container(self, mock_delete, mock_write, mock_read):
-        mock_read.side_effect = etcd.EtcdKeyNotFound
+        res = dbapi.list_containers(
+            self.context, filters={'host': container1.host})
+        self.assertEqual(sorted([container1.uuid, container2.uuid]),
+                         sorted([r.uuid for r in res]))
+
+    def test_list_containers_with_filters_after_update(self):
+        self._use_fake_etcd()
+        container = utils.create_test_container(
+            name='container-one', host='host1', context=self.context)
+        dbapi.update_container(self.context, container.uuid,
+                               {'name': 'container-two', 'host': 'host2'})
+
+        res = dbapi.list_containers(
+            self.context, filters={'name': 'container-one'})
+        self.assertEqual([], res)
+        res = dbapi.list_containers(
+            self.context, filters={'host': 'host1'})
+        self.assertEqual([], res)
+        res = dbapi.list_containers(
+            self.context, filters={'name': 'container-two',
+                                   'host': 'host2'})
+        self.assertEqual([container.uuid], [r.uuid for r in res])
+
+    def test_list_containers_ignores_stale_index(self):
+        client = self._use_fake_etcd()
+        container = utils.create_test_container(
+            name='container-one', context=self.context)
+        client.delete('/containers/' + container.uuid)
+        res = dbapi.list_containers(
+            self.context, filters={'name': 'container-one'})
+        self.assertEqual([], res)
+
+    def test_rebuild_indexes(self):
+        client = self._use_fake_etcd()
+        container = utils.create_test_container(
+            name='container-one', context=self.context)
+        for key in list(client.nodes):
+            if key.startswith('/container_index/'):
+                client.delete(key)
+        self.assertEqual([], dbapi.list_containers(
+            self.context, filters={'name': 'container-one'}))
+
+        self.dbapi.rebuild_indexes()
+        res = dbapi.list_containers(
+            self.context, filters={'name': 'container-one'})
+        self.assertEqual([container.uuid], [r.uuid for r in res])
+
+    def test_rebuild_indexes_reserves_names(self):
+        client = self._use_fake_etcd()
+        self.config(unique_container_name_scope='project', group='compute')
+        utils.create_test_container(name='container-one',
+                                    context=self.context)
+        for key in list(client.nodes):
+            if key.startswith('/container_index/'):
+                client.delete(key)
+
+        self.dbapi.rebuild_indexes()
+        self.assertRaises(exception.ContainerAlreadyExists,
+                          utils.create_test_container,
+                          name='container-one',
+                          uuid=uuidutils.generate_uuid(),
+                          context=self.context)
+
+    def test_rebuild_indexes_duplicate_names(self):
+        client = self._use_fake_etcd()
+        self.config(unique_container_name_scope='project', group='compute')
+        utils.create_test_container(name='container-one',
+                                    context=self.context)
+        for key in list(client.nodes):
+            if key.startswith('/container_index/'):
+                client.delete(key)
+        utils.create_test_container(name='container-one',
+                                    uuid=uuidutils.generate_uuid(),
+                                    context=self.context)
+
+        # The containers sharing a name are all indexed
+        self.dbapi.rebuild_indexes()
+        self.assertEqual(2, len(dbapi.list_containers(
+            self.context, filters={'name': 'container-one'})))
+
+    def test_destroy_container(self):
+        client = self._use_fake_etcd()
         container = utils.create_test_container(context=self.context)
-        mock_read.side_effect = lambda *args: FakeEtcdResult(
-            container.as_dict())
         dbapi.destroy_container(self.context, container.uuid)
-        mock_delete.assert_called_once_with('/containers/%s' % container.uuid)
+        self.assertEqual({}, client.nodes)
 
-    @mock.patch.object(etcd_client, 'read')
-    @mock.patch.object(etcd_client, 'write')
-    @mock.patch.object(etcd_client, 'delete')
-    def test_destroy_container_by_uuid(self, mock_delete,
-                                       mock_write, mock_read):
-        mock_read.side_effect = etcd.EtcdKeyNotFound
+    def test_destroy_container_by_uuid(self):
+        self._use_fake_etcd()
         container = utils.create_test_container(context=self.context)
-        mock_read.side_effect = lambda *args: FakeEtcdResult(
-            container.as_dict())
         dbapi.destroy_container(self.context, container.uuid)
-        mock_delete.assert_called_once_with('/containers/%s' % container.uuid)
+        self.assertRaises(exception.ContainerNotFound,
+                          dbapi.get_container_by_uuid,
+                          self.context, container.uuid)
+        # The name can be reused
+        utils.create_test_container(context=self.context,
+                                    uuid=uuidutils.generate_uuid())
+
+    def test_destroy_container_written_concurrently(self):
+        client = self._use_fake_etcd()
+        container = utils.create_test_container(context=self.context)
+        read = client.read
+
+        def _read_then_write(key, *args, **kwargs):
+            result = read(key, *args, **kwargs)
+            if key == '/containers/' + container.uuid and \
+                    len(client.events) < 6:
+                # Another process updates the container meanwhile
+                value = json.loads(result.value)
+                value['status'] = 'Running'
+                client.write(key, json.dumps(value))
+            return result
+
+        with mock.patch.object(client, 'read', _read_then_write):
+            dbapi.destroy_container(self.context, container.uuid)
+        self.assertEqual([], [k for k in client.nodes
+                              if k.startswith('/container')])
 
     @mock.patch.object(etcd_client, 'read')
     def test_destroy_container_that_does_not_exist(self, mock_read):
@@ -412,13 +589,9 @@ class EtcdDbContainerTestCase(base.DbTestCase):
         self.assertEqual(new_image, json.loads(
             mock_update.call_args_list[0][0][0].value)['image'])
 
-    @mock.patch.object(etcd_client, 'read')
-    @mock.patch.object(etcd_client, 'write')
-    @mock.patch.object(etcd_client, 'update')
-    def test_update_container_with_the_same_name(self, mock_update,
-                                                 mock_write, mock_read):
-        mock_read.side_effect = etcd.EtcdKeyNotFound
-        container1 = utils.create_test_container(
+    def test_update_container_with_the_same_name(self):
+        self._use_fake_etcd()
+        utils.create_test_container(
             name='container-one',
             uuid=uuidutils.generate_uuid(),
             context=self.context)
@@ -427,12 +600,84 @@ class EtcdDbContainerTestCase(base.DbTestCase):
             uuid=uuidutils.generate_uuid(),
             context=self.context)
 
-        mock_read.side_effect = lambda *args: FakeEtcdMultipleResult(
-            [container1.as_dict(), container2.as_dict()])
         self.assertRaises(exception.ContainerAlreadyExists,
                           dbapi.update_container, self.context,
                           container2.uuid, {'name': 'container-one'})
 
+    def test_update_container_retries_on_concurrent_write(self):
+        client = self._use_fake_etcd()
+        container = utils.create_test_container(context=self.context)
+        update = client.update
+        calls = []
+
+        def _concurrent_update(obj):
+            if not calls:
+                # Another process updates the container first
+                value = json.loads(client.read(obj.key).value)
+                value['status'] = 'Running'
+                client.write(obj.key, json.dumps(value))
+            calls.append(obj)
+            return update(obj)
+
+        with mock.patch.object(client, 'update', _concurrent_update):
+            res = dbapi.update_container(self.context, container.uuid,
+                                         {'image': 'new-image'})
+        self.assertEqual(2, len(calls))
+        self.assertEqual('new-image', res.image)
+        self.assertEqual('Running', res.status)
+        res = dbapi.get_container_by_uuid(self.context, container.uuid)
+        self.assertEqual('new-image', res.image)
+        self.assertEqual('Running', res.status)
+
+    def test_update_container_conflict(self):
+        client = self._use_fake_etcd()
+        container = utils.create_test_container(context=self.context)
+        with mock.patch.object(client, 'update',
+                               side_effect=etcd.EtcdCompareFailed):
+            self.assertRaises(exception.Conflict,
+                              dbapi.update_container, self.context,
+                              container.uuid, {'image': 'new-image'})
+
+    def test_update_container_name(self):
+        self._use_fake_etcd()
+        container = utils.create_test_container(context=self.context,
+                                                name='container-one')
+        dbapi.update_container(self.context, container.uuid,
+                               {'name': 'container-one'})
+        dbapi.update_container(self.context, container.uuid,
+                               {'name': 'container-two'})
+        # The old name is released
+        utils.create_test_container(context=self.context,
+                                    name='Container-One',
+                                    uuid=uuidutils.generate_uuid())
+        self.assertRaises(exception.ContainerAlreadyExists,
+                          utils.create_test_container,
+                          context=self.context, name='container-two',
+                          uuid=uuidutils.generate_uuid())
+
+    def test_create_container_takes_over_stale_name(self):
+        client = self._use_fake_etcd()
+        container = utils.create_test_container(context=self.context,
+                                                name='container-one')
+        # The container went away without releasing its name
+        client.delete('/containers/' + container.uuid)
+        new_container = utils.create_test_container(
+            context=self.context, name='container-one',
+            uuid=uuidutils.generate_uuid())
+        res = dbapi.get_container_by_name(self.context, 'container-one')
+        self.assertEqual(new_container.uuid, res.uuid)
+
+    def test_create_container_name_conflict_rolls_back(self):
+        client = self._use_fake_etcd()
+        utils.create_test_container(context=self.context,
+                                    name='container-one')
+        nodes = dict(client.nodes)
+        self.assertRaises(exception.ContainerAlreadyExists,
+                          utils.create_test_container,
+                          context=self.context, name='container-one',
+                          uuid=uuidutils.generate_uuid())
+        self.assertEqual(sorted(nodes), sorted(client.nodes))
+
     @mock.patch.object(etcd_client, 'read')
     def test_update_container_not_found(self, mock_read):
         container_uuid = uuidutils.generate_uuid()
@@ -451,44 +696,36 @@ class EtcdDbContainerTestCase(base.DbTestCase):
                           dbapi.update_container, self.context,
                           container.id, {'uuid': ''})
 
-    @mock.patch.object(etcd_client, 'read')
-    @mock.patch.object(etcd_client, 'write')
-    @mock.patch.object(etcd_api, 'list_containers')
-    def test_create_container_already_exists_in_project_name_space(
-            self, mock_list_containers, mock_write, mock_read):
-        mock_read.side_effect = etcd.EtcdKeyNotFound
-        mock_list_containers.return_value = []
+    def test_create_container_already_exists_in_project_name_space(self):
+        self._use_fake_etcd()
         CONF.set_override("unique_container_name_scope", "project",
                           group="compute",
                           enforce_type=True)
-        container1 = utils.create_test_container(
-            context=self.context, name='cont1')
-        mock_list_containers.return_value = [container1]
+        utils.create_test_container(context=self.context, name='cont1')
         with self.assertRaisesRegexp(exception.ContainerAlreadyExists,
                                      'A container with name.*'):
             utils.create_test_container(uuid=uuidutils.generate_uuid(),
                                         context=self.context,
                                         name='cont1')
+        self.context.project_id = 'fake_project_1'
+        utils.create_test_container(uuid=uuidutils.generate_uuid(),
+                                    context=self.context,
+                                    project_id='fake_project_1',
+                                    name='cont1')
 
-    @mock.patch.object(etcd_client, 'read')
-    @mock.patch.object(etcd_client, 'write')
-    @mock.patch.object(etcd_api, 'list_containers')
-    def test_create_container_already_exists_in_global_name_space(
-            self, mock_list_containers, mock_write, mock_read):
-        mock_read.side_effect = etcd.EtcdKeyNotFound
-        mock_list_containers.return_value = []
+    def test_create_container_already_exists_in_global_name_space(self):
+        self._use_fake_etcd()
         CONF.set_override("unique_container_name_scope", "global",
                           group="compute",
                           enforce_type=True)
-        container1 = utils.create_test_container(
-            context=self.context, name='cont1')
+        utils.create_test_container(context=self.context, name='cont1')
         self.context.project_id = 'fake_project_1'
         self.context.user_id = 'fake_user_1'
-        mock_list_containers.return_value = [container1]
         with self.assertRaisesRegexp(exception.ContainerAlreadyExists,
                                      'A container with name.*'):
             utils.create_test_container(uuid=uuidutils.generate_uuid(),
                                         context=self.context,
+                                        project_id='fake_project_1',
                                         name='cont1')
 
     @mock.patch.object(etcd_client, 'read')
@@ -0,0 +1,162 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the cache of the etcd DB backend"""
+import mock
+
+import etcd
+from oslo_config import cfg
+
+from zun.db import api as dbapi
+from zun.db.etcd import cache
+from zun.tests import base as test_base
+from zun.tests.unit.db import base
+from zun.tests.unit.db import fake_etcd
+from zun.tests.unit.db import utils
+
+
+class EtcdCacheTestCase(test_base.TestCase):
+
+    def setUp(self):
+        super(EtcdCacheTestCase, self).setUp()
+        self.client = fake_etcd.FakeEtcdClient()
+        self.client.write('/containers/c1', 'one')
+        self.client.write('/zun_services/host_zun-compute', 'service')
+        self.cache = cache.EtcdCache(self.client,
+                                     ('/containers', '/zun_services'), 2)
+        for path in self.cache.paths:
+            self.cache._sync(path)
+
+    def test_read_through(self):
+        self.assertEqual('one', self.cache.read('/containers/c1').value)
+        self.assertEqual('one', self.cache.read('/containers/c1').value)
+        self.assertEqual(1, self.client.reads.count('/containers/c1'))
+        self.assertEqual({'hits': 1, 'misses': 1, 'evictions': 0,
+                          'size': 1}, self.cache.stats())
+
+    def test_read_missing_key(self):
+        self.assertRaises(etcd.EtcdKeyNotFound,
+                          self.cache.read, '/containers/c2')
+        self.assertEqual(0, len(self.cache._entries))
+
+    def test_read_not_cached_path(self):
+        self.client.write('/images/i1', 'image')
+        self.cache.read('/images/i1')
+        self.cache.read('/images/i1')
+        self.assertEqual(2, self.client.reads.count('/images/i1'))
+        self.assertEqual(0, self.cache.hits)
+
+    def test_read_not_watched_path(self):
+        self.cache._reset('/containers')
+        self.cache.read('/containers/c1')
+        self.cache.read('/containers/c1')
+        self.assertEqual(2, self.client.reads.count('/containers/c1'))
+
+    def test_watch_invalidates_written_key(self):
+        self.cache.read('/containers/c1')
+        self.client.write('/containers/c1', 'two')
+        self.cache._wait('/containers')
+        self.assertEqual('two', self.cache.read('/containers/c1').value)
+        self.assertEqual(self.client.etcd_index,
+                         self.cache._indexes['/containers'])
+
+    def test_watch_invalidates_parent_directory(self):
+        res = self.cache.read('/zun_services')
+        self.assertEqual(1, len(list(res.children)))
+        self.client.write('/zun_services/host2_zun-compute', 'service')
+        self.cache._wait('/zun_services')
+        res = self.cache.read('/zun_services')
+        self.assertEqual(2, len(list(res.children)))
+
+    def test_watch_timeout(self):
+        index = self.cache._indexes['/containers']
+        self.cache._wait('/containers')
+        self.assertEqual(index, self.cache._indexes['/containers'])
+
+    def test_read_racing_with_watch_not_cached(self):
+        read = self.client.read
+
+        def _read_then_write(key, *args, **kwargs):
+            result = read(key, *args, **kwargs)
+            # The key is written, and the watch processes the event, while
+            # the read is in flight.
+            self.client.write(key, 'two')
+            with mock.patch.object(self.client, 'read', read):
+                self.cache._wait('/containers')
+            return result
+
+        with mock.patch.object(self.client, 'read', _read_then_write):
+            self.assertEqual('one', self.cache.read('/containers/c1').value)
+        self.assertEqual('two', self.cache.read('/containers/c1').value)
+
+    def test_invalidate(self):
+        self.cache.read('/zun_services')
+        self.cache.read('/zun_services/host_zun-compute')
+        self.cache.invalidate('/zun_services/host_zun-compute')
+        self.assertEqual(0, len(self.cache._entries))
+
+    def test_lru_eviction(self):
+        self.client.write('/containers/c2', 'two')
+        self.client.write('/containers/c3', 'three')
+        self.cache.read('/containers/c1')
+        self.cache.read('/containers/c2')
+        self.cache.read('/containers/c1')
+        self.cache.read('/containers/c3')
+        self.assertEqual(['/containers/c1', '/containers/c3'],
+                         list(self.cache._entries))
+        self.assertEqual(1, self.cache.evictions)
+
+    @mock.patch.object(cache.time, 'sleep')
+    def test_watch_failure_resets_path(self, mock_sleep):
+        self.cache.read('/containers/c1')
+        mock_sleep.side_effect = StopIteration
+        with mock.patch.object(self.cache, '_wait',
+                               side_effect=etcd.EtcdConnectionFailed):
+            self.assertRaises(StopIteration, self.cache._watch, '/containers')
+        self.assertIsNone(self.cache._indexes['/containers'])
+        self.assertEqual(0, len(self.cache._entries))
+
+
+class EtcdCachedDbTestCase(base.DbTestCase):
+
+    def setUp(self):
+        cfg.CONF.set_override('db_type', 'etcd')
+        super(EtcdCachedDbTestCase, self).setUp()
+        self.client = fake_etcd.FakeEtcdClient()
+        self.cache = cache.EtcdCache(self.client, ('/containers',), 10)
+        self.cache._sync('/containers')
+        for name, value in (('client', self.client), ('cache', self.cache)):
+            p = mock.patch.object(self.dbapi, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_get_container_from_cache(self):
+        container = utils.create_test_container(context=self.context)
+        key = '/containers/' + container.uuid
+        dbapi.get_container_by_uuid(self.context, container.uuid)
+        dbapi.get_container_by_name(self.context, container.name)
+        self.assertEqual(1, self.client.reads.count(key))
+        self.assertEqual(1, self.cache.hits)
+
+    def test_update_container_invalidates_cache(self):
+        container = utils.create_test_container(context=self.context)
+        dbapi.get_container_by_uuid(self.context, container.uuid)
+        dbapi.update_container(self.context, container.uuid,
+                               {'image': 'new-image'})
+        res = dbapi.get_container_by_uuid(self.context, container.uuid)
+        self.assertEqual('new-image', res.image)
+
+    def test_destroy_container_invalidates_cache(self):
+        container = utils.create_test_container(context=self.context)
+        dbapi.get_container_by_uuid(self.context, container.uuid)
+        dbapi.destroy_container(self.context, container.uuid)
+        self.assertEqual(0, len(self.cache._entries))
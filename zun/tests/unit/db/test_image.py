@@ -11,7 +11,6 @@
 #    under the License.
 
 """Tests for manipulating Images via the DB API"""
-import json
 import mock
 
 import etcd
@@ -22,8 +21,8 @@ import six
 
 from zun.common import exception
 from zun.tests.unit.db import base
+from zun.tests.unit.db import fake_etcd
 from zun.tests.unit.db import utils
-from zun.tests.unit.db.utils import FakeEtcdMultipleResult
 from zun.tests.unit.db.utils import FakeEtcdResult
 
 
@@ -157,6 +156,13 @@ class EtcdDbImageTestCase(base.DbTestCase):
         cfg.CONF.set_override('db_type', 'etcd')
         super(EtcdDbImageTestCase, self).setUp()
 
+    def _use_fake_etcd(self):
+        client = fake_etcd.FakeEtcdClient()
+        p = mock.patch.object(self.dbapi, 'client', client)
+        p.start()
+        self.addCleanup(p.stop)
+        return client
+
     @mock.patch.object(etcd_client, 'read')
     @mock.patch.object(etcd_client, 'write')
     @mock.patch('zun.db.etcd.api.EtcdAPI.get_image_by_repo_and_tag')
@@ -222,61 +228,46 @@ class EtcdDbImageTestCase(base.DbTestCase):
                           self.dbapi.get_image_by_uuid, self.context,
                           'db09ecea-7d63-4638-ae88-b8581f796e86')
 
-    @mock.patch.object(etcd_client, 'read')
-    @mock.patch.object(etcd_client, 'write')
-    @mock.patch('zun.db.etcd.api.EtcdAPI.get_image_by_repo_and_tag')
-    def test_list_images(self, mock_get, mock_write, mock_read):
-        mock_get.return_value = None
-        mock_read.side_effect = etcd.EtcdKeyNotFound
+    def test_list_images(self):
+        self._use_fake_etcd()
         uuids = []
-        images = []
         for i in range(1, 6):
             image = utils.create_test_image(context=self.context,
-                                            repo='testrepo' + str(i))
-            images.append(image.as_dict())
+                                            repo='testrepo' + str(i),
+                                            uuid=uuidutils.generate_uuid())
             uuids.append(image.uuid)
-        mock_read.side_effect = lambda *args: FakeEtcdMultipleResult(images)
         res = self.dbapi.list_images(self.context)
         res_uuids = [r.uuid for r in res]
         self.assertEqual(sorted(uuids), sorted(res_uuids))
 
-    @mock.patch.object(etcd_client, 'read')
-    @mock.patch.object(etcd_client, 'write')
-    @mock.patch('zun.db.etcd.api.EtcdAPI.get_image_by_repo_and_tag')
-    def test_list_images_sorted(self, mock_get, mock_write, mock_read):
-        mock_get.return_value = None
-        mock_read.side_effect = etcd.EtcdKeyNotFound
+    def test_list_images_sorted(self):
+        self._use_fake_etcd()
         uuids = []
-        images = []
         for i in range(1, 6):
             image = utils.create_test_image(context=self.context,
-                                            repo='testrepo' + str(i))
-            images.append(image.as_dict())
+                                            repo='testrepo' + str(i),
+                                            uuid=uuidutils.generate_uuid())
             uuids.append(image.uuid)
-        mock_read.side_effect = lambda *args: FakeEtcdMultipleResult(images)
         res = self.dbapi.list_images(self.context, sort_key='uuid')
         res_uuids = [r.uuid for r in res]
 
         self.assertEqual(sorted(uuids), res_uuids)
+        res = self.dbapi.list_images(self.context, sort_key='uuid',
+                                     limit=2, marker=res[1])
+        self.assertEqual(sorted(uuids)[2:4], [r.uuid for r in res])
         self.assertRaises(exception.InvalidParameterValue,
                           self.dbapi.list_images,
                           self.context, sort_key='foo')
 
-    @mock.patch.object(etcd_client, 'read')
-    @mock.patch.object(etcd_client, 'write')
-    @mock.patch('zun.db.etcd.api.EtcdAPI.get_image_by_repo_and_tag')
-    def test_list_images_with_filters(self, mock_get, mock_write, mock_read):
-        mock_get.return_value = None
-        mock_read.side_effect = etcd.EtcdKeyNotFound
+    def test_list_images_with_filters(self):
+        self._use_fake_etcd()
         image1 = utils.create_test_image(
             context=self.context, repo='imageone',
             uuid=uuidutils.generate_uuid())
         image2 = utils.create_test_image(
             context=self.context, repo='imagetwo',
             uuid=uuidutils.generate_uuid())
-        images = [image1.as_dict(), image2.as_dict()]
 
-        mock_read.side_effect = lambda *args: FakeEtcdMultipleResult(images)
         res = self.dbapi.list_images(self.context,
                                      filters={'repo': 'imageone'})
         self.assertEqual([image1.uuid], [r.uuid for r in res])
@@ -289,18 +280,33 @@ class EtcdDbImageTestCase(base.DbTestCase):
                                      filters={'repo': 'foo'})
         self.assertEqual([], [r.uuid for r in res])
 
-    @mock.patch.object(etcd_client, 'read')
-    @mock.patch.object(etcd_client, 'write')
-    @mock.patch.object(etcd_client, 'update')
-    @mock.patch('zun.db.etcd.api.EtcdAPI.get_image_by_repo_and_tag')
-    def test_update_image(self, mock_get, mock_update, mock_write, mock_read):
-        mock_get.return_value = None
-        mock_read.side_effect = etcd.EtcdKeyNotFound
+    def test_get_image_by_repo_and_tag(self):
+        client = self._use_fake_etcd()
+        image = utils.create_test_image(
+            context=self.context, repo='registry:5000/imageone',
+            tag='latest', uuid=uuidutils.generate_uuid())
+        utils.create_test_image(
+            context=self.context, repo='registry:5000/imageone',
+            tag='v1', uuid=uuidutils.generate_uuid())
+        del client.reads[:]
+        res = self.dbapi.get_image_by_repo_and_tag(
+            self.context, 'registry:5000/imageone', 'latest')
+        self.assertEqual(image.uuid, res.uuid)
+        self.assertNotIn('/images', client.reads)
+        self.assertIsNone(self.dbapi.get_image_by_repo_and_tag(
+            self.context, 'registry:5000/imageone', 'v2'))
+
+    def test_update_image(self):
+        self._use_fake_etcd()
         image = utils.create_test_image(context=self.context)
-        mock_read.side_effect = lambda *args: FakeEtcdResult(image.as_dict())
         self.dbapi.update_image(image.uuid, {'tag': 'newtag'})
-        self.assertEqual('newtag', json.loads(
-            mock_update.call_args_list[0][0][0].value)['tag'])
+        res = self.dbapi.get_image_by_uuid(self.context, image.uuid)
+        self.assertEqual('newtag', res.tag)
+        self.assertIsNone(self.dbapi.get_image_by_repo_and_tag(
+            self.context, image.repo, image.tag))
+        res = self.dbapi.get_image_by_repo_and_tag(
+            self.context, image.repo, 'newtag')
+        self.assertEqual(image.uuid, res.uuid)
 
     @mock.patch.object(etcd_client, 'read')
     def test_update_image_not_found(self, mock_read):
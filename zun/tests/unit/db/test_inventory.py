@@ -10,6 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
 from oslo_config import cfg
 from oslo_utils import uuidutils
 
@@ -17,6 +18,7 @@ from zun.common import exception
 import zun.conf
 from zun.db import api as dbapi
 from zun.tests.unit.db import base
+from zun.tests.unit.db import fake_etcd
 from zun.tests.unit.db import utils
 
 CONF = zun.conf.CONF
@@ -163,3 +165,16 @@ class DbInventoryTestCase(base.DbTestCase):
         self.assertRaises(exception.InventoryNotFound,
                           dbapi.update_inventory, self.context,
                           inventory_id, {'total': new_total})
+
+
+class EtcdDbInventoryTestCase(DbInventoryTestCase):
+    """Run the tests of the inventories against an in-memory etcd."""
+
+    def setUp(self):
+        super(EtcdDbInventoryTestCase, self).setUp()
+        cfg.CONF.set_override('db_type', 'etcd')
+        self.dbapi = dbapi._get_dbdriver_instance()
+        self.client = fake_etcd.FakeEtcdClient()
+        p = mock.patch.object(self.dbapi, 'client', self.client)
+        p.start()
+        self.addCleanup(p.stop)
@@ -143,7 +143,7 @@ class EtcdDbResourceClassTestCase(base.DbTestCase):
                                                   mock_read):
         mock_read.side_effect = etcd.EtcdKeyNotFound
         utils.create_test_resource_class(context=self.context, name='123')
-        mock_read.side_effect = lambda *args: None
+        mock_write.side_effect = etcd.EtcdAlreadyExist
         self.assertRaises(exception.ResourceExists,
                           utils.create_test_resource_class,
                           context=self.context, name='123')
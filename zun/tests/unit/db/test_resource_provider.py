@@ -12,6 +12,7 @@
 
 """Tests for manipulating resource providers via the DB API"""
 
+import mock
 from oslo_config import cfg
 from oslo_utils import uuidutils
 import six
@@ -20,6 +21,7 @@ from zun.common import exception
 import zun.conf
 from zun.db import api as dbapi
 from zun.tests.unit.db import base
+from zun.tests.unit.db import fake_etcd
 from zun.tests.unit.db import utils
 
 CONF = zun.conf.CONF
@@ -159,3 +161,16 @@ class DbResourceProviderTestCase(base.DbTestCase):
         self.assertRaises(exception.InvalidParameterValue,
                           dbapi.update_resource_provider, self.context,
                           provider.id, {'uuid': ''})
+
+
+class EtcdDbResourceProviderTestCase(DbResourceProviderTestCase):
+    """Run the tests of the resource providers against an in-memory etcd."""
+
+    def setUp(self):
+        super(EtcdDbResourceProviderTestCase, self).setUp()
+        cfg.CONF.set_override('db_type', 'etcd')
+        self.dbapi = dbapi._get_dbdriver_instance()
+        self.client = fake_etcd.FakeEtcdClient()
+        p = mock.patch.object(self.dbapi, 'client', self.client)
+        p.start()
+        self.addCleanup(p.stop)
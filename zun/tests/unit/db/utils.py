@@ -165,7 +165,7 @@ def get_test_resource_provider(**kw):
 def create_test_resource_provider(**kw):
     provider = get_test_resource_provider(**kw)
     # Let DB generate ID if it isn't specified explicitly
-    if CONF.db_type == 'sql' and 'id' not in kw:
+    if 'id' not in kw:
         del provider['id']
     dbapi = db_api._get_dbdriver_instance()
     return dbapi.create_resource_provider(kw['context'], provider)
@@ -211,7 +211,7 @@ def get_test_inventory(**kw):
 def create_test_inventory(**kw):
     inventory = get_test_inventory(**kw)
     # Let DB generate ID if it isn't specified explicitly
-    if CONF.db_type == 'sql' and 'id' not in kw:
+    if 'id' not in kw:
         del inventory['id']
     provider_id = inventory.pop('resource_provider_id')
     dbapi = db_api._get_dbdriver_instance()
@@ -236,7 +236,7 @@ def get_test_allocation(**kw):
 def create_test_allocation(**kw):
     allocation = get_test_allocation(**kw)
     # Let DB generate ID if it isn't specified explicitly
-    if CONF.db_type == 'sql' and 'id' not in kw:
+    if 'id' not in kw:
         del allocation['id']
     dbapi = db_api._get_dbdriver_instance()
     return dbapi.create_allocation(kw['context'], allocation)
@@ -278,6 +278,7 @@ def get_test_compute_node(**kw):
         'os': kw.get('os', 'Centos'),
         'kernel_version': kw.get('kernel_version', '3.10.0-123.el7.x86_64'),
         'labels': kw.get('labels', {"dev.type": "product"}),
+        'container_uuids': kw.get('container_uuids', []),
         'created_at': kw.get('created_at'),
         'updated_at': kw.get('updated_at'),
     }
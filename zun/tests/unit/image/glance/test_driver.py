@@ -12,6 +12,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import hashlib
 import mock
 import os
 import shutil
@@ -101,6 +102,84 @@ class TestDriver(base.BaseTestCase):
         mock_open_file.assert_any_call(out_path, 'wb')
         self.assertEqual(({'image': 'image', 'path': out_path}, False), ret)
 
+    @mock.patch('zun.container.docker.utils.docker_client')
+    @mock.patch.object(driver.GlanceDriver,
+                       '_search_image_on_host')
+    @mock.patch('zun.image.glance.utils.create_glanceclient')
+    @mock.patch('zun.image.glance.utils.find_image')
+    def test_pull_image_stream(self, mock_find_image, mock_glance,
+                               mock_search, mock_docker_client):
+        mock_search.return_value = None
+        mock_glance.return_value.images.data.return_value = [b'con', b'tent']
+        image_meta = mock.MagicMock()
+        image_meta.id = '1234'
+        mock_find_image.return_value = image_meta
+        mock_docker = mock.MagicMock()
+        mock_docker.load_image.side_effect = lambda data: list(data)
+        mock_docker_client.return_value.__enter__.return_value = mock_docker
+        CONF.set_override('images_directory', self.test_dir, group='glance')
+        CONF.set_override('image_load_mode', 'stream', group='glance')
+        self.addCleanup(CONF.clear_override, 'image_load_mode',
+                        group='glance')
+        out_path = os.path.join(self.test_dir, '1234' + '.tar')
+        ret = self.driver.pull_image(None, 'image', 'latest', 'always')
+        self.assertEqual(({'image': 'image', 'path': out_path}, True), ret)
+        mock_docker_client.assert_called_once_with(pooled=False)
+        self.assertEqual(1, mock_docker.load_image.call_count)
+        with open(out_path, 'rb') as fd:
+            self.assertEqual(b'content', fd.read())
+        self.assertTrue(self.driver._verify_checksum(
+            out_path, hashlib.md5(b'content').hexdigest()))
+
+    @mock.patch('zun.container.docker.utils.docker_client')
+    @mock.patch.object(driver.GlanceDriver,
+                       '_search_image_on_host')
+    @mock.patch('zun.image.glance.utils.create_glanceclient')
+    @mock.patch('zun.image.glance.utils.find_image')
+    def test_pull_image_stream_failure(self, mock_find_image, mock_glance,
+                                       mock_search, mock_docker_client):
+        mock_search.return_value = None
+        image_meta = mock.MagicMock()
+        image_meta.id = '1234'
+        mock_find_image.return_value = image_meta
+        mock_docker = mock.MagicMock()
+        mock_docker.load_image.side_effect = Exception('load failed')
+        mock_docker_client.return_value.__enter__.return_value = mock_docker
+        CONF.set_override('images_directory', self.test_dir, group='glance')
+        CONF.set_override('image_load_mode', 'stream', group='glance')
+        self.addCleanup(CONF.clear_override, 'image_load_mode',
+                        group='glance')
+        self.assertRaises(exception.ZunException, self.driver.pull_image,
+                          None, 'image', 'latest', 'always')
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir,
+                                                     '1234.tar')))
+
+    def test_verify_checksum_uses_index(self):
+        image_path = os.path.join(self.test_dir, '1234.tar')
+        with open(image_path, 'wb') as fd:
+            fd.write(b'content')
+        checksum = hashlib.md5(b'content').hexdigest()
+        self.assertTrue(self.driver._verify_checksum(image_path, checksum))
+        self.assertTrue(os.path.isfile(image_path + '.checksum'))
+
+        with mock.patch.object(self.driver,
+                               '_compute_checksum') as mock_checksum:
+            self.assertTrue(self.driver._verify_checksum(image_path,
+                                                         checksum))
+            self.assertFalse(self.driver._verify_checksum(image_path, 'xxx'))
+            self.assertFalse(mock_checksum.called)
+
+    def test_verify_checksum_image_changed(self):
+        image_path = os.path.join(self.test_dir, '1234.tar')
+        with open(image_path, 'wb') as fd:
+            fd.write(b'content')
+        checksum = hashlib.md5(b'content').hexdigest()
+        self.assertTrue(self.driver._verify_checksum(image_path, checksum))
+
+        with open(image_path, 'wb') as fd:
+            fd.write(b'corrupted content')
+        self.assertFalse(self.driver._verify_checksum(image_path, checksum))
+
     @mock.patch('zun.image.glance.utils.create_glanceclient')
     @mock.patch('zun.common.utils.should_pull_image')
     def test_pull_image_not_found(self, mock_should_pull_image,
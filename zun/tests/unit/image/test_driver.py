@@ -12,6 +12,11 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import eventlet
+import mock
+
+from zun.common import context
+from zun.common import exception
 import zun.conf
 from zun.image import driver
 from zun.tests import base
@@ -31,3 +36,98 @@ class TestDriver(base.BaseTestCase):
     def test_load_image_driver(self):
         CONF.set_override('images_directory', None, group='glance')
         self.assertTrue(driver.load_image_driver, 'glance.GlanceDriver')
+
+    @mock.patch.object(driver, '_image_drivers', {})
+    @mock.patch('stevedore.driver.DriverManager')
+    def test_get_image_driver_cached(self, mock_manager):
+        mock_manager.return_value.driver = mock.Mock(
+            spec=driver.ContainerImageDriver)
+        driver1 = driver.get_image_driver('docker')
+        driver2 = driver.get_image_driver('docker')
+        self.assertIs(driver1, driver2)
+        self.assertEqual(1, mock_manager.call_count)
+
+        driver.reload_image_drivers()
+        driver.get_image_driver('docker')
+        self.assertEqual(2, mock_manager.call_count)
+
+    @mock.patch.object(driver, '_image_drivers', {})
+    @mock.patch('stevedore.driver.DriverManager')
+    def test_pull_image_loads_drivers_once(self, mock_manager):
+        # Repeated pulls must not pay for an entry point lookup each time
+        mock_driver = mock.Mock(spec=driver.ContainerImageDriver)
+        mock_driver.pull_image.return_value = ({'image': 'test'}, True)
+        mock_manager.return_value.driver = mock_driver
+        ctx = context.get_admin_context()
+        for i in range(100):
+            driver.pull_image(ctx, 'test', 'latest', image_driver='docker')
+        self.assertEqual(100, mock_driver.pull_image.call_count)
+        self.assertEqual(1, mock_manager.call_count)
+
+    @mock.patch.object(driver, 'PULL_COORDINATOR',
+                       driver.ImagePullCoordinator())
+    @mock.patch.object(driver, '_image_drivers', {})
+    @mock.patch('stevedore.driver.DriverManager')
+    def test_pull_image_loads_file_once(self, mock_manager):
+        def _pull(*args):
+            eventlet.sleep(0.01)
+            return {'image': 'test', 'path': '/tmp/test.tar'}, False
+
+        mock_driver = mock.Mock(spec=driver.ContainerImageDriver)
+        mock_driver.pull_image.side_effect = _pull
+        mock_manager.return_value.driver = mock_driver
+        mock_load = mock.Mock()
+        ctx = context.get_admin_context()
+        threads = [eventlet.spawn(driver.pull_image, ctx, 'test', 'latest',
+                                  image_driver='glance', load_image=mock_load)
+                   for i in range(3)]
+        for t in threads:
+            self.assertTrue(t.wait()[1])
+        self.assertEqual(1, mock_driver.pull_image.call_count)
+        mock_load.assert_called_once_with('/tmp/test.tar')
+
+
+class TestImagePullCoordinator(base.BaseTestCase):
+    def setUp(self):
+        super(TestImagePullCoordinator, self).setUp()
+        self.coordinator = driver.ImagePullCoordinator()
+
+    def _slow_pull(self, result=None, error=None):
+        def _pull():
+            eventlet.sleep(0.01)
+            if error:
+                raise error
+            return result
+        return mock.Mock(side_effect=_pull)
+
+    def test_pull_coalesced(self):
+        mock_pull = self._slow_pull(result=({'image': 'test'}, True))
+        threads = [eventlet.spawn(self.coordinator.pull, 'key', mock_pull)
+                   for i in range(3)]
+        eventlet.sleep(0)
+        self.assertEqual(2, self.coordinator.queue_depth('key'))
+        results = [t.wait() for t in threads]
+        self.assertEqual(1, mock_pull.call_count)
+        for result in results:
+            self.assertEqual(({'image': 'test'}, True), result)
+        self.assertEqual(1, self.coordinator.pull_count)
+        self.assertEqual(2, self.coordinator.coalesced_count)
+        self.assertEqual(0, self.coordinator.queue_depth())
+
+    def test_pull_error_shared(self):
+        mock_pull = self._slow_pull(
+            error=exception.ImageNotFound('Image test not found'))
+        threads = [eventlet.spawn(self.coordinator.pull, 'key', mock_pull)
+                   for i in range(2)]
+        for t in threads:
+            self.assertRaises(exception.ImageNotFound, t.wait)
+        self.assertEqual(1, mock_pull.call_count)
+
+    def test_pull_different_keys(self):
+        mock_pull = self._slow_pull(result=({'image': 'test'}, True))
+        threads = [eventlet.spawn(self.coordinator.pull, key, mock_pull)
+                   for key in ('key1', 'key2')]
+        for t in threads:
+            t.wait()
+        self.assertEqual(2, mock_pull.call_count)
+        self.assertEqual(0, self.coordinator.coalesced_count)
@@ -141,6 +141,25 @@ class TestContainerObject(base.DbTestCase):
                      'memory': '512m'})
                 self.assertEqual(self.context, container._context)
 
+    def test_save_all(self):
+        uuid = self.fake_container['uuid']
+        with mock.patch.object(self.dbapi, 'get_container_by_uuid',
+                               autospec=True) as mock_get_container:
+            mock_get_container.return_value = self.fake_container
+            with mock.patch.object(self.dbapi, 'update_containers',
+                                   autospec=True) as mock_update_containers:
+                container = objects.Container.get_by_uuid(self.context, uuid)
+                unchanged = objects.Container.get_by_uuid(self.context, uuid)
+                unchanged.uuid = 'unchanged-uuid'
+                unchanged.obj_reset_changes()
+                container.status = 'Stopped'
+                objects.Container.save_all(self.context,
+                                           [container, unchanged])
+
+                mock_update_containers.assert_called_once_with(
+                    self.context, {uuid: {'status': 'Stopped'}})
+                self.assertFalse(container.obj_what_changed())
+
     def test_refresh(self):
         uuid = self.fake_container['uuid']
         new_uuid = uuidutils.generate_uuid()
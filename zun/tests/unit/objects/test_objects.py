@@ -354,7 +354,7 @@ class TestObject(test_base.TestCase, _TestObject):
 # For more information on object version testing, read
 # http://docs.openstack.org/developer/zun/objects.html
 object_data = {
-    'Container': '1.16-ed5876b31900577fc7f236098b16d2b4',
+    'Container': '1.18-27d8d14a54f454bbcb1be20e883daf81',
     'Image': '1.0-0b976be24f4f6ee0d526e5c981ce0633',
     'MyObj': '1.0-34c4b1aadefd177b13f9a2f894cc23cd',
     'NUMANode': '1.0-cba878b70b2f8b52f1e031b41ac13b4e',
@@ -362,7 +362,7 @@ object_data = {
     'ResourceClass': '1.1-d661c7675b3cd5b8c3618b68ba64324e',
     'ResourceProvider': '1.0-92b427359d5a4cf9ec6c72cbe630ee24',
     'ZunService': '1.0-2a19ab9987a746621b2ada02d8aadf22',
-    'ComputeNode': '1.5-0d6ff86fbdc03859b77f1092e785ce10',
+    'ComputeNode': '1.6-3dda7dee6cea8d438bb418605c348ed0',
 }
 
 
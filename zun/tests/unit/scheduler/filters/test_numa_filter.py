@@ -0,0 +1,52 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from zun.common import context
+from zun import objects
+from zun.scheduler.filters import numa_filter
+from zun.tests import base
+
+
+class TestNUMAFilter(base.TestCase):
+
+    def setUp(self):
+        super(TestNUMAFilter, self).setUp()
+        self.context = context.RequestContext('fake_user', 'fake_project')
+        self.filt_cls = numa_filter.NUMAFilter()
+
+    def _get_host(self):
+        host = objects.ComputeNode(self.context)
+        host.numa_topology = objects.NUMATopology(nodes=[
+            objects.NUMANode(id=0, cpuset=set([1, 2, 3, 4]),
+                             pinned_cpus=set([1, 2])),
+            objects.NUMANode(id=1, cpuset=set([5, 6, 7, 8]),
+                             pinned_cpus=set([5]))])
+        return host
+
+    def test_numa_filter_pass(self):
+        container = objects.Container(self.context)
+        container.cpu = 2.5
+        self.assertTrue(self.filt_cls.host_passes(self._get_host(),
+                                                  container))
+
+    def test_numa_filter_fail(self):
+        container = objects.Container(self.context)
+        container.cpu = 4.0
+        self.assertFalse(self.filt_cls.host_passes(self._get_host(),
+                                                   container))
+
+    def test_numa_filter_no_numa_topology(self):
+        container = objects.Container(self.context)
+        container.cpu = 4.0
+        host = objects.ComputeNode(self.context)
+        host.numa_topology = None
+        self.assertTrue(self.filt_cls.host_passes(host, container))
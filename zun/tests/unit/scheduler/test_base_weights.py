@@ -0,0 +1,49 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Tests For Scheduler weights.
+"""
+
+from zun.scheduler import base_weights
+from zun.scheduler import weights
+from zun.tests import base
+
+
+class TestWeigher(base.TestCase):
+    def test_no_multiplier(self):
+        class FakeWeigher(base_weights.BaseWeigher):
+            def _weigh_object(self, *args, **kwargs):
+                pass
+
+        self.assertEqual(1.0,
+                         FakeWeigher().weight_multiplier())
+
+    def test_normalize(self):
+        def _check_normalize(test_data, expected_result,
+                             minval=None, maxval=None):
+            result = base_weights.normalize(test_data, minval, maxval)
+            self.assertEqual(expected_result, list(result))
+
+        _check_normalize([], [])
+        _check_normalize([1, 1, 1], [0, 0, 0])
+        _check_normalize([1, 2, 3], [0.0, 0.5, 1.0])
+        _check_normalize([10, 20, 30], [0.0, 0.5, 1.0])
+        _check_normalize([10, 20], [0.0, 1.0], minval=10, maxval=20)
+        _check_normalize([10, 20], [0.5, 1.0], minval=0, maxval=20)
+
+    def test_all_weighers(self):
+        classes = weights.all_weighers()
+        class_names = [cls.__name__ for cls in classes]
+        self.assertIn('CPUWeigher', class_names)
+        self.assertIn('RAMWeigher', class_names)
+        self.assertIn('ContainerCountWeigher', class_names)
@@ -47,6 +47,18 @@ class ChanceSchedulerTestCase(base.TestCase):
         calls = [mock.call(all_hosts)]
         self.assertEqual(calls, mock_random_choice.call_args_list)
 
+    @mock.patch.object(driver_cls, 'hosts_up')
+    def test_select_destinations_batch(self, mock_hosts_up):
+        mock_hosts_up.return_value = ['host1', 'host2']
+        test_container = utils.get_test_container()
+        containers = [objects.Container(self.context, **test_container)
+                      for i in range(5)]
+        dests = self.driver_cls().select_destinations(self.context, containers)
+        self.assertEqual(5, len(dests))
+        for dest in dests:
+            self.assertIn(dest['host'], ['host1', 'host2'])
+        self.assertEqual(1, mock_hosts_up.call_count)
+
     @mock.patch.object(driver_cls, 'hosts_up')
     def test_select_destinations_no_valid_host(self, mock_hosts_up):
 
@@ -12,10 +12,12 @@
 
 import mock
 
+from zun.api import servicegroup
 from zun.common import context
 from zun.common import exception
 from zun import objects
 from zun.scheduler import filter_scheduler
+from zun.scheduler import host_manager
 from zun.tests import base
 from zun.tests.unit.db import utils
 
@@ -35,13 +37,35 @@ class FilterSchedulerTestCase(base.TestCase):
     def setUp(self):
         super(FilterSchedulerTestCase, self).setUp()
         self.context = context.RequestContext('fake_user', 'fake_project')
+        p = mock.patch.object(host_manager, '_host_manager', None)
+        p.start()
+        self.addCleanup(p.stop)
+        p = mock.patch.object(servicegroup.ServiceGroup, 'service_is_up')
+        self.mock_service_is_up = p.start()
+        self.addCleanup(p.stop)
         self.driver = self.driver_cls()
 
+    def _create_node(self, hostname, cpu_used=0.0, mem_available=1024,
+                     total_containers=0):
+        node = objects.ComputeNode(self.context)
+        node.cpus = 48
+        node.cpu_used = cpu_used
+        node.mem_total = 1024
+        node.mem_free = mem_available
+        node.mem_available = mem_available
+        node.total_containers = total_containers
+        node.running_containers = total_containers
+        node.numa_topology = None
+        node.labels = {}
+        node.hostname = hostname
+        node.created_at = None
+        node.updated_at = None
+        return node
+
     @mock.patch.object(objects.ComputeNode, 'list')
     @mock.patch.object(objects.ZunService, 'list_by_binary')
-    @mock.patch('random.choice')
-    def test_select_destinations(self, mock_random_choice,
-                                 mock_list_by_binary, mock_compute_list):
+    def test_select_destinations(self, mock_list_by_binary,
+                                 mock_compute_list):
         all_services = [FakeService('service1', 'host1'),
                         FakeService('service2', 'host2'),
                         FakeService('service3', 'host3'),
@@ -50,30 +74,16 @@ class FilterSchedulerTestCase(base.TestCase):
         def _return_services(*args, **kwargs):
             return all_services
 
-        self.driver.servicegroup_api.service_is_up = mock.Mock(
-            return_value=True)
+        self.mock_service_is_up.return_value = True
         mock_list_by_binary.side_effect = _return_services
         test_container = utils.get_test_container()
         containers = [objects.Container(self.context, **test_container)]
-        node1 = objects.ComputeNode(self.context)
-        node1.cpus = 48
-        node1.cpu_used = 0.0
-        node1.hostname = 'host1'
-        node2 = objects.ComputeNode(self.context)
-        node2.cpus = 48
-        node2.cpu_used = 0.0
-        node2.hostname = 'host2'
-        node3 = objects.ComputeNode(self.context)
-        node3.cpus = 48
-        node3.cpu_used = 0.0
-        node3.hostname = 'host3'
-        node4 = objects.ComputeNode(self.context)
-        node4.cpus = 48
-        node4.cpu_used = 0.0
-        node4.hostname = 'host4'
+        node1 = self._create_node('host1', cpu_used=8.0)
+        node2 = self._create_node('host2', mem_available=512)
+        node3 = self._create_node('host3')
+        node4 = self._create_node('host4', total_containers=4)
         nodes = [node1, node2, node3, node4]
         mock_compute_list.return_value = nodes
-        mock_random_choice.side_effect = [node3]
         dests = self.driver.select_destinations(self.context, containers)
 
         self.assertEqual(1, len(dests))
@@ -81,8 +91,87 @@ class FilterSchedulerTestCase(base.TestCase):
         self.assertEqual('host3', host)
         self.assertIsNone(node)
 
-        calls = [mock.call(nodes)]
-        self.assertEqual(calls, mock_random_choice.call_args_list)
+    @mock.patch.object(objects.ComputeNode, 'list')
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_select_destinations_with_claims(self, mock_list_by_binary,
+                                             mock_compute_list):
+        all_services = [FakeService('service1', 'host1'),
+                        FakeService('service2', 'host2')]
+        self.mock_service_is_up.return_value = True
+        mock_list_by_binary.return_value = all_services
+        test_container = utils.get_test_container(cpu=1.0, memory='512M')
+        containers = [objects.Container(self.context, **test_container)
+                      for i in range(3)]
+        mock_compute_list.return_value = [
+            self._create_node('host1', mem_available=512),
+            self._create_node('host2', mem_available=512)]
+        dests = self.driver.select_destinations(self.context, containers[:2])
+        self.assertEqual(['host1', 'host2'],
+                         sorted(dest['host'] for dest in dests))
+        # Both hosts are full now, without reading the compute nodes again
+        self.assertRaises(exception.NoValidHost,
+                          self.driver.select_destinations, self.context,
+                          containers[2:])
+        self.assertEqual(1, mock_compute_list.call_count)
+
+    @mock.patch.object(objects.ComputeNode, 'list')
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_select_destinations_batch(self, mock_list_by_binary,
+                                       mock_compute_list):
+        all_services = [FakeService('service1', 'host1'),
+                        FakeService('service2', 'host2')]
+        self.mock_service_is_up.return_value = True
+        mock_list_by_binary.return_value = all_services
+        test_container = utils.get_test_container(cpu=1.0, memory='256M')
+        containers = [objects.Container(self.context, **test_container)
+                      for i in range(8)]
+        mock_compute_list.return_value = [
+            self._create_node('host1'),
+            self._create_node('host2')]
+        dests = self.driver.select_destinations(self.context, containers)
+        hosts = [dest['host'] for dest in dests]
+        self.assertEqual(4, hosts.count('host1'))
+        self.assertEqual(4, hosts.count('host2'))
+        self.assertEqual(1, mock_compute_list.call_count)
+        self.assertEqual(1, mock_list_by_binary.call_count)
+
+    @mock.patch.object(objects.ComputeNode, 'list')
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_select_destinations_batch_releases_claims(self,
+                                                       mock_list_by_binary,
+                                                       mock_compute_list):
+        all_services = [FakeService('service1', 'host1')]
+        self.mock_service_is_up.return_value = True
+        mock_list_by_binary.return_value = all_services
+        test_container = utils.get_test_container(cpu=1.0, memory='512M')
+        containers = [objects.Container(self.context, **test_container)
+                      for i in range(3)]
+        mock_compute_list.return_value = [self._create_node('host1')]
+        self.assertRaises(exception.NoValidHost,
+                          self.driver.select_destinations, self.context,
+                          containers)
+        host_state = self.driver.host_manager.get_host_states(
+            self.context)[0]
+        self.assertEqual(1024, host_state.mem_available)
+        self.assertEqual(0, host_state.total_containers)
+
+    @mock.patch.object(objects.ComputeNode, 'list')
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_select_destinations_stack(self, mock_list_by_binary,
+                                       mock_compute_list):
+        self.config(cpu_weight_multiplier=-1.0, ram_weight_multiplier=0.0,
+                    container_weight_multiplier=0.0, group='scheduler')
+        all_services = [FakeService('service1', 'host1'),
+                        FakeService('service2', 'host2')]
+        self.mock_service_is_up.return_value = True
+        mock_list_by_binary.return_value = all_services
+        test_container = utils.get_test_container()
+        containers = [objects.Container(self.context, **test_container)]
+        mock_compute_list.return_value = [
+            self._create_node('host1', cpu_used=8.0),
+            self._create_node('host2')]
+        dests = self.driver.select_destinations(self.context, containers)
+        self.assertEqual('host1', dests[0]['host'])
 
     @mock.patch.object(objects.ComputeNode, 'list')
     @mock.patch.object(objects.ZunService, 'list_by_binary')
@@ -94,8 +183,7 @@ class FilterSchedulerTestCase(base.TestCase):
         def _return_services(*args, **kwargs):
             return []
 
-        self.driver.servicegroup_api.service_is_up = mock.Mock(
-            return_value=True)
+        self.mock_service_is_up.return_value = True
         mock_list_by_binary.side_effect = _return_services
         test_container = utils.get_test_container()
         containers = [objects.Container(self.context, **test_container)]
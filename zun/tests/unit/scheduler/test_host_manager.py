@@ -0,0 +1,176 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Tests For HostManager
+"""
+
+import datetime
+
+import mock
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+
+from zun.api import servicegroup
+from zun.common import context
+from zun import objects
+from zun.scheduler import host_manager
+from zun.tests import base
+
+
+class HostStateTestCase(base.TestCase):
+
+    def setUp(self):
+        super(HostStateTestCase, self).setUp()
+        self.context = context.RequestContext('fake_user', 'fake_project')
+
+    def _get_compute_node(self, updated_at, cpu_used=0.0,
+                          mem_available=2048, container_uuids=None):
+        node = objects.ComputeNode(self.context)
+        node.hostname = 'host1'
+        node.cpus = 8
+        node.cpu_used = cpu_used
+        node.mem_total = 4096
+        node.mem_free = mem_available
+        node.mem_available = mem_available
+        node.total_containers = 0
+        node.running_containers = 0
+        node.numa_topology = None
+        node.labels = {}
+        node.container_uuids = container_uuids or []
+        node.created_at = None
+        node.updated_at = updated_at
+        return node
+
+    def _get_container(self):
+        container = objects.Container(self.context)
+        container.uuid = uuidutils.generate_uuid()
+        container.cpu = 1.0
+        container.memory = '512M'
+        return container
+
+    def test_consume_from_request(self):
+        host_state = host_manager.HostState('host1')
+        host_state.update(self._get_compute_node(timeutils.utcnow()))
+        host_state.consume_from_request(self._get_container())
+        self.assertEqual(1.0, host_state.cpu_used)
+        self.assertEqual(1536, host_state.mem_available)
+        self.assertEqual(1, host_state.total_containers)
+
+    def test_release_claim(self):
+        host_state = host_manager.HostState('host1')
+        host_state.update(self._get_compute_node(timeutils.utcnow()))
+        claim = host_state.consume_from_request(self._get_container())
+        host_state.release_claim(claim)
+        self.assertEqual(0.0, host_state.cpu_used)
+        self.assertEqual(2048, host_state.mem_available)
+        self.assertEqual(0, host_state.total_containers)
+        self.assertEqual([], host_state.claims)
+
+    def test_update_keeps_unreported_claims(self):
+        now = timeutils.utcnow()
+        host_state = host_manager.HostState('host1')
+        host_state.update(self._get_compute_node(
+            now - datetime.timedelta(seconds=60)))
+        container = self._get_container()
+        host_state.consume_from_request(container)
+
+        # The host reported after the claim without the container, the claim
+        # is kept
+        host_state.update(self._get_compute_node(
+            now + datetime.timedelta(seconds=30)))
+        self.assertEqual(1.0, host_state.cpu_used)
+        self.assertEqual(1536, host_state.mem_available)
+
+        # The host reported the container, the claim is dropped
+        host_state.update(self._get_compute_node(
+            now + datetime.timedelta(seconds=60), cpu_used=1.0,
+            mem_available=1536, container_uuids=[container.uuid]))
+        self.assertEqual([], host_state.claims)
+        self.assertEqual(1.0, host_state.cpu_used)
+        self.assertEqual(1536, host_state.mem_available)
+
+    def test_update_expires_claims(self):
+        self.config(host_claim_timeout=60, group='scheduler')
+        now = timeutils.utcnow()
+        host_state = host_manager.HostState('host1')
+        node = self._get_compute_node(now)
+        host_state.update(node)
+        host_state.consume_from_request(self._get_container())
+
+        with mock.patch.object(timeutils, 'utcnow',
+                               return_value=now + datetime.timedelta(
+                                   seconds=120)):
+            # The claim expired, even though the record hasn't changed
+            host_state.update(node)
+        self.assertEqual([], host_state.claims)
+        self.assertEqual(0.0, host_state.cpu_used)
+        self.assertEqual(2048, host_state.mem_available)
+
+
+class FakeService(object):
+
+    def __init__(self, host):
+        self.host = host
+
+
+class HostManagerTestCase(base.TestCase):
+
+    def setUp(self):
+        super(HostManagerTestCase, self).setUp()
+        self.context = context.RequestContext('fake_user', 'fake_project')
+        self.host_manager = host_manager.HostManager()
+        p = mock.patch.object(
+            servicegroup.ServiceGroup, 'service_is_up',
+            side_effect=lambda service: service.host != 'host2')
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _get_compute_node(self, hostname):
+        node = mock.Mock(hostname=hostname, created_at=None,
+                         updated_at=timeutils.utcnow())
+        return node
+
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    @mock.patch.object(objects.ComputeNode, 'list')
+    def test_get_host_states(self, mock_compute_list, mock_service_list):
+        self.config(host_state_refresh_interval=60, group='scheduler')
+        mock_compute_list.return_value = [self._get_compute_node('host1'),
+                                          self._get_compute_node('host2'),
+                                          self._get_compute_node('host3')]
+        mock_service_list.return_value = [FakeService('host1'),
+                                          FakeService('host2')]
+        host_states = self.host_manager.get_host_states(self.context)
+        self.assertEqual(['host1'], [h.hostname for h in host_states])
+
+        self.host_manager.get_host_states(self.context)
+        self.assertEqual(1, mock_compute_list.call_count)
+        self.assertEqual(1, mock_service_list.call_count)
+
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    @mock.patch.object(objects.ComputeNode, 'list')
+    def test_get_host_states_refresh_in_background(self, mock_compute_list,
+                                                   mock_service_list):
+        self.config(host_state_refresh_interval=0, group='scheduler')
+        mock_compute_list.return_value = [self._get_compute_node('host1')]
+        mock_service_list.return_value = [FakeService('host1')]
+        host_states = self.host_manager.get_host_states(self.context)
+        self.assertEqual(['host1'], [h.hostname for h in host_states])
+
+        mock_compute_list.return_value = []
+        self.host_manager._refreshed_at -= datetime.timedelta(seconds=1)
+        # The stale snapshot is served while it is refreshed
+        host_states = self.host_manager.get_host_states(self.context)
+        self.assertEqual(['host1'], [h.hostname for h in host_states])
+        self.host_manager._refresh_thread.wait()
+        self.assertEqual([], self.host_manager.get_host_states(self.context))
+        self.assertEqual(2, mock_compute_list.call_count)
@@ -0,0 +1,83 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from zun.common import context
+from zun import objects
+from zun.scheduler import weights
+from zun.scheduler.weights import container_count
+from zun.scheduler.weights import cpu
+from zun.scheduler.weights import ram
+from zun.tests import base
+
+
+class WeigherTestCase(base.TestCase):
+
+    def setUp(self):
+        super(WeigherTestCase, self).setUp()
+        self.context = context.RequestContext('fake_user', 'fake_project')
+        self.weight_handler = weights.HostWeightHandler()
+        self.container = objects.Container(self.context)
+
+    def _get_weighed_host(self, hosts, weigher_cls):
+        return self.weight_handler.get_weighed_objects(
+            [weigher_cls()], hosts, self.container)[0]
+
+    def _get_all_hosts(self):
+        host_values = [
+            ('host1', 8, 0.0, 512, 1),
+            ('host2', 8, 2.0, 1024, 2),
+            ('host3', 8, 6.0, 3072, 3),
+            ('host4', 8, 1.0, 8192, 0),
+        ]
+        hosts = []
+        for hostname, cpus, cpu_used, mem_available, containers in \
+                host_values:
+            host = objects.ComputeNode(self.context)
+            host.hostname = hostname
+            host.cpus = cpus
+            host.cpu_used = cpu_used
+            host.mem_total = 8192
+            host.mem_available = mem_available
+            host.total_containers = containers
+            hosts.append(host)
+        return hosts
+
+    def test_cpu_weigher_default(self):
+        weighed_host = self._get_weighed_host(self._get_all_hosts(),
+                                              cpu.CPUWeigher)
+        self.assertEqual(1.0, weighed_host.weight)
+        self.assertEqual('host1', weighed_host.obj.hostname)
+
+    def test_cpu_weigher_stack(self):
+        self.config(cpu_weight_multiplier=-1.0, group='scheduler')
+        weighed_host = self._get_weighed_host(self._get_all_hosts(),
+                                              cpu.CPUWeigher)
+        self.assertEqual('host3', weighed_host.obj.hostname)
+
+    def test_ram_weigher_default(self):
+        weighed_host = self._get_weighed_host(self._get_all_hosts(),
+                                              ram.RAMWeigher)
+        self.assertEqual(1.0, weighed_host.weight)
+        self.assertEqual('host4', weighed_host.obj.hostname)
+
+    def test_container_count_weigher_default(self):
+        weighed_host = self._get_weighed_host(
+            self._get_all_hosts(), container_count.ContainerCountWeigher)
+        self.assertEqual(0.0, weighed_host.weight)
+        self.assertEqual('host4', weighed_host.obj.hostname)
+
+    def test_container_count_weigher_stack(self):
+        self.config(container_weight_multiplier=1.0, group='scheduler')
+        weighed_host = self._get_weighed_host(
+            self._get_all_hosts(), container_count.ContainerCountWeigher)
+        self.assertEqual(1.0, weighed_host.weight)
+        self.assertEqual('host3', weighed_host.obj.hostname)